@@ -0,0 +1,73 @@
+import time
+from typing import List, Optional
+
+from .models import SemanticInput, IntentClassificationResult, Rule
+from .engine import evaluate_rules
+from .llm_fallback import llm_pick_intent
+from .utils import logger, Deadline, INTENT_RULE_CONFIDENCE_THRESHOLD, INTENT_LLM_FALLBACK_ENABLED
+from .metrics import RULE_ENGINE_DURATION, CLASSIFICATIONS
+from .tracing import tracer
+
+
+async def classify(
+    input_data: SemanticInput,
+    rules: List[Rule],
+    debug: bool = False,
+    allow_llm: bool = True,
+    deadline: Optional[Deadline] = None,
+) -> IntentClassificationResult:
+    """
+    Rule-based classification with LLM fallback when confidence is low.
+    Shared by the /classify_intent endpoint and the orchestrator's in-process mode.
+    """
+    # 1. Evaluate Rules
+    start = time.perf_counter()
+    with tracer.start_as_current_span("rule_evaluation", attributes={"rules": len(rules)}) as span:
+        engine_result = evaluate_rules(input_data, rules)
+        span.set_attribute("best_score", engine_result["best_score"])
+    RULE_ENGINE_DURATION.observe(time.perf_counter() - start)
+    
+    best_intent = engine_result["best_intent"]
+    best_score = engine_result["best_score"]
+    best_tactic = engine_result["best_tactic"]
+    matched_rules = engine_result["matched_rules"]
+    candidates = engine_result["candidates"]
+
+    # 2. Check Threshold
+    if best_score >= INTENT_RULE_CONFIDENCE_THRESHOLD:
+        logger.info(f"Rule matched with high confidence: {best_intent} ({best_score})")
+        CLASSIFICATIONS.labels("rules").inc()
+        return IntentClassificationResult(
+            intent=best_intent,
+            tactic=best_tactic,
+            score=best_score,
+            matched_rules=matched_rules,
+            source="rules",
+            explanation="High confidence rule match",
+            debug_info=engine_result if debug else None
+        )
+    
+    # 3. Fallback
+    if INTENT_LLM_FALLBACK_ENABLED and allow_llm:
+        logger.info(f"Low rule confidence ({best_score}). Falling back to LLM.")
+        llm_result = await llm_pick_intent(input_data, candidates, deadline)
+        CLASSIFICATIONS.labels("llm").inc()
+        
+        if debug:
+            llm_result.debug_info = engine_result
+            
+        return llm_result
+    
+    # 4. Return best rule result anyway if fallback disabled
+    reason = "fallback disabled" if not INTENT_LLM_FALLBACK_ENABLED else "LLM not allowed by caller"
+    logger.info(f"Low rule confidence ({best_score}) and {reason}. Returning best rule match.")
+    CLASSIFICATIONS.labels("rules").inc()
+    return IntentClassificationResult(
+        intent=best_intent if best_intent else "unknown",
+        tactic=best_tactic,
+        score=best_score,
+        matched_rules=matched_rules,
+        source="rules",
+        explanation=f"Low confidence rule match ({reason})",
+        debug_info=engine_result if debug else None
+    )
@@ -2,20 +2,25 @@ import os
 import json
 import asyncio
 from typing import Dict, Any
-from groq import AsyncGroq
+from groq import AsyncGroq, NOT_GIVEN
 from .models import SemanticInput, IntentClassificationResult
-from .utils import GROQ_API_KEY, logger
+from .utils import GROQ_API_KEY, GROQ_BASE_URL, logger, Deadline
+from .metrics import track_llm_call, LLM_RETRIES
+from .tracing import tracer
 
-client = AsyncGroq(api_key=GROQ_API_KEY)
+client = AsyncGroq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL)
+LLM_MODEL = "qwen/qwen3-32b" # Using the model requested/used in other services
 
 SYSTEM_PROMPT = """You are a cybersecurity SOC assistant that classifies high-level attack intent from semantic log analysis. 
 Answer ONLY with a JSON object.
 """
 
-async def llm_pick_intent(semantic: SemanticInput, candidates: Dict[str, Any]) -> IntentClassificationResult:
+async def llm_pick_intent(semantic: SemanticInput, candidates: Dict[str, Any], deadline: Deadline = None) -> IntentClassificationResult:
     """
     Uses LLM to pick the best intent when rule-based confidence is low.
+    Raises DeadlineExceeded rather than calling (or retrying) the LLM after the caller's deadline.
     """
+    deadline = deadline or Deadline()
     
     # Construct a summary of candidates for the LLM
     candidates_summary = []
@@ -43,13 +48,23 @@ async def llm_pick_intent(semantic: SemanticInput, candidates: Dict[str, Any]) -
     logger.info("Dispatching to Groq LLM for intent fallback...")
 
     for attempt in range(3):
+        deadline.check(f"LLM fallback attempt {attempt+1}")
+        if attempt:
+            LLM_RETRIES.inc()
         try:
-            completion = await client.chat.completions.create(
-                model="qwen/qwen3-32b", # Using the model requested/used in other services
-                temperature=0,
-                response_format={"type": "json_object"},
-                messages=messages
-            )
+            with tracer.start_as_current_span("llm.call", attributes={"llm.model": LLM_MODEL, "llm.attempt": attempt + 1}) as span, \
+                    track_llm_call(LLM_MODEL) as call:
+                completion = await client.chat.completions.create(
+                    model=LLM_MODEL,
+                    temperature=0,
+                    response_format={"type": "json_object"},
+                    messages=messages,
+                    # Without a deadline the client's own timeout applies (None would disable it)
+                    timeout=deadline.remaining() if deadline.expires_at is not None else NOT_GIVEN
+                )
+                call.usage = completion.usage
+                if completion.usage:
+                    span.set_attribute("llm.total_tokens", completion.usage.total_tokens or 0)
 
             content = completion.choices[0].message.content
             parsed = json.loads(content)
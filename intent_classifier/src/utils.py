@@ -1,5 +1,7 @@
 import os
+import time
 import logging
+from typing import Optional
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -13,6 +15,8 @@ load_dotenv()
 
 # Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Point at llm_stub (e.g. http://localhost:8005) to load-test without the real API
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or "https://api.groq.com"
 INTENT_RULE_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_RULE_CONFIDENCE_THRESHOLD", "0.7"))
 INTENT_LLM_FALLBACK_ENABLED = os.getenv("INTENT_LLM_FALLBACK_ENABLED", "true").lower() == "true"
 
@@ -22,3 +26,34 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger("intent_classifier")
+
+
+# Request deadline
+# The orchestrator sends the time it is still willing to wait (ms) in X-Deadline-Ms.
+# Expensive work (LLM calls, embedding) is skipped once nobody will read the answer.
+# Each service keeps its own copy: every image is built from its own directory only.
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the caller's deadline has passed before some expensive step."""
+
+
+class Deadline:
+    def __init__(self, header_value: Optional[str] = None):
+        self.expires_at = None
+        if header_value:
+            try:
+                self.expires_at = time.monotonic() + float(header_value) / 1000
+            except ValueError:
+                pass
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when the caller set no deadline."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, step: str):
+        if self.expires_at is not None and self.remaining() <= 0:
+            raise DeadlineExceeded(f"Request deadline exceeded before {step}")
@@ -0,0 +1,203 @@
+"""
+Local stand-in for the Groq (OpenAI-compatible) chat completions API, for load tests that
+must not spend quota or leave the machine. Point a service at it with
+GROQ_BASE_URL=http://localhost:8005 (any GROQ_API_KEY is accepted).
+"""
+import math
+import time
+import uuid
+import random
+import asyncio
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .config import StubConfig
+from .responders import detect_kind, answer, count_tokens
+
+app = FastAPI(title="LLM Stub")
+
+config = StubConfig()
+rng = random.Random(config.seed)
+# (time, tokens) of requests in the last minute, for the RPM/TPM quotas
+window: Deque[Tuple[float, int]] = deque()
+stats: Dict[str, Counter] = {}
+
+
+def reset_stats():
+    stats.update(
+        requests=Counter(),
+        outcomes=Counter(),
+        prompt_tokens=Counter(),
+        completion_tokens=Counter(),
+    )
+
+
+reset_stats()
+
+
+class ChatMessage(BaseModel):
+    role: str
+    content: Optional[str] = None
+
+
+class ChatCompletionRequest(BaseModel):
+    model: str
+    messages: List[ChatMessage]
+    temperature: Optional[float] = None
+    response_format: Optional[Dict[str, Any]] = None
+    stream: bool = False
+
+
+def sample_latency() -> float:
+    """Base latency in seconds, drawn from the configured distribution."""
+    mean, spread = config.latency_ms, config.latency_spread
+    if config.latency_dist == "fixed":
+        ms = mean
+    elif config.latency_dist == "uniform":
+        ms = rng.uniform(mean - spread, mean + spread)
+    elif config.latency_dist == "normal":
+        ms = rng.gauss(mean, spread)
+    elif config.latency_dist == "exponential":
+        ms = rng.expovariate(1 / mean) if mean > 0 else 0.0
+    else:
+        ms = mean * math.exp(rng.gauss(0, spread))
+    return max(0.0, ms) / 1000
+
+
+def over_quota(tokens: int) -> bool:
+    now = time.monotonic()
+    while window and window[0][0] < now - 60:
+        window.popleft()
+    if config.requests_per_minute and len(window) >= config.requests_per_minute:
+        return True
+    if config.tokens_per_minute and sum(t for _, t in window) + tokens > config.tokens_per_minute:
+        return True
+    window.append((now, tokens))
+    return False
+
+
+def error(status: int, message: str, error_type: str, code: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    # Same body shape as the real API, so SDK error handling and retries behave the same
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": error_type, "code": code}},
+        headers=headers,
+    )
+
+
+def rate_limited(kind: str, reason: str) -> JSONResponse:
+    stats["outcomes"][f"{kind}:rate_limited"] += 1
+    return error(
+        429, f"Rate limit reached ({reason})", "requests", "rate_limit_exceeded",
+        headers={"retry-after": f"{config.retry_after_s:g}"},
+    )
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: ChatCompletionRequest):
+    messages = [m.model_dump() for m in request.messages]
+    kind = detect_kind(messages)
+    stats["requests"][kind] += 1
+    if request.stream:
+        stats["outcomes"][f"{kind}:bad_request"] += 1
+        return error(400, "Streaming is not supported by the stub", "invalid_request_error", "unsupported")
+
+    content = answer(kind, messages)
+    prompt_tokens = sum(count_tokens(m["content"] or "") + 4 for m in messages)
+
+    # Quotas and injected faults are decided up front, like a provider would
+    if over_quota(prompt_tokens):
+        return rate_limited(kind, "quota")
+    draw = rng.random()
+    if draw < config.rate_limit_rate:
+        return rate_limited(kind, "injected")
+    draw -= config.rate_limit_rate
+    if draw < config.error_rate:
+        stats["outcomes"][f"{kind}:error"] += 1
+        await asyncio.sleep(sample_latency() / 2)
+        return error(500, "Injected internal server error", "internal_server_error", "internal_error")
+    draw -= config.error_rate
+    if draw < config.hang_rate:
+        stats["outcomes"][f"{kind}:hang"] += 1
+        await asyncio.sleep(config.hang_ms / 1000)
+        return error(504, "Injected hang", "internal_server_error", "timeout")
+    draw -= config.hang_rate
+    if draw < config.invalid_json_rate:
+        stats["outcomes"][f"{kind}:invalid_json"] += 1
+        content = content[: len(content) // 2]
+    else:
+        stats["outcomes"][f"{kind}:ok"] += 1
+
+    completion_tokens = count_tokens(content)
+    base = sample_latency()
+    generation = completion_tokens * config.ms_per_output_token / 1000
+    await asyncio.sleep(base + generation)
+    stats["prompt_tokens"][kind] += prompt_tokens
+    stats["completion_tokens"][kind] += completion_tokens
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.model,
+        "system_fingerprint": "llm_stub",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "logprobs": None,
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "queue_time": 0.0,
+            "prompt_time": round(base, 4),
+            "completion_time": round(generation, 4),
+            "total_time": round(base + generation, 4),
+        },
+    }
+
+
+@app.get("/stub/stats")
+async def get_stats():
+    return {
+        **{name: dict(counter) for name, counter in stats.items()},
+        "total_tokens": sum(stats["prompt_tokens"].values()) + sum(stats["completion_tokens"].values()),
+        "requests_last_minute": len(window),
+    }
+
+
+@app.post("/stub/reset")
+async def reset():
+    reset_stats()
+    window.clear()
+    return {"status": "reset"}
+
+
+@app.get("/stub/config", response_model=StubConfig)
+async def get_config():
+    return config
+
+
+@app.put("/stub/config", response_model=StubConfig)
+async def update_config(changes: Dict[str, Any]):
+    """Changes some settings at runtime (e.g. between load-test phases)."""
+    global config, rng
+    try:
+        config = config.model_validate({**config.model_dump(), **changes})
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"detail": str(e)})
+    if "seed" in changes:
+        rng = random.Random(config.seed)
+    return config
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
@@ -0,0 +1,42 @@
+import os
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+class StubConfig(BaseModel):
+    """Behaviour of the stand-in LLM. Read from LLM_STUB_* at startup, changeable via PUT /stub/config."""
+
+    # Catch bad LLM_STUB_* values at startup too
+    model_config = ConfigDict(validate_default=True, extra="forbid")
+
+    # Base latency per completion: fixed | uniform | normal | lognormal | exponential.
+    # latency_ms is the median (lognormal) or mean; latency_spread is the lognormal sigma,
+    # the normal standard deviation in ms or the uniform half-width in ms.
+    latency_dist: Literal["fixed", "uniform", "normal", "lognormal", "exponential"] = Field(
+        os.getenv("LLM_STUB_LATENCY_DIST", "lognormal")
+    )
+    latency_ms: float = Field(_env_float("LLM_STUB_LATENCY_MS", 600.0), ge=0)
+    latency_spread: float = Field(_env_float("LLM_STUB_LATENCY_SPREAD", 0.4), ge=0)
+    # Generation time added per completion token (Groq serves this model at a few hundred tokens/s)
+    ms_per_output_token: float = Field(_env_float("LLM_STUB_MS_PER_OUTPUT_TOKEN", 2.5), ge=0)
+
+    # Fault injection: fraction of requests answered with a 500, a 429, content that is not
+    # valid JSON, or no answer for hang_ms (to exercise client timeouts and deadlines)
+    error_rate: float = Field(_env_float("LLM_STUB_ERROR_RATE", 0.0), ge=0, le=1)
+    rate_limit_rate: float = Field(_env_float("LLM_STUB_RATE_LIMIT_RATE", 0.0), ge=0, le=1)
+    invalid_json_rate: float = Field(_env_float("LLM_STUB_INVALID_JSON_RATE", 0.0), ge=0, le=1)
+    hang_rate: float = Field(_env_float("LLM_STUB_HANG_RATE", 0.0), ge=0, le=1)
+    hang_ms: float = Field(_env_float("LLM_STUB_HANG_MS", 60000.0), ge=0)
+
+    # Provider-style quotas over a sliding minute (0 = unlimited); excess requests get a 429
+    requests_per_minute: int = Field(int(os.getenv("LLM_STUB_RPM", "0")), ge=0)
+    tokens_per_minute: int = Field(int(os.getenv("LLM_STUB_TPM", "0")), ge=0)
+    retry_after_s: float = Field(_env_float("LLM_STUB_RETRY_AFTER", 1.0), ge=0)
+
+    # Seed for latency and fault draws; unset = different on every start
+    seed: Optional[int] = Field(int(os.environ["LLM_STUB_SEED"]) if os.getenv("LLM_STUB_SEED") else None)
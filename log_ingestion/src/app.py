@@ -1,5 +1,7 @@
+import time
+from typing import List
 from fastapi import FastAPI, HTTPException
-from .schemas import IngestRequest, NormalizedEvent
+from .schemas import IngestRequest, NormalizedEvent, BatchIngestResult
 from .detectors.log_type_detector import detect_log_type
 from .normalizers import (
     windows_eventlog,
@@ -7,36 +9,67 @@ from .normalizers import (
     linux_auditd,
     generic_syslog
 )
+from .metrics import instrument_app, NORMALIZE_DURATION
+from .tracing import trace_app, tracer
+from .profiler import install_profiler
 
 app = FastAPI(title="Log Ingestion & Normalization")
+instrument_app(app)
+trace_app(app)
+install_profiler(app)
 
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
 
-@app.post("/ingest", response_model=NormalizedEvent)
-async def ingest_log(request: IngestRequest):
+def normalize_request(request: IngestRequest) -> NormalizedEvent:
     """
-    Ingests a raw log, detects its type, and normalizes it.
+    Detects the log type and dispatches to the matching normalizer.
     """
+    start = time.perf_counter()
     # 1. Detect Type
-    log_type = detect_log_type(request.raw_log, request.fields, request.source_type)
-    
+    with tracer.start_as_current_span("detect_log_type") as span:
+        log_type = detect_log_type(request.raw_log, request.fields, request.source_type)
+        span.set_attribute("log_type", log_type)
+
     # 2. Dispatch to Normalizer
-    try:
+    with tracer.start_as_current_span("normalize"):
         if log_type == "windows_eventlog":
-            normalized = windows_eventlog.normalize(request.raw_log, request.fields)
+            event = windows_eventlog.normalize(request.raw_log, request.fields)
         elif log_type == "sysmon":
-            normalized = sysmon.normalize(request.raw_log, request.fields)
+            event = sysmon.normalize(request.raw_log, request.fields)
         elif log_type == "linux_auditd":
-            normalized = linux_auditd.normalize(request.raw_log, request.fields)
+            event = linux_auditd.normalize(request.raw_log, request.fields)
         else:
             # Fallback
-            normalized = generic_syslog.normalize(request.raw_log, request.fields)
-            
+            log_type = "generic_syslog"
+            event = generic_syslog.normalize(request.raw_log, request.fields)
+    NORMALIZE_DURATION.labels(log_type).observe(time.perf_counter() - start)
+    return event
+
+@app.post("/ingest", response_model=NormalizedEvent)
+async def ingest_log(request: IngestRequest):
+    """
+    Ingests a raw log, detects its type, and normalizes it.
+    """
+    try:
+        normalized = normalize_request(request)
     except Exception as e:
         # In production, log this error
         raise HTTPException(status_code=500, detail=f"Normalization failed: {str(e)}")
 
     return normalized
 
+@app.post("/ingest_batch", response_model=List[BatchIngestResult])
+async def ingest_batch(requests: List[IngestRequest]):
+    """
+    Normalizes a batch of raw logs in one round-trip.
+    Failures are reported per item so one bad log does not fail the batch.
+    """
+    results = []
+    for index, request in enumerate(requests):
+        try:
+            results.append(BatchIngestResult(index=index, event=normalize_request(request)))
+        except Exception as e:
+            results.append(BatchIngestResult(index=index, error=f"Normalization failed: {str(e)}"))
+    return results
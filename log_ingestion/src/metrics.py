@@ -0,0 +1,52 @@
+"""
+Prometheus metrics, exported on GET /metrics.
+
+Every service carries its own copy of the request instrumentation (instrument_app) and
+namespaces its metrics with the service name, so services loaded in-process by the
+orchestrator export side by side without clashing.
+"""
+import time
+
+from fastapi import FastAPI, Request, Response
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+NAMESPACE = "log_ingestion"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled, by route and status code.",
+    ["method", "route", "status"], namespace=NAMESPACE,
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.",
+    ["method", "route"], namespace=NAMESPACE, buckets=LATENCY_BUCKETS,
+)
+
+NORMALIZE_DURATION = Histogram(
+    "normalize_duration_seconds", "Time to detect the log type and normalize one log.",
+    ["log_type"], namespace=NAMESPACE, buckets=LATENCY_BUCKETS,
+)
+
+
+def instrument_app(app: FastAPI):
+    """Records count and latency of every request by route template, and serves /metrics."""
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # The route template (not the raw path) keeps label cardinality bounded
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            if path != "/metrics":
+                HTTP_REQUESTS.labels(request.method, path, str(status)).inc()
+                HTTP_LATENCY.labels(request.method, path).observe(time.perf_counter() - start)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
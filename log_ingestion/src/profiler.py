@@ -0,0 +1,144 @@
+"""
+On-demand sampling profiler, served on POST /admin/profile.
+
+    curl -X POST -H "X-Admin-Token: $ADMIN_TOKEN" "localhost:8003/admin/profile?seconds=30" > profile.folded
+    curl -X POST -H "X-Admin-Token: $ADMIN_TOKEN" "localhost:8003/admin/profile?requests=200" > profile.folded
+
+While a profile runs, a background thread snapshots the stack of every thread
+(sys._current_frames) PROFILER_INTERVAL_MS apart. The result is in folded-stack format (one
+"thread;outer;...;inner count" line per distinct stack), which flamegraph.pl, speedscope and
+inferno read directly. With `requests=N` only samples taken while a request is in flight
+count, and the profile ends once N requests have finished (or after PROFILER_MAX_SECONDS).
+
+Nothing runs between profiles: no sampler thread and only a flag check per request.
+The endpoint is disabled unless ADMIN_TOKEN is set.
+"""
+import os
+import sys
+import hmac
+import time
+import asyncio
+import threading
+from collections import Counter
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "120"))
+ADMIN_PATH_PREFIX = "/admin/"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Collects folded stacks of all threads from a background thread until stopped."""
+
+    def __init__(self, interval: float, request_limit: Optional[int] = None):
+        self.interval = interval
+        # Profile only while requests are in flight, until `request_limit` have finished
+        self.request_limit = request_limit
+        self.only_in_requests = request_limit is not None
+        self.in_flight = 0
+        self.requests_done = 0
+        self.enough_requests = asyncio.Event()
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        return time.perf_counter() - self.started
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self.only_in_requests and self.in_flight == 0:
+                continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not token or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def install_profiler(app: FastAPI):
+    """Adds POST /admin/profile and the request hook used by `?requests=N` profiles."""
+    state = {"profiler": None}
+
+    @app.middleware("http")
+    async def count_profiled_requests(request: Request, call_next):
+        profiler = state["profiler"]
+        if profiler is None or not profiler.only_in_requests or request.url.path.startswith(ADMIN_PATH_PREFIX):
+            return await call_next(request)
+        profiler.in_flight += 1
+        try:
+            return await call_next(request)
+        finally:
+            profiler.in_flight -= 1
+            profiler.requests_done += 1
+            if profiler.requests_done >= profiler.request_limit:
+                profiler.enough_requests.set()
+
+    @app.post(f"{ADMIN_PATH_PREFIX}profile", include_in_schema=False, response_class=PlainTextResponse)
+    async def profile(
+        seconds: Optional[float] = Query(None, gt=0),
+        requests: Optional[int] = Query(None, gt=0),
+        x_admin_token: Optional[str] = Header(None),
+    ):
+        require_admin(x_admin_token)
+        if (seconds is None) == (requests is None):
+            raise HTTPException(status_code=400, detail="Pass exactly one of seconds or requests")
+        if state["profiler"] is not None:
+            raise HTTPException(status_code=409, detail="A profile is already running")
+
+        profiler = SamplingProfiler(PROFILER_INTERVAL_MS / 1000, request_limit=requests)
+        state["profiler"] = profiler
+        profiler.start()
+        try:
+            if requests is None:
+                await asyncio.sleep(min(seconds, PROFILER_MAX_SECONDS))
+            else:
+                try:
+                    await asyncio.wait_for(profiler.enough_requests.wait(), PROFILER_MAX_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            elapsed = profiler.stop()
+            state["profiler"] = None
+
+        return PlainTextResponse(
+            profiler.folded(),
+            headers={
+                "X-Profile-Samples": str(profiler.samples),
+                "X-Profile-Seconds": f"{elapsed:.1f}",
+                "X-Profile-Requests": str(profiler.requests_done),
+            },
+        )
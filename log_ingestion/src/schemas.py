@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 class IngestRequest(BaseModel):
@@ -16,3 +16,8 @@ class NormalizedEvent(BaseModel):
     message: str
     raw_log: str
     normalized_fields: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchIngestResult(BaseModel):
+    index: int
+    event: Optional[NormalizedEvent] = None
+    error: Optional[str] = None
@@ -0,0 +1,149 @@
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+# Allow "python scripts/benchmark_retrieval.py" from the mitre_reasoner directory
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.embeddings import SUPPORTED_BACKENDS
+from src.knowledge_base import MitreKnowledgeBase
+from src.json_ingest import ingest_mitre_json
+from src.retriever import MitreRetriever
+from src.model_registry import current_rss_mb
+from src.utils import hnsw_collection_metadata
+
+# Index settings compared when --configs is not given
+DEFAULT_CONFIGS = [
+    {"name": "hnsw-default"},
+    {"name": "hnsw-ef64", "search_ef": 64},
+    {"name": "hnsw-m32-ef128", "m": 32, "construction_ef": 200, "search_ef": 128},
+    {"name": "exact", "index": "exact"},
+]
+
+def load_queries(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+def is_relevant(technique_id: str, expected: list, match_parent: bool) -> bool:
+    if not technique_id:
+        return False
+    if technique_id in expected:
+        return True
+    # Optionally count a parent/sub-technique of an expected ID as a hit
+    return match_parent and technique_id.split(".")[0] in {e.split(".")[0] for e in expected}
+
+def store_dir(work_dir: Path, backend: str, metadata: dict) -> Path:
+    params = "-".join(f"{k.split(':')[1]}{v}" for k, v in sorted(metadata.items()))
+    return work_dir / f"{backend}-{params}"
+
+def run_config(config: dict, backend: str, queries: list, args) -> dict:
+    metadata = hnsw_collection_metadata(
+        m=config.get("m"),
+        construction_ef=config.get("construction_ef"),
+        search_ef=config.get("search_ef"),
+    )
+    persist_dir = store_dir(Path(args.work_dir), backend, metadata)
+
+    rss_before = current_rss_mb()
+    if not persist_dir.exists():
+        print(f"Building store {persist_dir}...")
+        ingest_mitre_json(args.mitre_json, persist_dir=str(persist_dir),
+                          embedding_backend=backend, collection_metadata=metadata)
+
+    kb = MitreKnowledgeBase(
+        persist_directory=str(persist_dir),
+        index_backend=config.get("index", "hnsw"),
+        collection_metadata=metadata,
+        embedding_backend=backend,
+    )
+    kb.load_existing()
+    retriever = MitreRetriever(kb)
+    retriever.warm_up()
+    rss_after = current_rss_mb()
+
+    latencies_ms = []
+    recalls = {k: [] for k in args.k}
+    reciprocal_ranks = []
+    max_k = max(args.k)
+
+    for query in queries:
+        expected = query["expected"]
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = retriever.search(query["summary"], k=max_k)
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        ranked = [r.technique_id for r in results]
+        relevant = [is_relevant(tid, expected, args.match_parent) for tid in ranked]
+
+        for k in args.k:
+            # A query counts as recalled once any expected technique shows up in the top k
+            recalls[k].append(1.0 if any(relevant[:k]) else 0.0)
+
+        first_hit = next((i for i, hit in enumerate(relevant) if hit), None)
+        reciprocal_ranks.append(1.0 / (first_hit + 1) if first_hit is not None else 0.0)
+
+    return {
+        "config": config["name"],
+        "embedding_backend": backend,
+        "index_backend": kb.index_backend,
+        "collection_metadata": metadata,
+        **{f"recall@{k}": round(statistics.mean(v), 4) for k, v in recalls.items()},
+        f"mrr@{max_k}": round(statistics.mean(reciprocal_ranks), 4),
+        "latency_p50_ms": round(percentile(latencies_ms, 50), 2),
+        "latency_p99_ms": round(percentile(latencies_ms, 99), 2),
+        "latency_mean_ms": round(statistics.mean(latencies_ms), 2),
+        "rss_mb": round(rss_after, 1),
+        "rss_delta_mb": round(rss_after - rss_before, 1),
+        "queries": len(queries),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MITRE retrieval recall and latency per backend and index setting.")
+    parser.add_argument("--mitre-json", default=str(BASE_DIR / "data" / "enterprise-attack.json"))
+    parser.add_argument("--queries", default=str(BASE_DIR / "benchmarks" / "retrieval_queries.jsonl"))
+    parser.add_argument("--configs", help="JSON file with a list of index configs (name, index, m, construction_ef, search_ef)")
+    parser.add_argument("--backends", nargs="+", default=["torch"], choices=SUPPORTED_BACKENDS)
+    parser.add_argument("--k", nargs="+", type=int, default=[1, 5, 10])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per query")
+    parser.add_argument("--match-parent", action="store_true", help="Count parent/sub-techniques of expected IDs as hits")
+    parser.add_argument("--work-dir", default=str(BASE_DIR / "benchmarks" / "stores"))
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    configs = DEFAULT_CONFIGS
+    if args.configs:
+        with open(args.configs, "r", encoding="utf-8") as f:
+            configs = json.load(f)
+
+    results = []
+    for backend in args.backends:
+        for config in configs:
+            print(f"Running {config['name']} on {backend}...")
+            result = run_config(config, backend, queries, args)
+            results.append(result)
+            print(json.dumps(result, indent=2))
+
+    max_k = max(args.k)
+    print(f"\n{'config':<20} {'backend':<10} {'recall@' + str(max_k):>10} {'mrr':>8} {'p50 ms':>8} {'p99 ms':>8} {'rss MB':>8}")
+    for r in results:
+        print(f"{r['config']:<20} {r['embedding_backend']:<10} {r[f'recall@{max_k}']:>10.3f} "
+              f"{r[f'mrr@{max_k}']:>8.3f} {r['latency_p50_ms']:>8.2f} {r['latency_p99_ms']:>8.2f} {r['rss_mb']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Allow "python scripts/check_embedding_parity.py" from the mitre_reasoner directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.embeddings import get_embedding_function, check_parity, SUPPORTED_BACKENDS
+
+DEFAULT_TEXTS = [
+    "A process dumped the memory of lsass.exe to disk.",
+    "Multiple failed logon attempts for the administrator account from a remote host.",
+    "PowerShell launched with an encoded command line and hidden window.",
+    "A scheduled task was created to run a binary from a temporary directory at logon.",
+    "Outbound connection to a rare external IP on port 4444 from a workstation.",
+    "A new service was installed pointing to an executable in the user profile.",
+    "Registry Run key modified to launch a script at startup.",
+    "Large volume of files renamed with a new extension in a short time window.",
+]
+
+def load_texts(json_path: str, limit: int):
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    texts = [
+        obj["description"]
+        for obj in data.get("objects", [])
+        if obj.get("type") == "attack-pattern" and obj.get("description")
+    ]
+    return texts[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description="Report cosine drift of an embedding backend against the reference model.")
+    parser.add_argument("--backend", default="onnx-int8", choices=SUPPORTED_BACKENDS)
+    parser.add_argument("--reference", default="torch", choices=SUPPORTED_BACKENDS)
+    parser.add_argument("--mitre-json", help="Use technique descriptions from an ATT&CK STIX bundle as the sample set")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Fail if any text falls below this cosine")
+    args = parser.parse_args()
+
+    texts = load_texts(args.mitre_json, args.limit) if args.mitre_json else DEFAULT_TEXTS
+
+    report = check_parity(
+        candidate=get_embedding_function(args.backend),
+        reference=get_embedding_function(args.reference),
+        texts=texts,
+    )
+    report.update({"backend": args.backend, "reference": args.reference})
+    print(json.dumps(report, indent=2))
+
+    if report["min_cosine"] < args.min_cosine:
+        print(f"Parity check FAILED: min cosine {report['min_cosine']:.4f} < {args.min_cosine}")
+        sys.exit(1)
+    print("Parity check passed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from typing import Optional
+
+from .models import SemanticAnalysisRequest, MitreTechniqueResponse
+from .retriever import MitreRetriever
+from .llm_reasoner import LLMReasoner
+from .utils import Deadline
+from .tracing import tracer
+
+
+def analyze(
+    request: SemanticAnalysisRequest,
+    retriever: MitreRetriever,
+    reasoner: LLMReasoner,
+    deadline: Optional[Deadline] = None,
+) -> MitreTechniqueResponse:
+    """
+    Retrieval followed by LLM selection of the best technique.
+    Shared by the /analyze endpoint and the orchestrator's in-process mode.
+    Raises DeadlineExceeded when the deadline passes before retrieval or the LLM call.
+    """
+    deadline = deadline or Deadline()
+
+    # 1. Retrieve Candidates using semantic_summary
+    # We use the summary as the query vector for similarity search
+    if isinstance(request.semantic_features, dict):
+        flattened_features = []
+        for key, value in request.semantic_features.items():
+            if isinstance(value, list):
+                flattened_features.extend(value)
+            else:
+                flattened_features.append(str(value))
+        request.semantic_features = flattened_features
+    deadline.check("retrieval")
+    with tracer.start_as_current_span("retrieval", attributes={"k": request.k}) as span:
+        candidates = retriever.search(request.semantic_summary, k=request.k)
+        span.set_attribute("candidates", len(candidates))
+
+    if not candidates:
+        return MitreTechniqueResponse(
+            attack_technique="None",
+            technique_id="None",
+            tactic="None",
+            kill_chain_phase="None",
+            confidence=0.0,
+            explanation="No matching techniques found in knowledge base.",
+            related_techniques=[]
+        )
+
+    if not request.use_llm:
+        return reasoner.build_response(
+            candidates[0], candidates, 0.0, "LLM reasoning skipped by caller. Returning top retrieval candidate."
+        )
+
+    # 2. Reason using LLM (Groq)
+    deadline.check("LLM reasoning")
+    response = reasoner.select_best_technique(
+        summary=request.semantic_summary,
+        features=request.semantic_features,
+        intent=request.intent,
+        candidates=candidates,
+        timeout=deadline.remaining()
+    )
+
+    return response
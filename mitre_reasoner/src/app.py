@@ -1,78 +1,117 @@
-from fastapi import FastAPI, HTTPException
-from .models import SemanticAnalysisRequest, MitreTechniqueResponse
+import asyncio
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from .models import SemanticAnalysisRequest, MitreTechniqueResponse, TechniqueInfo
+from .catalogue import TechniqueCatalogue
 from .knowledge_base import MitreKnowledgeBase
 from .retriever import MitreRetriever
 from .llm_reasoner import LLMReasoner
+from .analysis import analyze
+from .model_registry import registry
+from .utils import WARMUP_ENABLED, WARMUP_ROUNDS, Deadline, DeadlineExceeded, DEADLINE_HEADER
+from .metrics import instrument_app
+from .tracing import trace_app
+from .profiler import install_profiler
 import os
 from .json_ingest import ingest_mitre_json
 
 app = FastAPI(title="MITRE Reasoner Microservice")
+instrument_app(app)
+trace_app(app)
+install_profiler(app)
 
 # Global instances
-# Persist directory relative to where app is run
-kb = MitreKnowledgeBase(persist_directory="./chroma_db")
+# The knowledge base (and its embedding model) is created during startup, not at import time,
+# so the model is loaded exactly once and shared with ingestion through the model registry.
+kb = None
 retriever = None
+catalogue = TechniqueCatalogue()
 reasoner = LLMReasoner()
+ready = False
+startup_error = None
 
-@app.on_event("startup")
-async def startup_event():
-    global retriever
+def initialize():
+    """
+    Loads (or builds) the vector store, then warms it up.
+    Runs in a worker thread so /health answers while the replica is still cold.
+    """
+    global kb, retriever, catalogue, ready, startup_error
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-    chroma_dir = "./chroma_db"
+    # Relative to the service directory (not the CWD) so the store is found when loaded in-process
+    chroma_dir = os.path.join(base_dir, "chroma_db")
     mitre_json_path = os.path.join(base_dir, "data", "enterprise-attack.json")
 
-    if not os.path.exists(chroma_dir):
-        print("No vector DB found. Ingesting MITRE JSON...")
-        ingest_mitre_json(mitre_json_path)
-    else:
-        print("Vector DB exists. Loading existing Chroma...")
+    try:
+        if os.path.exists(mitre_json_path):
+            catalogue = TechniqueCatalogue.from_stix(mitre_json_path)
+        else:
+            print(f"Warning: {mitre_json_path} not found. Falling back to metadata stored in the vector DB.")
+        reasoner.catalogue = catalogue
+
+        kb = MitreKnowledgeBase(persist_directory=chroma_dir)
+
+        if not os.path.exists(chroma_dir):
+            print("No vector DB found. Ingesting MITRE JSON...")
+            ingest_mitre_json(mitre_json_path, persist_dir=chroma_dir, collection_metadata=kb.collection_metadata)
+        else:
+            print("Vector DB exists. Loading existing Chroma...")
 
         try:
             kb.load_existing()
         except Exception as e:
             print("Error loading DB, regenerating:", e)
-            ingest_mitre_json(mitre_json_path)
+            ingest_mitre_json(mitre_json_path, persist_dir=chroma_dir, collection_metadata=kb.collection_metadata)
+            kb.load_existing()
+
+        retriever = MitreRetriever(kb, catalogue)
+
+        if WARMUP_ENABLED:
+            executed = retriever.warm_up(rounds=WARMUP_ROUNDS)
+            print(f"Warm-up complete ({executed} dummy queries).")
+
+        ready = True
+        print("MITRE Reasoner ready.")
+    except Exception as e:
+        startup_error = str(e)
+        print("MITRE Reasoner failed to initialize:", e)
 
-    retriever = MitreRetriever(kb)
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    print(f"Abandoning request: {exc}")
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+@app.on_event("startup")
+async def startup_event():
+    asyncio.get_running_loop().run_in_executor(None, initialize)
+
+@app.get("/health")
+async def health_check():
+    # Liveness: the process is up, regardless of warm-up state
+    return {"status": "ok", "ready": ready}
+
+@app.get("/ready")
+async def readiness_check():
+    # Readiness: only route traffic here once the store is loaded and warmed up
+    body = {"ready": ready, "error": startup_error, **registry.stats()}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+@app.get("/techniques/{technique_id}", response_model=TechniqueInfo)
+async def get_technique(technique_id: str):
+    info = catalogue.get(technique_id)
+    if not info:
+        raise HTTPException(status_code=404, detail=f"Unknown technique '{technique_id}'")
+    return info
 
 @app.post("/analyze", response_model=MitreTechniqueResponse)
-async def analyze_semantic_data(request: SemanticAnalysisRequest):
-    if not retriever:
-        raise HTTPException(status_code=500, detail="Retriever not initialized")
-        
-    # 1. Retrieve Candidates using semantic_summary
-    # We use the summary as the query vector for similarity search
-    if isinstance(request.semantic_features, dict):
-        flattened_features = []
-        for key, value in request.semantic_features.items():
-            if isinstance(value, list):
-                flattened_features.extend(value)
-            else:
-                flattened_features.append(str(value))
-        request.semantic_features = flattened_features
-    candidates = retriever.search(request.semantic_summary, k=request.k)
-    
-    if not candidates:
-        return MitreTechniqueResponse(
-            attack_technique="None",
-            technique_id="None",
-            tactic="None",
-            kill_chain_phase="None",
-            confidence=0.0,
-            explanation="No matching techniques found in knowledge base.",
-            related_techniques=[]
-        )
-
-    # 2. Reason using LLM (Groq)
-    response = reasoner.select_best_technique(
-        summary=request.semantic_summary,
-        features=request.semantic_features,
-        intent=request.intent,
-        candidates=candidates
-    )
-    
-    return response
+async def analyze_semantic_data(request: SemanticAnalysisRequest, http_request: Request):
+    if not ready or not retriever:
+        raise HTTPException(status_code=503, detail="Retriever not initialized")
+
+    # Skip embedding and the LLM call once the caller's X-Deadline-Ms budget is spent (504)
+    deadline = Deadline(http_request.headers.get(DEADLINE_HEADER))
+
+    return analyze(request, retriever, reasoner, deadline)
 
 if __name__ == "__main__":
     import uvicorn
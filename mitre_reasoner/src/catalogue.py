@@ -0,0 +1,109 @@
+import json
+import os
+from typing import Dict, List, Optional
+from .models import TechniqueInfo, MitreTechnique
+
+# Words kept lowercase when turning phase names into tactic display names
+_LOWERCASE_WORDS = {"and", "of", "the"}
+
+
+def format_tactic(phase_name: str) -> str:
+    """credential-access -> Credential Access, command-and-control -> Command and Control"""
+    words = phase_name.replace("_", "-").split("-")
+    return " ".join(
+        w if i > 0 and w in _LOWERCASE_WORDS else w.capitalize()
+        for i, w in enumerate(words)
+    )
+
+
+def format_tactics(phase_names: List[str]) -> str:
+    return ", ".join(format_tactic(p) for p in phase_names)
+
+
+def load_stix_objects(json_path: str) -> list:
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f"Could not find {json_path}")
+    with open(json_path, "r", encoding="utf-8") as f:
+        return json.load(f).get("objects", [])
+
+
+class TechniqueCatalogue:
+    """
+    In-memory technique ID -> metadata map built from the ATT&CK STIX bundle.
+    Used to fill tactics, kill chain phases, parents and platforms without asking the LLM.
+    """
+
+    def __init__(self, techniques: Optional[Dict[str, TechniqueInfo]] = None):
+        self.techniques: Dict[str, TechniqueInfo] = techniques or {}
+
+    @classmethod
+    def from_stix(cls, json_path: str) -> "TechniqueCatalogue":
+        return cls.from_objects(load_stix_objects(json_path))
+
+    @classmethod
+    def from_objects(cls, objects: list) -> "TechniqueCatalogue":
+        techniques: Dict[str, TechniqueInfo] = {}
+
+        for obj in objects:
+            if obj.get("type") != "attack-pattern":
+                continue
+            # Revoked/deprecated entries share IDs with their replacements
+            if obj.get("revoked") or obj.get("x_mitre_deprecated"):
+                continue
+
+            technique_id = None
+            url = None
+            for ref in obj.get("external_references", []):
+                if ref.get("source_name") == "mitre-attack":
+                    technique_id = ref.get("external_id")
+                    url = ref.get("url")
+            if not technique_id:
+                continue
+
+            tactics = []
+            for phase in obj.get("kill_chain_phases", []):
+                name = phase.get("phase_name")
+                if name and name not in tactics:
+                    tactics.append(name)
+
+            techniques[technique_id] = TechniqueInfo(
+                technique_id=technique_id,
+                name=obj.get("name", "Unknown Technique"),
+                url=url,
+                tactics=tactics,
+                parent_technique=technique_id.split(".")[0] if "." in technique_id else None,
+                platforms=obj.get("x_mitre_platforms", []),
+            )
+
+        # Resolve parent names once all techniques are known
+        for info in techniques.values():
+            if info.parent_technique and info.parent_technique in techniques:
+                info.parent_name = techniques[info.parent_technique].name
+
+        print(f"Technique catalogue built with {len(techniques)} techniques.")
+        return cls(techniques)
+
+    def __len__(self) -> int:
+        return len(self.techniques)
+
+    def __contains__(self, technique_id: str) -> bool:
+        return technique_id in self.techniques
+
+    def get(self, technique_id: Optional[str]) -> Optional[TechniqueInfo]:
+        if not technique_id:
+            return None
+        return self.techniques.get(technique_id.strip().upper())
+
+    def enrich(self, technique: MitreTechnique) -> MitreTechnique:
+        """Overwrites catalogue-owned fields on a retrieved candidate."""
+        info = self.get(technique.technique_id)
+        if not info:
+            return technique
+
+        technique.name = info.name
+        technique.url = info.url or technique.url
+        technique.tactic = format_tactics(info.tactics)
+        technique.kill_chain_phase = ", ".join(info.tactics)
+        technique.subtechnique_of = info.parent_technique
+        technique.platforms = info.platforms
+        return technique
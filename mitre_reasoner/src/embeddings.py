@@ -1,9 +1,177 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+import os
+import time
+from typing import List, Dict, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from .model_registry import registry
+from .metrics import EMBEDDING_DURATION
+from .tracing import tracer
+from .utils import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    EMBEDDING_ONNX_FILE,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_MAX_LENGTH,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_THREADS,
+)
 
-def get_embedding_function():
+SUPPORTED_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence-transformers compatible embedder running on ONNX Runtime.
+    Reproduces the MiniLM pipeline (mean pooling + L2 normalization) without importing PyTorch.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        onnx_file: str = EMBEDDING_ONNX_FILE,
+        quantized: bool = False,
+        max_length: int = EMBEDDING_MAX_LENGTH,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        num_threads: int = EMBEDDING_THREADS,
+        cache_dir: str = EMBEDDING_CACHE_DIR,
+    ):
+        # Optional dependencies: only required when an ONNX backend is selected
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        from huggingface_hub import hf_hub_download
+
+        model_path = hf_hub_download(repo_id=model_name, filename=onnx_file)
+        tokenizer_path = hf_hub_download(repo_id=model_name, filename="tokenizer.json")
+
+        if quantized:
+            model_path = _quantize_int8(model_path, model_name, cache_dir)
+
+        self.model_name = model_name
+        self.model_path = model_path
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalization (same as the sentence-transformers modules)
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+
+def _quantize_int8(model_path: str, model_name: str, cache_dir: str) -> str:
+    """
+    Dynamically quantizes the fp32 graph to int8 weights once and caches the result on disk.
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(cache_dir, exist_ok=True)
+    quantized_path = os.path.join(cache_dir, f"{model_name.replace('/', '__')}.int8.onnx")
+    if not os.path.exists(quantized_path):
+        print(f"Quantizing {model_path} to int8 -> {quantized_path}...")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def get_embedding_function(backend: Optional[str] = None):
     """
     Returns the embedding function used in MITREembed.
+    The backend is selected with MITRE_EMBEDDING_BACKEND (torch, onnx, onnx-int8).
+    Each backend is loaded once per process and shared through the model registry.
     """
-    return HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L12-v2"
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of {SUPPORTED_BACKENDS}")
+
+    return registry.get(
+        f"embedding:{backend}:{EMBEDDING_MODEL_NAME}",
+        lambda: _load_embedding_function(backend),
     )
+
+
+class TimedEmbeddings(Embeddings):
+    """Wraps any embedder; records how long each embed call takes (per backend) and traces it."""
+
+    def __init__(self, inner: Embeddings, backend: str):
+        self.inner = inner
+        self.backend = backend
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        try:
+            with tracer.start_as_current_span("embedding", attributes={"backend": self.backend, "texts": len(texts)}):
+                return self.inner.embed_documents(texts)
+        finally:
+            EMBEDDING_DURATION.labels(self.backend, "documents").observe(time.perf_counter() - start)
+
+    def embed_query(self, text: str) -> List[float]:
+        start = time.perf_counter()
+        try:
+            with tracer.start_as_current_span("embedding", attributes={"backend": self.backend, "texts": 1}):
+                return self.inner.embed_query(text)
+        finally:
+            EMBEDDING_DURATION.labels(self.backend, "query").observe(time.perf_counter() - start)
+
+
+def _load_embedding_function(backend: str):
+    if backend == "torch":
+        # Imported lazily so the ONNX backends never pay the PyTorch import cost
+        from langchain_huggingface import HuggingFaceEmbeddings
+        inner = HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME
+        )
+    elif backend == "onnx":
+        inner = OnnxEmbeddings()
+    else:
+        inner = OnnxEmbeddings(quantized=True)
+    return TimedEmbeddings(inner, backend)
+
+
+def check_parity(candidate: Embeddings, reference: Embeddings, texts: List[str]) -> Dict[str, float]:
+    """
+    Compares two embedders on the same texts and reports the cosine drift of the candidate
+    against the reference (drift = 1 - cosine similarity).
+    """
+    cand = np.array(candidate.embed_documents(texts), dtype=np.float32)
+    ref = np.array(reference.embed_documents(texts), dtype=np.float32)
+
+    cand /= np.clip(np.linalg.norm(cand, axis=1, keepdims=True), 1e-12, None)
+    ref /= np.clip(np.linalg.norm(ref, axis=1, keepdims=True), 1e-12, None)
+    cosines = (cand * ref).sum(axis=1)
+
+    return {
+        "texts": len(texts),
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "mean_drift": float(1.0 - cosines.mean()),
+        "max_drift": float(1.0 - cosines.min()),
+    }
@@ -1,8 +1,13 @@
-import json
 import os
-from langchain_community.vectorstores import Chroma
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Optional
+from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from .embeddings import get_embedding_function
+from .catalogue import load_stix_objects
+from .utils import EMBEDDING_BACKEND, INGEST_BATCH_SIZE, INGEST_WORKERS, hnsw_collection_metadata
 
 
 def safe_value(v):
@@ -12,19 +17,9 @@ def safe_value(v):
     return v
 
 
-def ingest_mitre_json(json_path: str, persist_dir: str = "./chroma_db"):
-    if not os.path.exists(json_path):
-        raise FileNotFoundError(f"Could not find {json_path}")
-
-    print(f"Loading MITRE ATT&CK JSON from {json_path}...")
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    objects = data.get("objects", [])
-    print(f"Found {len(objects)} STIX objects")
-
+def build_documents(objects: list) -> List[Document]:
+    """Turns STIX attack-pattern objects into one Document per technique."""
     documents = []
-    embedding_fn = get_embedding_function()
 
     for obj in objects:
         if obj.get("type") != "attack-pattern":
@@ -79,17 +74,81 @@ def ingest_mitre_json(json_path: str, persist_dir: str = "./chroma_db"):
             "kill_chain_phase": safe_value([p.get("phase_name") for p in kill_chain_phases]),
             "subtechnique_of": safe_value(subtechnique_of)
         }
+        # Chroma rejects None metadata values
+        metadata = {k: v for k, v in metadata.items() if v is not None}
 
         documents.append(
-            Document(page_content=description, metadata=metadata)
+            Document(page_content=description, metadata=metadata, id=obj.get("id", technique_id))
         )
 
-    print(f"Preparing to ingest {len(documents)} techniques into ChromaDB...")
+    return documents
+
+
+def ingest_mitre_json(
+    json_path: str,
+    persist_dir: str = "./chroma_db",
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    embedding_backend: Optional[str] = None,
+    collection_metadata: Optional[dict] = None,
+):
+    """
+    Embeds all techniques in parallel batches and streams each finished batch into Chroma.
+    At most two batches per worker are submitted ahead, so only their vectors are held in memory.
+    """
+    batch_size = batch_size or INGEST_BATCH_SIZE
+    backend = (embedding_backend or EMBEDDING_BACKEND).lower()
+    # torch already spreads one batch over every core; more workers only oversubscribe them
+    workers = workers or INGEST_WORKERS or (1 if backend == "torch" else os.cpu_count() or 1)
+
+    print(f"Loading MITRE ATT&CK JSON from {json_path}...")
+    objects = load_stix_objects(json_path)
+    print(f"Found {len(objects)} STIX objects")
+
+    embedding_fn = get_embedding_function(backend)
+    documents = build_documents(objects)
+    total = len(documents)
+
+    batches = [documents[i:i + batch_size] for i in range(0, total, batch_size)]
+    print(f"Preparing to ingest {total} techniques into ChromaDB "
+          f"({len(batches)} batches of {batch_size}, {workers} workers)...")
 
-    vectordb = Chroma.from_documents(
-        documents=documents,
-        embedding=embedding_fn,
-        persist_directory=persist_dir
+    vectordb = Chroma(
+        persist_directory=persist_dir,
+        embedding_function=embedding_fn,
+        collection_metadata=collection_metadata or hnsw_collection_metadata()
     )
 
-    print("Ingestion complete. Vector store updated.")
+    start = time.perf_counter()
+    done = 0
+    pending_batches = iter(batches)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+
+        def submit_next():
+            batch = next(pending_batches, None)
+            if batch is not None:
+                in_flight[pool.submit(embedding_fn.embed_documents, [doc.page_content for doc in batch])] = batch
+
+        for _ in range(workers * 2):
+            submit_next()
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                # Dropped from the window once written, so its vectors can be freed
+                batch = in_flight.pop(future)
+                embeddings = future.result()
+                vectordb._collection.upsert(
+                    ids=[doc.id for doc in batch],
+                    embeddings=embeddings,
+                    metadatas=[doc.metadata for doc in batch],
+                    documents=[doc.page_content for doc in batch],
+                )
+                submit_next()
+
+                done += len(batch)
+                elapsed = time.perf_counter() - start
+                print(f"  [{done}/{total}] techniques embedded ({done / max(elapsed, 1e-9):.1f} docs/s)")
+
+    print(f"Ingestion complete in {time.perf_counter() - start:.1f}s. Vector store updated.")
+    return vectordb
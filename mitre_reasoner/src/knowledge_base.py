@@ -1,14 +1,72 @@
+import numpy as np
 import pandas as pd
+from typing import List, Optional, Tuple
 from langchain_community.document_loaders import DataFrameLoader
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
 from .embeddings import get_embedding_function
+from .utils import INDEX_BACKEND, hnsw_collection_metadata
 import os
 
+INDEX_BACKENDS = ("hnsw", "exact")
+
+class ExactIndex:
+    """
+    Brute-force nearest neighbour search over every vector in the collection.
+    Scores use the same distance as the collection space so results are comparable with HNSW.
+    """
+
+    def __init__(self, collection, space: str = "l2"):
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        self.ids = data["ids"]
+        self.documents = data["documents"]
+        self.metadatas = data["metadatas"]
+        self.matrix = np.asarray(data["embeddings"], dtype=np.float32)
+        self.space = space
+        self._sq_norms = (self.matrix ** 2).sum(axis=1)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query_vector: List[float], k: int) -> List[Tuple[Document, float]]:
+        if not len(self.ids):
+            return []
+        q = np.asarray(query_vector, dtype=np.float32)
+        dots = self.matrix @ q
+
+        if self.space == "cosine":
+            norms = np.sqrt(self._sq_norms) * max(float(np.linalg.norm(q)), 1e-12)
+            distances = 1.0 - dots / np.clip(norms, 1e-12, None)
+        elif self.space == "ip":
+            distances = 1.0 - dots
+        else:  # squared L2, as reported by Chroma
+            distances = self._sq_norms - 2.0 * dots + float(q @ q)
+
+        k = min(k, len(distances))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return [
+            (Document(page_content=self.documents[i], metadata=self.metadatas[i] or {}, id=self.ids[i]), float(distances[i]))
+            for i in top
+        ]
+
 class MitreKnowledgeBase:
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    def __init__(
+        self,
+        persist_directory: str = "./chroma_db",
+        index_backend: Optional[str] = None,
+        collection_metadata: Optional[dict] = None,
+        embedding_backend: Optional[str] = None,
+    ):
         self.persist_directory = persist_directory
-        self.embedding_function = get_embedding_function()
+        self.embedding_function = get_embedding_function(embedding_backend)
+        self.index_backend = (index_backend or INDEX_BACKEND).lower()
+        if self.index_backend not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown index backend '{self.index_backend}'. Expected one of {INDEX_BACKENDS}")
+        # HNSW parameters only take effect when the collection is created
+        self.collection_metadata = collection_metadata or hnsw_collection_metadata()
         self.vectordb = None
+        self.exact_index = None
 
     def load_from_csv(self, csv_path: str):
         """
@@ -38,7 +96,8 @@ class MitreKnowledgeBase:
         self.vectordb = Chroma.from_documents(
             documents=documents,
             embedding=self.embedding_function,
-            persist_directory=self.persist_directory
+            persist_directory=self.persist_directory,
+            collection_metadata=self.collection_metadata
         )
         # In newer Chroma versions, persist is automatic, but keeping for compatibility if needed
         # self.vectordb.persist() 
@@ -49,5 +108,19 @@ class MitreKnowledgeBase:
         print(f"Loading existing vector store from {self.persist_directory}...")
         self.vectordb = Chroma(
             persist_directory=self.persist_directory,
-            embedding_function=self.embedding_function
+            embedding_function=self.embedding_function,
+            collection_metadata=self.collection_metadata
         )
+        self.exact_index = None
+        if self.index_backend == "exact":
+            space = (self.vectordb._collection.metadata or {}).get("hnsw:space", "l2")
+            self.exact_index = ExactIndex(self.vectordb._collection, space=space)
+            print(f"Exact index loaded with {len(self.exact_index)} vectors.")
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
+        """Returns (document, distance) pairs from the configured index backend."""
+        if not self.vectordb:
+            self.load_existing()
+        if self.exact_index is not None:
+            return self.exact_index.search(self.embedding_function.embed_query(query), k)
+        return self.vectordb.similarity_search_with_score(query, k=k)
@@ -1,14 +1,24 @@
 import os
 import json
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
-from groq import Groq
+from groq import Groq, NOT_GIVEN
 from .models import MitreTechnique, MitreTechniqueResponse
+from .catalogue import TechniqueCatalogue
+from .metrics import track_llm_call
+from .tracing import tracer
 
 load_dotenv()
 
+LLM_MODEL = "qwen/qwen3-32b"
+# Point at llm_stub (e.g. http://localhost:8005) to load-test without the real API
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or "https://api.groq.com"
+
 class LLMReasoner:
-    def __init__(self):
+    def __init__(self, catalogue: Optional[TechniqueCatalogue] = None):
+        # Tactic, kill chain phase and names come from the catalogue, never from the LLM
+        self.catalogue = catalogue or TechniqueCatalogue()
+
         # Initialize Groq client
         # Ensure GROQ_API_KEY is set in environment variables
         api_key = os.environ.get("GROQ_API_KEY")
@@ -16,93 +26,122 @@ class LLMReasoner:
             print("Warning: GROQ_API_KEY not found in environment variables.")
             self.client = None
         else:
-            self.client = Groq(api_key=api_key)
+            self.client = Groq(api_key=api_key, base_url=GROQ_BASE_URL)
 
-    def select_best_technique(self, summary: str, features: List[str], intent: str, candidates: List[MitreTechnique]) -> MitreTechniqueResponse:
+    def build_response(
+        self,
+        chosen: Optional[MitreTechnique],
+        candidates: List[MitreTechnique],
+        confidence: float,
+        explanation: str,
+    ) -> MitreTechniqueResponse:
         """
-        Uses Groq LLM to select the best MITRE technique from candidates.
+        Fills the response deterministically from the chosen candidate and the catalogue.
         """
-        if not self.client:
-            # Fallback if no API key
-            best = candidates[0] if candidates else None
+        if not chosen:
             return MitreTechniqueResponse(
-                attack_technique=best.name if best else "Unknown",
-                technique_id=best.technique_id if best else "T0000",
+                attack_technique="Unknown",
+                technique_id="T0000",
                 tactic="Unknown",
                 kill_chain_phase="Unknown",
-                confidence=0.0,
-                explanation="Groq API key missing. Returning top candidate.",
-                related_techniques=[c.name for c in candidates[1:]] if candidates else []
+                confidence=confidence,
+                explanation=explanation,
+                related_techniques=[]
             )
 
+        chosen = self.catalogue.enrich(chosen)
+        return MitreTechniqueResponse(
+            attack_technique=chosen.name,
+            technique_id=chosen.technique_id or "T0000",
+            tactic=chosen.tactic or "Unknown",
+            kill_chain_phase=chosen.kill_chain_phase or "Unknown",
+            confidence=confidence,
+            explanation=explanation,
+            related_techniques=[c.name for c in candidates if c.technique_id != chosen.technique_id]
+        )
+
+    def select_best_technique(
+        self,
+        summary: str,
+        features: List[str],
+        intent: str,
+        candidates: List[MitreTechnique],
+        timeout: Optional[float] = None,
+    ) -> MitreTechniqueResponse:
+        """
+        Uses Groq LLM to select the best MITRE technique from candidates.
+        The LLM only picks an ID; everything else is filled in from the catalogue.
+        `timeout` bounds the LLM call (seconds) so it ends when the caller's deadline does.
+        """
+        best = candidates[0] if candidates else None
+
+        if not self.client:
+            # Fallback if no API key
+            return self.build_response(best, candidates, 0.0, "Groq API key missing. Returning top candidate.")
+
         # Construct context from candidates
         candidates_context = ""
-        for i, tech in enumerate(candidates):
+        for tech in candidates:
             candidates_context += f"""
-            Candidate {i+1}:
-            Name: {tech.name}
-            ID: {tech.technique_id}
-            Description: {tech.description[:300]}...
-            Score: {tech.score}
+            - {tech.technique_id}: {tech.name} ({tech.tactic or 'unknown tactic'}). {tech.description[:200]}...
             """
 
         prompt = f"""
-        You are a cybersecurity expert. Analyze the following semantic information about a security event and map it to the most accurate MITRE ATT&CK technique from the provided candidates.
+        Map this security event to the best matching MITRE ATT&CK technique from the candidates.
 
-        INPUT DATA:
+        EVENT:
         - Semantic Summary: "{summary}"
         - Semantic Features: {features}
         - Intent: "{intent}"
 
-        CANDIDATE TECHNIQUES (Retrieved from Knowledge Base):
+        CANDIDATES:
         {candidates_context}
 
-        TASK:
-        1. Evaluate which candidate best matches the input data.
-        2. Determine the Tactic and Kill Chain Phase (infer if not explicitly provided).
-        3. Assign a confidence score (0.0 to 1.0).
-        4. Provide a clear explanation.
-        5. List other relevant techniques from the candidates.
-
-        OUTPUT FORMAT:
-        Return ONLY a valid JSON object with the following structure:
+        Return ONLY a valid JSON object:
         {{
-          "attack_technique": "Name of the best technique",
           "technique_id": "Txxxx",
-          "tactic": "Inferred tactic (e.g., Persistence, Discovery)",
-          "kill_chain_phase": "Inferred phase",
           "confidence": 0.85,
-          "explanation": "Reasoning...",
-          "related_techniques": ["Name of candidate 2", "Name of candidate 3"]
+          "explanation": "One or two sentences of reasoning."
         }}
         """
 
         try:
-            completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a helpful cybersecurity assistant that outputs JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                model="qwen/qwen3-32b",
-                response_format={"type": "json_object"}
-            )
-            
+            with tracer.start_as_current_span("llm.call", attributes={"llm.model": LLM_MODEL, "candidates": len(candidates)}) as span, \
+                    track_llm_call(LLM_MODEL) as call:
+                completion = self.client.chat.completions.create(
+                    messages=[
+                        {"role": "system", "content": "You are a helpful cybersecurity assistant that outputs JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    model=LLM_MODEL,
+                    response_format={"type": "json_object"},
+                    # Without a deadline the client's own timeout applies (None would disable it)
+                    timeout=timeout if timeout is not None else NOT_GIVEN
+                )
+                call.usage = completion.usage
+                if completion.usage:
+                    span.set_attribute("llm.total_tokens", completion.usage.total_tokens or 0)
+
             response_content = completion.choices[0].message.content
             data = json.loads(response_content)
-            
-            return MitreTechniqueResponse(**data)
+
+            chosen_id = str(data.get("technique_id", "")).strip().upper()
+            chosen = next((c for c in candidates if (c.technique_id or "").upper() == chosen_id), None)
+            if not chosen:
+                # The model picked something outside the candidate set; keep the retrieval winner
+                return self.build_response(
+                    best, candidates, 0.0,
+                    f"LLM selected '{chosen_id}', which is not a retrieved candidate. Returning top candidate."
+                )
+
+            return self.build_response(
+                chosen,
+                candidates,
+                float(data.get("confidence", 0.5)),
+                data.get("explanation", "LLM selected technique"),
+            )
 
         except Exception as e:
             print(f"LLM Error: {e}")
             # Fallback
-            best = candidates[0] if candidates else None
-            return MitreTechniqueResponse(
-                attack_technique=best.name if best else "Error",
-                technique_id=best.technique_id if best else "Error",
-                tactic="Error",
-                kill_chain_phase="Error",
-                confidence=0.0,
-                explanation=f"LLM processing failed: {str(e)}",
-                related_techniques=[]
-            )
-
+            return self.build_response(best, candidates, 0.0, f"LLM processing failed: {str(e)}")
@@ -0,0 +1,62 @@
+import os
+import time
+import threading
+from typing import Any, Callable, Dict
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Non-Linux fallback: peak RSS (KB on Linux, bytes on macOS)
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that loads each model exactly once and records
+    how long it took and how much resident memory it added.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            if key in self._models:
+                return self._models[key]
+
+            rss_before = current_rss_mb()
+            start = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start
+            rss_after = current_rss_mb()
+
+            self._models[key] = model
+            self._stats[key] = {
+                "load_seconds": round(load_seconds, 3),
+                "rss_delta_mb": round(rss_after - rss_before, 1),
+                "rss_after_mb": round(rss_after, 1),
+            }
+            print(f"Loaded model '{key}' in {load_seconds:.2f}s (+{rss_after - rss_before:.1f} MB RSS)")
+            return model
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": dict(self._stats),
+            "process_rss_mb": round(current_rss_mb(), 1),
+        }
+
+
+registry = ModelRegistry()
@@ -6,6 +6,8 @@ class SemanticAnalysisRequest(BaseModel):
     semantic_features: Union[List[str], Dict[str, Any]]
     intent: str
     k: Optional[int] = 5
+    # False = return the top retrieval match without LLM reasoning (orchestrator degraded mode)
+    use_llm: bool = True
 
 class MitreTechnique(BaseModel):
     technique_id: Optional[str] = None
@@ -18,6 +20,17 @@ class MitreTechnique(BaseModel):
     tactic: Optional[str] = None
     kill_chain_phase: Optional[str] = None
     subtechnique_of: Optional[str] = None
+    platforms: List[str] = []
+
+
+class TechniqueInfo(BaseModel):
+    technique_id: str
+    name: str
+    url: Optional[str] = None
+    tactics: List[str] = []              # ATT&CK phase names, e.g. "credential-access"
+    parent_technique: Optional[str] = None
+    parent_name: Optional[str] = None
+    platforms: List[str] = []
 
 
 class MitreTechniqueResponse(BaseModel):
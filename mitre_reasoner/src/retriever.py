@@ -1,43 +1,78 @@
+import json
+import time
+from typing import Optional
 from .knowledge_base import MitreKnowledgeBase
+from .catalogue import TechniqueCatalogue, format_tactics
 from .models import MitreTechnique
 from .utils import extract_technique_id
+from .metrics import RETRIEVAL_DURATION
+
+WARMUP_QUERIES = [
+    "Suspicious process accessed credential material in memory",
+    "Repeated failed authentication attempts against a user account",
+    "Script interpreter executed an obfuscated command line",
+]
+
+def _phase_list(value) -> list:
+    """Metadata lists are stored JSON-encoded (see json_ingest.safe_value)."""
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+        return parsed if isinstance(parsed, list) else [str(parsed)]
+    except (TypeError, ValueError):
+        return [str(value)]
 
 class MitreRetriever:
-    def __init__(self, knowledge_base: MitreKnowledgeBase):
+    def __init__(self, knowledge_base: MitreKnowledgeBase, catalogue: Optional[TechniqueCatalogue] = None):
         self.kb = knowledge_base
+        self.catalogue = catalogue or TechniqueCatalogue()
 
     def search(self, query: str, k: int = 5) -> list[MitreTechnique]:
         """
         Performs semantic similarity search.
         Adapted from ProductSearchWrapper.predict in MITREembed.ipynb
         """
-        if not self.kb.vectordb:
-            self.kb.load_existing()
-
         # Perform search
-        # MITREembed uses similarity_search_with_score
-        results = self.kb.vectordb.similarity_search_with_score(query, k=k)
+        # MITREembed uses similarity_search_with_score (or the exact index, see MITRE_INDEX_BACKEND)
+        start = time.perf_counter()
+        results = self.kb.search(query, k=k)
+        RETRIEVAL_DURATION.observe(time.perf_counter() - start)
 
         techniques = []
         for doc, score in results:
-            # Extract metadata
+            # Extract metadata (keys written by json_ingest)
             metadata = doc.metadata
-            
+            url = metadata.get('url', '')
+            phases = _phase_list(metadata.get("kill_chain_phase"))
+
             # Map to Pydantic model
             tech = MitreTechnique(
-                name=metadata.get('Subject', 'Unknown'),
+                name=metadata.get('name', 'Unknown'),
                 description=doc.page_content,
-                url=metadata.get('filepath', ''),
-                technique_id=extract_technique_id(metadata.get('filepath', '')),
-                source=metadata.get('Source', 'Unknown'),
+                url=url,
+                technique_id=metadata.get('id') or extract_technique_id(url),
+                source=metadata.get('source', 'Unknown'),
                 score=float(score),
 
-                # NEW FIELDS
-                tactic=metadata.get("tactic"),
-                kill_chain_phase=metadata.get("kill_chain_phase"),
+                tactic=format_tactics(phases) if phases else None,
+                kill_chain_phase=", ".join(phases) if phases else None,
                 subtechnique_of=metadata.get("subtechnique_of")
             )
 
-            techniques.append(tech)
-            
+            # Exact metadata from the STIX catalogue takes precedence over the stored copy
+            techniques.append(self.catalogue.enrich(tech))
+
         return techniques
+
+    def warm_up(self, rounds: int = 1) -> int:
+        """
+        Runs dummy searches so lazy initialization (vector store handles, tokenizer,
+        model graph, HNSW index pages) is paid before real traffic arrives.
+        """
+        executed = 0
+        for _ in range(rounds):
+            for query in WARMUP_QUERIES:
+                self.search(query, k=5)
+                executed += 1
+        return executed
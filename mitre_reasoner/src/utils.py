@@ -1,6 +1,61 @@
+import os
 import re
+import time
 from typing import Optional
 
+# Embedding backend configuration
+# torch     -> sentence-transformers / PyTorch reference implementation
+# onnx      -> ONNX Runtime (fp32), no PyTorch import
+# onnx-int8 -> ONNX Runtime with a dynamically int8-quantized graph
+EMBEDDING_MODEL_NAME = os.getenv("MITRE_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L12-v2")
+EMBEDDING_BACKEND = os.getenv("MITRE_EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_FILE = os.getenv("MITRE_EMBEDDING_ONNX_FILE", "onnx/model.onnx")
+EMBEDDING_CACHE_DIR = os.getenv("MITRE_EMBEDDING_CACHE_DIR", "./models")
+EMBEDDING_MAX_LENGTH = int(os.getenv("MITRE_EMBEDDING_MAX_LENGTH", "128"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("MITRE_EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_THREADS = int(os.getenv("MITRE_EMBEDDING_THREADS", "0"))  # 0 = ONNX Runtime default
+
+# Ingestion: techniques are embedded in batches on a thread pool and streamed into the store
+# For the ONNX backends, MITRE_EMBEDDING_THREADS=1 with one worker per core scales best
+INGEST_BATCH_SIZE = int(os.getenv("MITRE_INGEST_BATCH_SIZE", "64"))
+# 0 = one worker for torch (already multi-threaded per batch), one per core for ONNX
+INGEST_WORKERS = int(os.getenv("MITRE_INGEST_WORKERS", "0"))
+
+# Vector index configuration
+# hnsw  -> Chroma's approximate HNSW index (parameters below apply when the store is built)
+# exact -> brute-force search over all stored vectors (exact recall, O(n) per query)
+INDEX_BACKEND = os.getenv("MITRE_INDEX_BACKEND", "hnsw").lower()
+HNSW_SPACE = os.getenv("MITRE_HNSW_SPACE", "l2")
+HNSW_M = os.getenv("MITRE_HNSW_M")                           # Chroma default: 16
+HNSW_CONSTRUCTION_EF = os.getenv("MITRE_HNSW_CONSTRUCTION_EF")  # Chroma default: 100
+HNSW_SEARCH_EF = os.getenv("MITRE_HNSW_SEARCH_EF")           # Chroma default: 10
+
+def hnsw_collection_metadata(
+    space: Optional[str] = None,
+    m: Optional[int] = None,
+    construction_ef: Optional[int] = None,
+    search_ef: Optional[int] = None,
+) -> dict:
+    """
+    Builds Chroma collection metadata from explicit values or the MITRE_HNSW_* environment.
+    Unset parameters are left out so Chroma keeps its own defaults.
+    """
+    values = {
+        "hnsw:space": space or HNSW_SPACE,
+        "hnsw:M": m or HNSW_M,
+        "hnsw:construction_ef": construction_ef or HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": search_ef or HNSW_SEARCH_EF,
+    }
+    return {
+        key: (value if key == "hnsw:space" else int(value))
+        for key, value in values.items()
+        if value is not None
+    }
+
+# Readiness: run dummy retrievals before reporting ready so the first real query is not cold
+WARMUP_ENABLED = os.getenv("MITRE_WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_ROUNDS = int(os.getenv("MITRE_WARMUP_ROUNDS", "3"))
+
 def extract_technique_id(url: Optional[str]) -> Optional[str]:
     """
     Extracts T-code from MITRE URL.
@@ -10,3 +65,34 @@ def extract_technique_id(url: Optional[str]) -> Optional[str]:
         return None
     match = re.search(r'(T\d+(\.\d+)?)', url)
     return match.group(1) if match else None
+
+
+# Request deadline
+# The orchestrator sends the time it is still willing to wait (ms) in X-Deadline-Ms.
+# Expensive work (LLM calls, embedding) is skipped once nobody will read the answer.
+# Each service keeps its own copy: every image is built from its own directory only.
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the caller's deadline has passed before some expensive step."""
+
+
+class Deadline:
+    def __init__(self, header_value: Optional[str] = None):
+        self.expires_at = None
+        if header_value:
+            try:
+                self.expires_at = time.monotonic() + float(header_value) / 1000
+            except ValueError:
+                pass
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when the caller set no deadline."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, step: str):
+        if self.expires_at is not None and self.remaining() <= 0:
+            raise DeadlineExceeded(f"Request deadline exceeded before {step}")
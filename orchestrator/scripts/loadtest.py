@@ -0,0 +1,297 @@
+"""
+End-to-end load benchmark for a running stack. Drives /enrich_log and /enrich_logs with
+scenario profiles over a synthetic (scripts/generate_corpus.py) or supplied corpus and
+writes a JSON report that later runs can be compared against.
+
+    # All scenarios, 30 s each at 20 events/s, against a stack backed by llm_stub
+    python scripts/loadtest.py --rate 20 --duration 30 --output results/baseline.json
+
+    # After a change: same settings, print the deltas against the baseline
+    python scripts/loadtest.py --rate 20 --duration 30 --output results/after.json --compare results/baseline.json
+
+Scenarios:
+    steady           Poisson arrivals at --rate, single events
+    burst            --rate/2 background with --burst-factor x --rate for 1 s every --burst-every s
+    duplicate_storm  steady arrivals, but 90% of events repeat one of a handful of logs
+    mixed            steady arrivals; --bulk-share of the events go through /enrich_logs in batches
+    bulk             /enrich_logs batches of --batch-size only
+
+Per-stage latencies come from the alerts' timings_ms (requested with ?timings=true).
+Run the orchestrator with ORCHESTRATOR_CACHE_ENABLED=false to keep repeated corpus
+entries from being answered by the duplicate cache outside duplicate_storm.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Allow "python scripts/loadtest.py" from the orchestrator directory
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from replay import latency_summary
+from generate_corpus import generate
+
+SCENARIOS = ["steady", "burst", "duplicate_storm", "mixed", "bulk"]
+# Logs repeated by the duplicate storm, and the share of its events that repeat one of them
+STORM_POOL = 5
+STORM_SHARE = 0.9
+
+
+def load_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def poisson(rng: random.Random, rate: float, start: float, end: float):
+    """Arrival times of a Poisson process with the given rate between start and end."""
+    times, t = [], start
+    while rate > 0:
+        t += rng.expovariate(rate)
+        if t >= end:
+            break
+        times.append(t)
+    return times
+
+
+def build_plan(scenario: str, corpus, args, rng: random.Random):
+    """
+    The requests of one scenario as (send offset in s, endpoint, corpus entries),
+    where endpoint is "single" (/enrich_log) or "bulk" (/enrich_logs).
+    """
+    duration, rate = args.duration, args.rate
+
+    if scenario == "burst":
+        arrivals = poisson(rng, rate / 2, 0.0, duration)
+        for start in range(0, int(duration), max(1, int(args.burst_every))):
+            arrivals += poisson(rng, rate * args.burst_factor, float(start), min(start + 1.0, duration))
+        return [(t, "single", [rng.choice(corpus)]) for t in sorted(arrivals)]
+
+    if scenario == "duplicate_storm":
+        pool = rng.sample(corpus, min(STORM_POOL, len(corpus)))
+        return [
+            (t, "single", [rng.choice(pool) if rng.random() < STORM_SHARE else rng.choice(corpus)])
+            for t in poisson(rng, rate, 0.0, duration)
+        ]
+
+    if scenario == "bulk":
+        batch_rate = rate / args.batch_size
+        return [
+            (t, "bulk", [rng.choice(corpus) for _ in range(args.batch_size)])
+            for t in poisson(rng, batch_rate, 0.0, duration)
+        ]
+
+    if scenario == "mixed":
+        # Same event rate as steady, split between single requests and batches
+        batch_rate = rate * args.bulk_share / args.batch_size
+        plan = [(t, "single", [rng.choice(corpus)]) for t in poisson(rng, rate * (1 - args.bulk_share), 0.0, duration)]
+        plan += [(t, "bulk", [rng.choice(corpus) for _ in range(args.batch_size)]) for t in poisson(rng, batch_rate, 0.0, duration)]
+        return sorted(plan, key=lambda p: p[0])
+
+    return [(t, "single", [rng.choice(corpus)]) for t in poisson(rng, rate, 0.0, duration)]
+
+
+async def run_scenario(client, scenario: str, plan, args) -> dict:
+    """Sends the plan open loop (capped at --concurrency in-flight requests) and summarizes it."""
+    import httpx
+
+    limit = asyncio.Semaphore(args.concurrency)
+    request_latencies = defaultdict(list)
+    type_latencies = defaultdict(list)
+    stage_latencies = defaultdict(list)
+    start_lags = []
+    outcomes, tiers, errors = Counter(), Counter(), Counter()
+    events = Counter()
+    started = time.perf_counter()
+
+    def record_alert(log_type: str, alert: dict):
+        events["succeeded"] += 1
+        events["cached"] += alert.get("cached", False)
+        events["suppressed"] += alert.get("suppressed_into") is not None
+        tiers[alert.get("degradation_tier", "full")] += 1
+        if alert.get("errors"):
+            events["with_stage_errors"] += 1
+        for stage, ms in (alert.get("timings_ms") or {}).items():
+            stage_latencies[stage].append(ms)
+        if "total" in (alert.get("timings_ms") or {}):
+            type_latencies[log_type].append(alert["timings_ms"]["total"])
+
+    async def send(offset: float, endpoint: str, entries):
+        delay = offset - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with limit:
+            start_lags.append(max(0.0, (time.perf_counter() - started - offset) * 1000))
+            t0 = time.perf_counter()
+            try:
+                if endpoint == "single":
+                    response = await client.post("/enrich_log", params={"timings": "true"}, json=entries[0]["request"])
+                else:
+                    response = await client.post(
+                        "/enrich_logs", params={"timings": "true"}, json=[e["request"] for e in entries]
+                    )
+            except httpx.HTTPError as e:
+                outcome, response = type(e).__name__, None
+            else:
+                outcome = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+
+        outcomes[f"{endpoint}:{outcome}"] += 1
+        events["sent"] += len(entries)
+        if outcome != "ok":
+            events["failed"] += len(entries)
+            errors[outcome] += len(entries)
+            return
+        request_latencies[endpoint].append(elapsed_ms)
+        if endpoint == "single":
+            record_alert(entries[0]["log_type"], response.json())
+            return
+        for result in response.json()["results"]:
+            if result.get("error"):
+                events["failed"] += 1
+                # Keep the report readable: group item errors by their first words
+                errors[" ".join(result["error"].split()[:4])] += 1
+            else:
+                record_alert(entries[result["index"]]["log_type"], result["alert"])
+
+    await asyncio.gather(*(send(offset, endpoint, entries) for offset, endpoint, entries in plan))
+    elapsed = time.perf_counter() - started
+
+    stats = None
+    try:
+        stats = (await client.get("/stats")).json()
+    except (httpx.HTTPError, ValueError):
+        pass
+
+    return {
+        "scenario": scenario,
+        "requests": len(plan),
+        "events": dict(events),
+        "duration_s": round(elapsed, 2),
+        "throughput_eps": round(events["succeeded"] / elapsed, 2) if elapsed else None,
+        "error_rate": round(events["failed"] / events["sent"], 4) if events["sent"] else None,
+        "cached_ratio": round(events["cached"] / events["succeeded"], 4) if events["succeeded"] else None,
+        "suppressed_ratio": round(events["suppressed"] / events["succeeded"], 4) if events["succeeded"] else None,
+        "outcomes": dict(outcomes),
+        "errors": dict(errors.most_common(20)),
+        "latency_ms": {endpoint: latency_summary(values) for endpoint, values in request_latencies.items()},
+        "latency_by_log_type_ms": {log_type: latency_summary(values) for log_type, values in sorted(type_latencies.items())},
+        "stage_latency_ms": {stage: latency_summary(values) for stage, values in sorted(stage_latencies.items())},
+        "degradation_tiers": dict(tiers),
+        # How far sends fell behind the plan; large values mean --concurrency was the bottleneck
+        "start_lag_ms": latency_summary(start_lags),
+        "server_stats": stats,
+    }
+
+
+async def run(corpus, args) -> list:
+    import httpx
+
+    rng = random.Random(args.seed)
+    results = []
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout, limits=httpx.Limits(max_connections=args.concurrency)
+    ) as client:
+        for scenario in args.scenarios:
+            plan = build_plan(scenario, corpus, args, rng)
+            print(f"{scenario}: {len(plan)} requests over {args.duration:g}s...", file=sys.stderr)
+            results.append(await run_scenario(client, scenario, plan, args))
+            if args.pause:
+                await asyncio.sleep(args.pause)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict) -> str:
+    """Per-scenario table of throughput, error rate and request latency against a baseline report."""
+    before = {s["scenario"]: s for s in baseline["scenarios"]}
+    lines = [f"Compared with {baseline.get('label') or baseline.get('started_at')} ({baseline.get('git_commit')})"]
+    for current in report["scenarios"]:
+        previous = before.get(current["scenario"])
+        if not previous:
+            lines.append(f"  {current['scenario']}: not in baseline")
+            continue
+        lines.append(f"  {current['scenario']}:")
+        metrics = [("throughput_eps", current["throughput_eps"], previous["throughput_eps"]),
+                   ("error_rate", current["error_rate"], previous["error_rate"])]
+        for endpoint, summary in current["latency_ms"].items():
+            for pct in ("p50", "p99"):
+                metrics.append((f"{endpoint} {pct} ms", summary.get(pct), previous["latency_ms"].get(endpoint, {}).get(pct)))
+        for name, now, then in metrics:
+            if now is None or then is None:
+                lines.append(f"    {name:<22} {then!s:>10} -> {now!s:>10}")
+                continue
+            change = f"{(now - then) / then * 100:+.1f}%" if then else "n/a"
+            lines.append(f"    {name:<22} {then:>10} -> {now:>10}  ({change})")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run load scenarios against the orchestrator and report throughput and latency.")
+    parser.add_argument("--url", default="http://localhost:8000", help="Orchestrator URL")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=SCENARIOS,
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--rate", type=float, default=10.0, help="Mean event rate in events/s")
+    parser.add_argument("--duration", type=float, default=30.0, help="Length of each scenario in seconds")
+    parser.add_argument("--burst-factor", type=float, default=10.0, help="Burst rate as a multiple of --rate")
+    parser.add_argument("--burst-every", type=float, default=10.0, help="Seconds between the starts of bursts")
+    parser.add_argument("--batch-size", type=int, default=50, help="Events per /enrich_logs request")
+    parser.add_argument("--bulk-share", type=float, default=0.2, help="Share of mixed-scenario events sent in batches")
+    parser.add_argument("--concurrency", type=int, default=256, help="Most requests in flight at once")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--pause", type=float, default=2.0, help="Seconds to wait between scenarios")
+    parser.add_argument("--corpus", help="NDJSON corpus from generate_corpus.py (default: generate --corpus-size events)")
+    parser.add_argument("--corpus-size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the corpus and the arrival schedule")
+    parser.add_argument("--label", help="Name for this run in the report (e.g. the change being measured)")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    parser.add_argument("--compare", help="Baseline report to print deltas against")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    if not 0 <= args.bulk_share <= 1:
+        parser.error("--bulk-share must be between 0 and 1")
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate(args.corpus_size, args.seed)
+    if not corpus:
+        parser.error("Corpus is empty")
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    scenarios = asyncio.run(run(corpus, args))
+    report = {
+        "label": args.label,
+        "started_at": started_at,
+        "git_commit": git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "corpus": {"events": len(corpus), "log_types": dict(Counter(e["log_type"] for e in corpus))},
+        "scenarios": scenarios,
+    }
+
+    print(json.dumps({s["scenario"]: {k: s[k] for k in ("throughput_eps", "error_rate", "latency_ms")} for s in scenarios}, indent=2))
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(compare(report, json.load(f)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Re-drives captured traffic (ORCHESTRATOR_CAPTURE_DIR) and reports throughput and latency.
+
+    # Against a running stack, at the recorded arrival times
+    python scripts/replay.py captures/*.ndjson.gz --mode live --url http://localhost:8000
+
+    # In-process, every downstream service answered from the recording (no LLM calls);
+    # --latency-scale 0 measures the orchestrator's own overhead
+    python scripts/replay.py captures/*.ndjson.gz --mode recorded --rate 200 --latency-scale 1.0
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from collections import Counter, defaultdict
+from pathlib import Path
+
+# Allow "python scripts/replay.py" from the orchestrator directory
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+STAGE_MODELS = {
+    "ingest": "NormalizedLog",
+    "semantic": "SemanticResult",
+    "intent": "IntentResult",
+    "mitre": "MitreResult",
+    "mitre_recheck": "MitreResult",
+}
+
+
+def load_records(paths, limit=None):
+    records = []
+    for path in paths:
+        opener = gzip.open if str(path).endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+        except EOFError:
+            # Capture file of a process that did not shut down cleanly: keep what was flushed
+            print(f"{path}: truncated, using the {len(records)} records read so far", file=sys.stderr)
+    records.sort(key=lambda r: r["arrived_at"])
+    return records[:limit] if limit else records
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def latency_summary(values) -> dict:
+    if not values:
+        return {}
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p90": round(percentile(values, 90), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(max(values), 2),
+        "mean": round(statistics.mean(values), 2),
+    }
+
+
+def schedule(records, rate: float, speed: float):
+    """Send time of each record, in seconds from the start of the replay."""
+    if rate > 0:
+        return [i / rate for i in range(len(records))]
+    if speed > 0:
+        first = records[0]["arrived_at"]
+        return [(r["arrived_at"] - first) / speed for r in records]
+    return [0.0] * len(records)
+
+
+class RecordedStages:
+    """Stage implementations that answer from the capture, optionally after the recorded latency."""
+
+    def __init__(self, records, latency_scale: float):
+        from src import models
+        self.models = {stage: getattr(models, name) for stage, name in STAGE_MODELS.items()}
+        self.records = {r["correlation_id"]: r for r in records}
+        self.latency_scale = latency_scale
+        self.mitre_calls = Counter()
+
+    async def _respond(self, correlation_id: str, stage: str):
+        # Replayed correlation IDs are "<recorded id>:<index>"
+        record = self.records[correlation_id.rsplit(":", 1)[0]]
+        entry = record["stages"].get(stage)
+        if entry is None:
+            raise RuntimeError(f"No recorded {stage} response for {record['correlation_id']}")
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry["latency_ms"] / 1000 * self.latency_scale)
+        return self.models[stage].model_validate(entry["response"]) if entry["response"] is not None else None
+
+    async def ingest(self, raw, correlation_id, timeout=None):
+        return await self._respond(correlation_id, "ingest")
+
+    async def semantic(self, normalized, correlation_id, timeout=None):
+        return await self._respond(correlation_id, "semantic")
+
+    async def intent(self, semantic, correlation_id, timeout=None, allow_llm=True):
+        return await self._respond(correlation_id, "intent")
+
+    async def mitre(self, semantic, intent, correlation_id, k=5, timeout=None, use_llm=True):
+        # A second call for the same event is the intent re-check
+        self.mitre_calls[correlation_id] += 1
+        recheck = self.mitre_calls[correlation_id] > 1
+        record = self.records[correlation_id.rsplit(":", 1)[0]]
+        stage = "mitre_recheck" if recheck and "mitre_recheck" in record["stages"] else "mitre"
+        return await self._respond(correlation_id, stage)
+
+
+async def replay(records, send, args) -> dict:
+    """Sends every record at its scheduled time (open loop, capped at --concurrency)."""
+    offsets = schedule(records, args.rate, args.speed)
+    limit = asyncio.Semaphore(args.concurrency)
+    latencies, start_lags = [], []
+    outcomes, tiers = Counter(), Counter()
+    stage_latencies = defaultdict(list)
+    started = time.perf_counter()
+
+    async def run(index: int, record: dict):
+        delay = offsets[index] - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with limit:
+            start_lags.append(max(0.0, (time.perf_counter() - started - offsets[index]) * 1000))
+            t0 = time.perf_counter()
+            outcome, alert = await send(index, record)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        outcomes[outcome] += 1
+        if alert:
+            tiers[alert.get("degradation_tier", "full")] += 1
+            for stage, ms in (alert.get("timings_ms") or {}).items():
+                stage_latencies[stage].append(ms)
+
+    await asyncio.gather(*(run(i, r) for i, r in enumerate(records)))
+    elapsed = time.perf_counter() - started
+
+    recorded_totals = [r["total_ms"] for r in records if not r.get("cached")]
+    return {
+        "mode": args.mode,
+        "events": len(records),
+        "duration_s": round(elapsed, 2),
+        "throughput_eps": round(len(records) / elapsed, 2) if elapsed else None,
+        "outcomes": dict(outcomes),
+        "latency_ms": latency_summary(latencies),
+        "stage_latency_ms": {stage: latency_summary(values) for stage, values in stage_latencies.items()},
+        "degradation_tiers": dict(tiers),
+        # How far sends fell behind the schedule; large values mean --concurrency was the bottleneck
+        "start_lag_ms": latency_summary(start_lags),
+        "recorded_latency_ms": latency_summary(recorded_totals),
+    }
+
+
+async def replay_live(records, args) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        async def send(index, record):
+            try:
+                response = await client.post("/enrich_log", params={"timings": "true"}, json=record["request"])
+            except httpx.HTTPError as e:
+                return type(e).__name__, None
+            if response.status_code != 200:
+                return f"http_{response.status_code}", None
+            return "ok", response.json()
+
+        return await replay(records, send, args)
+
+
+async def replay_recorded(records, args) -> dict:
+    # Replay must not write captures, hit the duplicate cache (unless asked) or open job stores
+    os.environ["ORCHESTRATOR_CAPTURE_DIR"] = ""
+    os.environ["ORCHESTRATOR_JOBS_ENABLED"] = "false"
+    if not args.cache:
+        os.environ["ORCHESTRATOR_CACHE_ENABLED"] = "false"
+
+    from src.models import RawLogRequest
+    from src.enrichment import enrich, IngestionFailedError
+    from src.http_pools import close_all
+    from src.clients.local_stages import register_local_stage
+
+    stages = RecordedStages(records, args.latency_scale)
+    for name in ("ingest", "semantic", "intent", "mitre"):
+        register_local_stage(name, getattr(stages, name))
+
+    async def send(index, record):
+        payload = RawLogRequest.model_validate(record["request"])
+        try:
+            alert = await enrich(payload, f"{record['correlation_id']}:{index}", include_timings=True)
+        except IngestionFailedError:
+            return "ingestion_failed", None
+        return "ok", alert.model_dump(mode="json")
+
+    try:
+        return await replay(records, send, args)
+    finally:
+        await close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured enrichment traffic and report throughput and latency.")
+    parser.add_argument("captures", nargs="+", help="Capture files (.ndjson.gz or .ndjson)")
+    parser.add_argument("--mode", choices=["live", "recorded"], default="live",
+                        help="live: POST to a running orchestrator; recorded: in-process, downstream answers from the capture")
+    parser.add_argument("--url", default="http://localhost:8000", help="Orchestrator URL (live mode)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Fixed send rate in events/s (default: recorded arrival times)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Time compression of recorded arrivals when --rate is not set (2 = twice as fast, 0 = all at once)")
+    parser.add_argument("--concurrency", type=int, default=256, help="Most events in flight at once")
+    parser.add_argument("--limit", type=int, help="Replay only the first N events")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (live mode)")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Recorded mode: multiply recorded downstream latencies (0 = answer immediately)")
+    parser.add_argument("--cache", action="store_true", help="Recorded mode: keep the duplicate-enrichment cache enabled")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    records = load_records(args.captures, args.limit)
+    if not records:
+        parser.error("No captured events found")
+    print(f"Replaying {len(records)} events ({args.mode} mode)...", file=sys.stderr)
+
+    run = replay_live if args.mode == "live" else replay_recorded
+    report = asyncio.run(run(records, args))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import RawLogRequest
+from .config import settings
+
+# Lower value = served first
+PRIORITY_CLASSES = {"critical": 0, "high": 1, "normal": 2, "low": 3}
+DEFAULT_PRIORITY = "normal"
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is turned away; `retry_after` is a hint in whole seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_priority_rules(spec: str) -> List[Tuple[str, str, str]]:
+    """
+    'source=windows_eventlog:high,tenant=acme:critical,source=syslog:low'
+    -> [(field, pattern, class), ...]. Patterns are case-insensitive globs.
+    """
+    rules = []
+    for part in spec.split(","):
+        condition, _, priority = part.strip().rpartition(":")
+        field, _, pattern = condition.partition("=")
+        if not (field.strip() and pattern.strip()):
+            continue
+        if priority.strip() not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class '{priority}' in ORCHESTRATOR_PRIORITY_RULES")
+        rules.append((field.strip(), pattern.strip().lower(), priority.strip()))
+    return rules
+
+
+def classify_priority(payload: RawLogRequest, rules: List[Tuple[str, str, str]]) -> str:
+    """
+    Highest priority class among the matching rules. `source` and `event_type` match the
+    request fields; any other field name (e.g. `tenant`, `channel`) is looked up in metadata.
+    """
+    best = None
+    for field, pattern, priority in rules:
+        if field == "source":
+            value = payload.source
+        elif field == "event_type":
+            value = payload.event_type
+        else:
+            value = payload.metadata.get(field)
+        if value is not None and fnmatch(str(value).lower(), pattern):
+            if best is None or PRIORITY_CLASSES[priority] < PRIORITY_CLASSES[best]:
+                best = priority
+    return best or DEFAULT_PRIORITY
+
+
+class AdmissionController:
+    """
+    Bounded admission for single-log enrichment. At most `max_in_flight` requests run;
+    up to `max_queued` more wait in a priority queue (FIFO within a class). When the queue
+    is full, a new request displaces the lowest-priority waiter if it outranks it, otherwise
+    it is rejected straight away. Waiters that are not admitted in time are rejected too,
+    so callers get a fast 429 instead of a slow timeout.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self._queue: List[list] = []          # heap of [rank, seq, future, priority]
+        self._seq = itertools.count()
+        self._avg_service_time: Optional[float] = None
+        self._stats = {
+            name: {"admitted": 0, "queued": 0, "rejected": 0, "displaced": 0, "wait_ms_total": 0.0}
+            for name in PRIORITY_CLASSES
+        }
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for entry in self._queue if not entry[2].done())
+
+    def retry_after(self) -> int:
+        """Rough time until the current backlog drains, in whole seconds."""
+        backlog = self.queued + 1
+        return max(1, math.ceil((self._avg_service_time or 1.0) * backlog / max(1, self.max_in_flight)))
+
+    def _reject(self, priority: str, message: str) -> AdmissionRejected:
+        self._stats[priority]["rejected"] += 1
+        return AdmissionRejected(message, self.retry_after())
+
+    async def acquire(self, priority: str, timeout: Optional[float] = None):
+        rank = PRIORITY_CLASSES[priority]
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            self._stats[priority]["admitted"] += 1
+            return
+
+        if self.queued >= self.max_queued:
+            victim = max((e for e in self._queue if not e[2].done()), key=lambda e: (e[0], e[1]), default=None)
+            if victim is None or victim[0] <= rank:
+                raise self._reject(priority, f"Admission queue full ({self.max_queued} waiting)")
+            # Make room by turning away the newest request of the lowest class
+            victim[2].set_exception(self._reject(victim[3], "Displaced from the admission queue by a higher-priority request"))
+            self._stats[victim[3]]["displaced"] += 1
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [rank, next(self._seq), waiter, priority])
+        self._stats[priority]["queued"] += 1
+        queued_at = time.monotonic()
+
+        wait = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        try:
+            await asyncio.wait({waiter}, timeout=wait)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            raise self._reject(priority, f"Not admitted within {wait:.1f}s")
+        # Raises AdmissionRejected if this waiter was displaced
+        waiter.result()
+        self._stats[priority]["admitted"] += 1
+        self._stats[priority]["wait_ms_total"] += (time.monotonic() - queued_at) * 1000
+
+    def _abandon(self, waiter: asyncio.Future):
+        if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+            # Admitted, but the caller went away before using the slot
+            self.release(None)
+        elif not waiter.done():
+            waiter.cancel()
+
+    def release(self, service_time: Optional[float]):
+        self.in_flight -= 1
+        if service_time is not None:
+            if self._avg_service_time is None:
+                self._avg_service_time = service_time
+            self._avg_service_time += 0.05 * (service_time - self._avg_service_time)
+        while self._queue and self.in_flight < self.max_in_flight:
+            _, _, waiter, _ = heapq.heappop(self._queue)
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, priority: str, timeout: Optional[float] = None):
+        await self.acquire(priority, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        classes = {}
+        for name, counters in self._stats.items():
+            waited = counters["admitted"] or 1
+            classes[name] = {
+                **{k: v for k, v in counters.items() if k != "wait_ms_total"},
+                "avg_wait_ms": round(counters["wait_ms_total"] / waited, 1),
+            }
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "avg_service_time_ms": round(self._avg_service_time * 1000, 1) if self._avg_service_time is not None else None,
+            "classes": classes,
+        }
+
+
+def _build_admission() -> Optional[AdmissionController]:
+    if not settings.ORCHESTRATOR_ADMISSION_ENABLED:
+        return None
+    return AdmissionController(
+        max_in_flight=settings.ORCHESTRATOR_MAX_IN_FLIGHT,
+        max_queued=settings.ORCHESTRATOR_MAX_QUEUED,
+        queue_timeout=settings.ORCHESTRATOR_ADMISSION_QUEUE_TIMEOUT,
+    )
+
+
+# Shared controller for /enrich_log (None when disabled)
+admission = _build_admission()
+priority_rules = parse_priority_rules(settings.ORCHESTRATOR_PRIORITY_RULES)
@@ -1,29 +1,113 @@
 import uuid
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from contextlib import asynccontextmanager
+from typing import List, Optional
 
-from .models import RawLogRequest, EnrichedAlert
+from .models import (
+    RawLogRequest, EnrichedAlert, BulkEnrichmentResponse, JobSubmission, JobSubmitResponse, JobStatus,
+    StreamSubmission, StreamSubmitResponse,
+)
 from .config import settings
 from .logger import logger
-from .utils import async_client, build_summary, build_recommendations
-from .scoring import compute_risk
+from .http_pools import close_all, pool_stats, start_health_checks, service_clients
+from .cache import enrichment_cache
+from .capture import traffic_capture
+from .suppression import storm_suppressor
+from .enrichment import enrich, IngestionFailedError
+from .deadline import Deadline, DEADLINE_HEADER
+from .admission import admission, priority_rules, classify_priority, AdmissionRejected
+from .degradation import degradation, TIERS
+from .metrics import instrument_app, track_gauge, track_labelled_gauge
+from .tracing import trace_app
+from .profiler import install_profiler
+from .clients.local_stages import enable_local_stages, LOCAL_STAGES
+from .bulk import parse_bulk_body, validate_items, enrich_many, stream_enrichment, BulkRequestError
+from .jobs import job_queue, job_workers, JobQueueFull
+from .streaming.broker import Broker, build_broker
+from .streaming.stages import STAGES, OUTPUT_TOPIC, topic_for, new_message
+from .streaming.worker import StageWorkerPool, parse_worker_counts, topic_depths
+
+# Streaming topology state (None unless ORCHESTRATOR_STREAMING_ENABLED)
+stream_broker: Optional[Broker] = None
+stream_workers: Optional[StageWorkerPool] = None
 
-from .clients.ingestion_client import call_log_ingestion
-from .clients.semantic_client import call_semantic_interpreter
-from .clients.intent_client import call_intent_classifier
-from .clients.mitre_client import call_mitre_reasoner
+def _streaming_stages() -> List[str]:
+    spec = settings.ORCHESTRATOR_STREAMING_STAGES.strip().lower()
+    if spec == "all":
+        return list(STAGES)
+    return [s.strip() for s in spec.split(",") if s.strip()]
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global stream_broker, stream_workers
     # Startup
     logger.info("Enrichment Orchestrator starting up...")
+    start_health_checks()
+    enable_local_stages()
+    if job_queue:
+        recovered = job_queue.recover()
+        if recovered:
+            logger.info(f"Re-queued {recovered} jobs interrupted by the last shutdown")
+        job_workers.start()
+    if settings.ORCHESTRATOR_STREAMING_ENABLED:
+        stream_broker = build_broker()
+        stages = _streaming_stages()
+        if stages:
+            stream_workers = StageWorkerPool(stream_broker, stages, parse_worker_counts(settings.ORCHESTRATOR_STREAMING_WORKERS))
+            stream_workers.start()
+        logger.info(f"Streaming enabled ({settings.ORCHESTRATOR_STREAMING_BROKER} broker, in-process stages: {stages or 'none'})")
     yield
     # Shutdown
     logger.info("Enrichment Orchestrator shutting down...")
-    await async_client.aclose()
+    if job_queue:
+        await job_workers.stop()
+        job_queue.close()
+    if stream_workers:
+        await stream_workers.stop()
+    if stream_broker:
+        await stream_broker.close()
+    await close_all()
+    if enrichment_cache:
+        enrichment_cache.close()
+    if traffic_capture:
+        traffic_capture.close()
 
 app = FastAPI(title="Enrichment Orchestrator", lifespan=lifespan)
+instrument_app(app)
+trace_app(app)
+install_profiler(app)
+
+if admission:
+    track_gauge("admission_in_flight", "Requests admitted to /enrich_log and still running.", lambda: admission.in_flight)
+    track_gauge("admission_queued", "Requests waiting for admission to /enrich_log.", lambda: admission.queued)
+if degradation:
+    track_gauge("degradation_tier", f"Current enrichment tier index ({', '.join(TIERS)}).", lambda: degradation.tier)
+limiters = {name: client.limiter for name, client in service_clients.items() if client.limiter}
+if limiters:
+    track_labelled_gauge(
+        "service_concurrency_limit", "Adaptive concurrency limit per downstream service.", ["service"],
+        {(name,): (lambda lim=lim: int(lim.limit)) for name, lim in limiters.items()},
+    )
+    track_labelled_gauge(
+        "service_in_flight", "Calls holding a concurrency slot per downstream service.", ["service"],
+        {(name,): (lambda lim=lim: lim.in_flight) for name, lim in limiters.items()},
+    )
+    track_labelled_gauge(
+        "service_queue_depth", "Calls waiting for a concurrency slot per downstream service.", ["service"],
+        {(name,): (lambda lim=lim: lim.queue_depth) for name, lim in limiters.items()},
+    )
+    track_labelled_gauge(
+        "service_limiter_rejections", "Calls rejected by the concurrency limiter since start (queue_full, queue_timeout).",
+        ["service", "reason"],
+        {
+            (name, reason): (lambda lim=lim, reason=reason: lim.stats()[f"rejected_{reason}"])
+            for name, lim in limiters.items() for reason in ("queue_full", "queue_timeout")
+        },
+    )
+if job_queue:
+    track_gauge("jobs_queued", "Async jobs waiting in the durable queue.", job_queue.depth)
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,74 +125,195 @@ async def health_check():
             "ingest_url": settings.LOG_INGEST_URL,
             "semantic_url": settings.SEMANTIC_URL,
             "intent_url": settings.INTENT_URL,
-            "mitre_url": settings.MITRE_URL
+            "mitre_url": settings.MITRE_URL,
+            "local_stages": sorted(LOCAL_STAGES)
         }
     }
 
+@app.get("/stats")
+async def stats():
+    return {
+        "cache": enrichment_cache.stats() if enrichment_cache else None,
+        "pools": pool_stats(),
+        "admission": admission.stats() if admission else None,
+        "degradation": degradation.stats() if degradation else None,
+        "jobs": await job_queue.stats() if job_queue else None,
+        "streaming": await _stream_stats() if stream_broker else None,
+        "capture": traffic_capture.stats() if traffic_capture else None,
+        "suppression": storm_suppressor.stats() if storm_suppressor else None
+    }
+
 @app.post("/enrich_log", response_model=EnrichedAlert)
-async def enrich_log(payload: RawLogRequest, request: Request):
+async def enrich_log(payload: RawLogRequest, request: Request, timings: Optional[bool] = None):
     correlation_id = str(uuid.uuid4())
+    # Callers may ask for a tighter deadline than the configured request budget
+    deadline = Deadline.from_header(request.headers.get(DEADLINE_HEADER), settings.ORCHESTRATOR_REQUEST_BUDGET)
+
+    if not admission:
+        return await _enrich_single(payload, correlation_id, deadline, timings)
+
+    # Time spent waiting for admission comes out of the request deadline
+    priority = classify_priority(payload, priority_rules)
+    try:
+        async with admission.admit(priority, timeout=deadline.remaining() if deadline else None):
+            return await _enrich_single(payload, correlation_id, deadline, timings)
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected {priority}-priority log from '{payload.source}': {e}", extra={"correlation_id": correlation_id})
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(e), "priority": priority},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+async def _enrich_single(
+    payload: RawLogRequest, correlation_id: str, deadline: Deadline, timings: Optional[bool] = None
+) -> EnrichedAlert:
     logger.info(f"Starting enrichment for log source '{payload.source}'", extra={"correlation_id": correlation_id})
-    
-    errors = []
-
-    # 1. Log Ingestion & Normalization (Critical Step)
-    normalized = await call_log_ingestion(payload, correlation_id)
-    if not normalized:
-        logger.error("Ingestion failed. Aborting enrichment.", extra={"correlation_id": correlation_id})
-        raise HTTPException(status_code=502, detail="Log Ingestion service failed or returned invalid data.")
-
-    # 2. Semantic Interpretation
-    semantic = await call_semantic_interpreter(normalized, correlation_id)
-    if not semantic:
-        errors.append("Semantic Interpreter failed")
-    
-    # 3. Intent Classification (Requires Semantic)
-    intent = None
-    if semantic:
-        intent = await call_intent_classifier(semantic, correlation_id)
-        if not intent:
-            errors.append("Intent Classifier failed")
-    else:
-        errors.append("Skipped Intent Classifier (dependency missing)")
-
-    # 4. MITRE Reasoning (Requires Semantic)
-    mitre = None
-    if semantic:
-        mitre = await call_mitre_reasoner(semantic, intent, correlation_id)
-        if not mitre:
-            errors.append("MITRE Reasoner failed")
-    else:
-        errors.append("Skipped MITRE Reasoner (dependency missing)")
-
-    # 5. Risk Scoring
-    risk = compute_risk(semantic, intent, mitre)
-
-    # 6. Summary & Recommendations
-    summary = build_summary(normalized, semantic, intent, mitre, risk)
-    recommendations = build_recommendations(intent, mitre, risk)
-
-    # 7. Construct Final Alert
-    # Use normalized source if payload source is missing
-    final_source = payload.source or (normalized.source if normalized else "unknown")
-    
-    alert = EnrichedAlert(
-        correlation_id=correlation_id,
-        raw_log=payload.raw_log,
-        source=final_source,
-        event_type=payload.event_type,
-        normalized=normalized,
-        semantic=semantic,
-        intent=intent,
-        mitre=mitre,
-        risk=risk,
-        summary=summary,
-        recommendations=recommendations,
-        errors=errors
+    try:
+        return await enrich(payload, correlation_id, deadline=deadline, include_timings=timings)
+    except IngestionFailedError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+@app.post("/enrich_logs", response_model=BulkEnrichmentResponse)
+async def enrich_logs(request: Request, timings: Optional[bool] = None):
+    """
+    Bulk enrichment. Accepts a JSON array of RawLogRequest objects, or NDJSON
+    (Content-Type: application/x-ndjson). Results and errors are returned per item in input order.
+    """
+    batch_id = str(uuid.uuid4())
+    try:
+        items = validate_items(parse_bulk_body(await request.body(), request.headers.get("content-type", "")))
+    except BulkRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Starting bulk enrichment of {len(items)} events", extra={"correlation_id": batch_id})
+    results = await enrich_many(items, batch_id, timings)
+
+    failed = sum(1 for r in results if r.error)
+    logger.info(f"Bulk enrichment complete. {len(results) - failed} succeeded, {failed} failed.", extra={"correlation_id": batch_id})
+    return BulkEnrichmentResponse(
+        total=len(results),
+        succeeded=len(results) - failed,
+        failed=failed,
+        results=results
     )
 
-    logger.info(f"Enrichment complete. Risk: {risk.level} ({risk.score:.2f})", extra={"correlation_id": correlation_id})
-    return alert
+@app.post("/enrich_logs/stream")
+async def enrich_logs_stream(request: Request, timings: Optional[bool] = None):
+    """
+    Streaming bulk enrichment. Same input as /enrich_logs, but each result is written as an
+    NDJSON line ({"index", "alert", "error"}) as soon as it completes, in completion order.
+    """
+    batch_id = str(uuid.uuid4())
+    try:
+        items = validate_items(parse_bulk_body(await request.body(), request.headers.get("content-type", "")))
+    except BulkRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Starting streaming enrichment of {len(items)} events", extra={"correlation_id": batch_id})
+    return StreamingResponse(stream_enrichment(items, batch_id, timings), media_type="application/x-ndjson")
+
+async def _read_events(request: Request) -> list:
+    """A single RawLogRequest, a JSON array of them, or NDJSON; invalid items become error strings."""
+    body = await request.body()
+    try:
+        data = parse_bulk_body(body, request.headers.get("content-type", ""))
+    except BulkRequestError as e:
+        # A single event object is fine too
+        try:
+            data = [RawLogRequest.model_validate_json(body)]
+        except ValueError:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return validate_items(data)
+    except BulkRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _require_jobs():
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Job API is disabled (ORCHESTRATOR_JOBS_ENABLED=false)")
+
+@app.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_jobs(request: Request):
+    """
+    Asynchronous enrichment. Accepts a single RawLogRequest, a JSON array of them, or NDJSON.
+    Valid events are stored durably and get a job ID at once; fetch results from /jobs/{job_id}.
+    """
+    _require_jobs()
+    items = await _read_events(request)
+    valid = [(i, item) for i, item in enumerate(items) if isinstance(item, RawLogRequest)]
+    try:
+        job_ids = dict(zip((i for i, _ in valid), await job_queue.submit([item for _, item in valid])))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    job_workers.notify()
+
+    jobs = [
+        JobSubmission(index=i, job_id=job_ids[i]) if i in job_ids else JobSubmission(index=i, error=item)
+        for i, item in enumerate(items)
+    ]
+    logger.info(f"Accepted {len(job_ids)} jobs ({len(items) - len(job_ids)} rejected)")
+    return JobSubmitResponse(accepted=len(job_ids), rejected=len(items) - len(job_ids), jobs=jobs)
+
+@app.get("/jobs/stats")
+async def job_stats():
+    _require_jobs()
+    return await job_queue.stats()
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, wait: float = 0.0):
+    """
+    Job state and, once done, the enriched alert. With `wait` (seconds, capped at
+    ORCHESTRATOR_JOBS_MAX_WAIT) the call long-polls until the job finishes.
+    """
+    _require_jobs()
+    job = await job_queue.wait(job_id, min(max(0.0, wait), settings.ORCHESTRATOR_JOBS_MAX_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+def _require_streaming():
+    if not stream_broker:
+        raise HTTPException(status_code=503, detail="Streaming is disabled (ORCHESTRATOR_STREAMING_ENABLED=false)")
+
+@app.post("/stream/events", response_model=StreamSubmitResponse, status_code=202)
+async def submit_stream_events(request: Request):
+    """
+    Publishes events to the streaming topology (same input as /jobs). Each event carries its
+    correlation ID through the stage queues; the finished alerts appear on /stream/output.
+    """
+    _require_streaming()
+    items = await _read_events(request)
+    messages = {i: new_message(item) for i, item in enumerate(items) if isinstance(item, RawLogRequest)}
+    await stream_broker.publish(topic_for(STAGES[0]), list(messages.values()))
+
+    events = [
+        StreamSubmission(index=i, correlation_id=messages[i]["correlation_id"]) if i in messages else StreamSubmission(index=i, error=item)
+        for i, item in enumerate(items)
+    ]
+    return StreamSubmitResponse(accepted=len(messages), rejected=len(items) - len(messages), events=events)
+
+@app.get("/stream/output", response_model=List[EnrichedAlert])
+async def read_stream_output(limit: int = 100, wait: float = 0.0):
+    """
+    Takes up to `limit` finished alerts off the output topic, waiting up to `wait` seconds
+    (capped at ORCHESTRATOR_JOBS_MAX_WAIT) for the first one. Alerts are removed once returned.
+    """
+    _require_streaming()
+    batch = await stream_broker.consume(OUTPUT_TOPIC, max(1, limit), min(max(0.0, wait), settings.ORCHESTRATOR_JOBS_MAX_WAIT))
+    await stream_broker.ack(OUTPUT_TOPIC, [d.id for d in batch])
+    return [EnrichedAlert.model_validate(d.body) for d in batch]
+
+@app.get("/stream/stats")
+async def stream_stats():
+    _require_streaming()
+    return await _stream_stats()
+
+async def _stream_stats() -> dict:
+    return {
+        "topics": await topic_depths(stream_broker),
+        "workers": await stream_workers.stats() if stream_workers else {},
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,194 @@
+import json
+import uuid
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from .models import RawLogRequest, NormalizedLog, BulkItemResult
+from .config import settings
+from .logger import logger
+from .enrichment import enrich, IngestionFailedError
+from .clients.ingestion_client import call_log_ingestion_batch
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class BulkRequestError(ValueError):
+    """Raised when a bulk body cannot be parsed at all."""
+
+
+class InvalidLine(str):
+    """Error message standing in for an NDJSON line that is not valid JSON (keeps its index)."""
+
+
+def parse_bulk_body(body: bytes, content_type: str) -> List[Any]:
+    """
+    Accepts a JSON array or an NDJSON body (one event per line).
+    Lines that are not valid JSON are kept as InvalidLine errors so they keep their index.
+    """
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise BulkRequestError(f"Body is not valid UTF-8: {e}")
+    is_ndjson = any(ct in (content_type or "") for ct in NDJSON_CONTENT_TYPES)
+
+    if not is_ndjson:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise BulkRequestError(f"Body is not valid JSON: {e}")
+        if not isinstance(data, list):
+            raise BulkRequestError("Body must be a JSON array of events (or NDJSON with Content-Type application/x-ndjson)")
+        return data
+
+    items: List[Any] = []
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            items.append(InvalidLine(f"Line {line_no} is not valid JSON: {e}"))
+    return items
+
+
+def validate_items(items: List[Any]) -> List[Union[RawLogRequest, str]]:
+    """Validates each event independently; invalid ones become error strings."""
+    if len(items) > settings.ORCHESTRATOR_BULK_MAX_ITEMS:
+        raise BulkRequestError(f"Too many events ({len(items)} > {settings.ORCHESTRATOR_BULK_MAX_ITEMS})")
+
+    validated: List[Union[RawLogRequest, str]] = []
+    for item in items:
+        if isinstance(item, InvalidLine):
+            validated.append(str(item))
+            continue
+        if not isinstance(item, dict):
+            # Never echo the item itself back as its error
+            validated.append("Invalid event: expected an object")
+            continue
+        try:
+            validated.append(RawLogRequest.model_validate(item))
+        except ValidationError as e:
+            validated.append(f"Invalid event: {e.errors()[0].get('msg', str(e))}")
+    return validated
+
+
+def _chunks(indexed: List[Tuple[int, Any]]) -> List[List[Tuple[int, Any]]]:
+    size = max(1, settings.ORCHESTRATOR_INGEST_BATCH_SIZE)
+    return [indexed[i:i + size] for i in range(0, len(indexed), size)]
+
+
+async def _normalize_chunk(chunk: List[Tuple[int, Any]], correlation_id: str) -> Dict[int, Optional[NormalizedLog]]:
+    """One ingestion batch call for the valid events of `chunk`; same result shape as prenormalize."""
+    valid = [(index, item) for index, item in chunk if isinstance(item, RawLogRequest)]
+    if not valid:
+        return {}
+    result = await call_log_ingestion_batch([item for _, item in valid], correlation_id)
+    if result is None:
+        return {}
+    return {index: log for (index, _), log in zip(valid, result)}
+
+
+async def prenormalize(items: List[Union[RawLogRequest, str]], correlation_id: str) -> Dict[int, Optional[NormalizedLog]]:
+    """
+    Normalizes valid events through the ingestion batch endpoint in chunks, with at most
+    ORCHESTRATOR_INGEST_BATCH_CONCURRENCY calls in flight.
+    Returns index -> normalized log (None if that item failed). Indexes missing from the
+    result could not be batch-normalized and fall back to the per-event call.
+    """
+    indexed = [(i, item) for i, item in enumerate(items) if isinstance(item, RawLogRequest)]
+    semaphore = asyncio.Semaphore(max(1, settings.ORCHESTRATOR_INGEST_BATCH_CONCURRENCY))
+
+    async def bounded(chunk):
+        async with semaphore:
+            return await _normalize_chunk(chunk, correlation_id)
+
+    normalized: Dict[int, Optional[NormalizedLog]] = {}
+    for chunk_result in await asyncio.gather(*(bounded(chunk) for chunk in _chunks(indexed))):
+        normalized.update(chunk_result)
+    return normalized
+
+
+async def enrich_one(
+    index: int,
+    item: Union[RawLogRequest, str],
+    prenormalized: Dict[int, Optional[NormalizedLog]],
+    timings: Optional[bool] = None,
+) -> BulkItemResult:
+    if isinstance(item, str):
+        return BulkItemResult(index=index, error=item)
+
+    if index in prenormalized and prenormalized[index] is None:
+        return BulkItemResult(index=index, error="Log Ingestion service failed or returned invalid data.")
+
+    correlation_id = str(uuid.uuid4())
+    try:
+        alert = await enrich(item, correlation_id, normalized=prenormalized.get(index), include_timings=timings)
+        return BulkItemResult(index=index, alert=alert)
+    except IngestionFailedError as e:
+        return BulkItemResult(index=index, error=str(e))
+    except Exception as e:
+        logger.error(f"Bulk item {index} failed: {e}", extra={"correlation_id": correlation_id})
+        return BulkItemResult(index=index, error=f"Enrichment failed: {e}")
+
+
+async def enrich_many(
+    items: List[Union[RawLogRequest, str]], batch_id: str, timings: Optional[bool] = None
+) -> List[BulkItemResult]:
+    """
+    Enriches all events with at most ORCHESTRATOR_BULK_CONCURRENCY in flight.
+    Results are returned in input order.
+    """
+    prenormalized = await prenormalize(items, batch_id)
+    semaphore = asyncio.Semaphore(max(1, settings.ORCHESTRATOR_BULK_CONCURRENCY))
+
+    async def bounded(index: int, item):
+        async with semaphore:
+            return await enrich_one(index, item, prenormalized, timings)
+
+    return list(await asyncio.gather(*(bounded(i, item) for i, item in enumerate(items))))
+
+
+async def stream_enrichment(
+    items: List[Union[RawLogRequest, str]], batch_id: str, timings: Optional[bool] = None
+) -> AsyncIterator[str]:
+    """
+    Yields one NDJSON line per event as soon as it is enriched (completion order, tagged with index).
+    Events are normalized chunk by chunk (at most ORCHESTRATOR_INGEST_BATCH_CONCURRENCY ingestion
+    calls at once) and enrichment starts as each chunk comes back, so the first alert does not
+    wait for the whole batch. Workers block on a bounded buffer, so a slow reader stops new events
+    from being started instead of letting finished alerts pile up in memory.
+    """
+    concurrency = min(len(items), max(1, settings.ORCHESTRATOR_BULK_CONCURRENCY))
+    buffer: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.ORCHESTRATOR_STREAM_BUFFER))
+    # Normalized events ready to enrich; bounded so normalization does not run far ahead
+    ready: asyncio.Queue = asyncio.Queue(maxsize=max(1, concurrency))
+    chunks = iter(_chunks(list(enumerate(items))))
+
+    async def normalizer():
+        # The shared iterator hands out the next chunk only when this normalizer is free
+        for chunk in chunks:
+            prenormalized = await _normalize_chunk(chunk, batch_id)
+            for index, item in chunk:
+                await ready.put((index, item, prenormalized))
+
+    async def worker():
+        while True:
+            index, item, prenormalized = await ready.get()
+            result = await enrich_one(index, item, prenormalized, timings)
+            await buffer.put(result)
+
+    tasks = [
+        asyncio.create_task(normalizer())
+        for _ in range(max(1, settings.ORCHESTRATOR_INGEST_BATCH_CONCURRENCY))
+    ] + [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        for _ in range(len(items)):
+            result = await buffer.get()
+            yield result.model_dump_json() + "\n"
+    finally:
+        # Client went away (or we are done): stop any work nobody will read
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
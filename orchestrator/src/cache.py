@@ -0,0 +1,190 @@
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .models import RawLogRequest
+from .config import settings
+from .logger import logger
+from .metrics import CACHE_LOOKUPS
+
+# Seconds between sweeps of expired rows from the SQLite store
+PRUNE_INTERVAL = 60.0
+
+
+class EnrichmentCache:
+    """
+    Exact-duplicate cache of stage outputs (normalized, semantic, intent, mitre).
+    An in-memory LRU sits in front of a SQLite store so entries survive restarts.
+    Entries expire after `ttl_seconds`; both tiers are bounded by entry count.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        max_entries: int,
+        max_disk_entries: int,
+        ttl_seconds: float,
+        ignored_metadata: Optional[set] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.ignored_metadata = ignored_metadata or set()
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        # Guards the SQLite connection, which is used from worker threads
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+        # Rows in the SQLite store, kept up to date so stores never have to count them
+        self._disk_entries = 0
+        self._last_prune = 0.0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS enrichment_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON enrichment_cache(accessed_at)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_created ON enrichment_cache(created_at)")
+            (self._disk_entries,) = self._db.execute("SELECT COUNT(*) FROM enrichment_cache").fetchone()
+
+    def key_for(self, payload: RawLogRequest) -> str:
+        """Hash of the raw log, source, event type and the metadata that affects enrichment."""
+        metadata = {k: v for k, v in payload.metadata.items() if k not in self.ignored_metadata}
+        material = json.dumps(
+            {"raw_log": payload.raw_log, "source": payload.source, "event_type": payload.event_type, "metadata": metadata},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if now - created_at <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["memory_hits"] += 1
+                CACHE_LOOKUPS.labels("hit").inc()
+                return value
+            del self._memory[key]
+            self._stats["expired"] += 1
+
+        if self._db is not None:
+            # Like the job queue, SQLite work runs in a worker thread, off the event loop
+            found = await asyncio.to_thread(self._disk_get, key, now)
+            if found is not None:
+                created_at, value = found
+                self._remember(key, created_at, value)
+                self._stats["hits"] += 1
+                self._stats["disk_hits"] += 1
+                CACHE_LOOKUPS.labels("hit").inc()
+                return value
+
+        self._stats["misses"] += 1
+        CACHE_LOOKUPS.labels("miss").inc()
+        return None
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        with self._lock:
+            row = self._db.execute("SELECT value, created_at FROM enrichment_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            raw_value, created_at = row
+            if now - created_at <= self.ttl_seconds:
+                self._db.execute("UPDATE enrichment_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                return created_at, json.loads(raw_value)
+            self._disk_entries -= self._db.execute("DELETE FROM enrichment_cache WHERE key = ?", (key,)).rowcount
+            self._stats["expired"] += 1
+            return None
+
+    async def put(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        self._remember(key, now, value)
+        self._stats["stores"] += 1
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_put, key, value, now)
+
+    def _disk_put(self, key: str, value: Dict[str, Any], now: float):
+        with self._lock:
+            exists = self._db.execute("SELECT 1 FROM enrichment_cache WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO enrichment_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), now, now),
+            )
+            if not exists:
+                self._disk_entries += 1
+            # Sweep on a timer, or once the store is a little over its bound, not on every store
+            if now - self._last_prune > PRUNE_INTERVAL or self._disk_entries > self.max_disk_entries + self._prune_slack:
+                self._prune_disk(now)
+
+    def _remember(self, key: str, created_at: float, value: Dict[str, Any]):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    @property
+    def _prune_slack(self) -> int:
+        return max(100, self.max_disk_entries // 100)
+
+    def _prune_disk(self, now: float):
+        self._last_prune = now
+        self._disk_entries -= self._db.execute(
+            "DELETE FROM enrichment_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        overflow = self._disk_entries - self.max_disk_entries
+        if overflow > 0:
+            self._disk_entries -= self._db.execute(
+                "DELETE FROM enrichment_cache WHERE key IN "
+                "(SELECT key FROM enrichment_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            ).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        # Counters only: no lock, so reading them never waits on a SQLite write
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_entries if self._db is not None else None,
+        }
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
+
+
+def _build_cache() -> Optional[EnrichmentCache]:
+    if not settings.ORCHESTRATOR_CACHE_ENABLED:
+        return None
+    try:
+        return EnrichmentCache(
+            path=settings.ORCHESTRATOR_CACHE_PATH or None,
+            max_entries=settings.ORCHESTRATOR_CACHE_MAX_ENTRIES,
+            max_disk_entries=settings.ORCHESTRATOR_CACHE_MAX_DISK_ENTRIES,
+            ttl_seconds=settings.ORCHESTRATOR_CACHE_TTL,
+            ignored_metadata={k.strip() for k in settings.ORCHESTRATOR_CACHE_IGNORED_METADATA.split(",") if k.strip()},
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Could not open enrichment cache at {settings.ORCHESTRATOR_CACHE_PATH}: {e}. Cache disabled.")
+        return None
+
+
+# Shared cache instance (None when disabled)
+enrichment_cache = _build_cache()
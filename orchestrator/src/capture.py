@@ -0,0 +1,123 @@
+import gzip
+import json
+import time
+import random
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .models import RawLogRequest
+from .config import settings
+from .logger import logger
+
+CAPTURED_STAGES = ("ingest", "semantic", "intent", "mitre", "mitre_recheck")
+
+
+class TrafficCapture:
+    """
+    Records a sample of enrichments to gzip-compressed NDJSON for scripts/replay.py.
+    Each line holds the raw request, when it arrived and every stage's downstream response
+    and latency, so the traffic can be re-driven against a live stack or answered from the
+    recording. Files are rotated every `max_records` lines. Captures contain raw logs;
+    treat them like the logs themselves.
+    """
+
+    def __init__(self, directory: str, sample_rate: float, max_records: int, flush_every: int = 100):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.max_records = max_records
+        self.flush_every = flush_every
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[Path] = None
+        self._records_in_file = 0
+        self._stats = {"seen": 0, "recorded": 0, "files": 0, "write_errors": 0}
+
+    def sampled(self) -> bool:
+        self._stats["seen"] += 1
+        return random.random() < self.sample_rate
+
+    def record(
+        self,
+        payload: RawLogRequest,
+        correlation_id: str,
+        results: Dict[str, Any],
+        timings: Dict[str, float],
+        total_ms: float,
+        tier: int = 0,
+        cached: bool = False,
+    ):
+        now = time.time()
+        entry = {
+            "correlation_id": correlation_id,
+            # Replay spaces requests by their arrival times to reproduce the traffic shape
+            "arrived_at": round(now - total_ms / 1000, 4),
+            "request": payload.model_dump(mode="json", by_alias=True),
+            "stages": {
+                name: {
+                    "response": results[name].model_dump(mode="json") if results[name] is not None else None,
+                    "latency_ms": timings.get(name, 0.0),
+                }
+                for name in CAPTURED_STAGES
+                if name in results
+            },
+            "total_ms": round(total_ms, 2),
+            "tier": tier,
+            "cached": cached,
+        }
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            try:
+                if self._file is None or self._records_in_file >= self.max_records:
+                    self._rotate()
+                self._file.write(line)
+                self._records_in_file += 1
+                self._stats["recorded"] += 1
+                # After a crash the file is truncated, but everything up to the last flush still reads
+                if self._records_in_file % self.flush_every == 0:
+                    self._file.flush()
+            except OSError as e:
+                self._stats["write_errors"] += 1
+                logger.error(f"Could not write traffic capture: {e}")
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self._path = self.directory / f"capture-{time.strftime('%Y%m%d-%H%M%S')}-{self._stats['files']:04d}.ndjson.gz"
+        self._file = gzip.open(self._path, "at", encoding="utf-8")
+        self._records_in_file = 0
+        self._stats["files"] += 1
+        logger.info(f"Capturing sampled traffic to {self._path}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "sample_rate": self.sample_rate,
+            "current_file": str(self._path) if self._path else None,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _build_capture() -> Optional[TrafficCapture]:
+    if not settings.ORCHESTRATOR_CAPTURE_DIR or settings.ORCHESTRATOR_CAPTURE_SAMPLE_RATE <= 0:
+        return None
+    try:
+        return TrafficCapture(
+            directory=settings.ORCHESTRATOR_CAPTURE_DIR,
+            sample_rate=min(1.0, settings.ORCHESTRATOR_CAPTURE_SAMPLE_RATE),
+            max_records=settings.ORCHESTRATOR_CAPTURE_MAX_RECORDS,
+        )
+    except OSError as e:
+        logger.error(f"Could not open capture directory {settings.ORCHESTRATOR_CAPTURE_DIR}: {e}. Capture disabled.")
+        return None
+
+
+# Shared capture writer (None unless ORCHESTRATOR_CAPTURE_DIR is set)
+traffic_capture = _build_capture()
@@ -1,34 +1,81 @@
 import httpx
-from typing import Optional
+from typing import Optional, List
 from ..models import RawLogRequest, NormalizedLog
-from ..config import settings
 from ..logger import logger
-from ..utils import async_client
+from ..http_pools import service_clients
+from .local_stages import get_local_stage, call_local_stage
 
-async def call_log_ingestion(raw: RawLogRequest, correlation_id: str) -> Optional[NormalizedLog]:
-    """
-    POST {LOG_INGEST_URL}/ingest
-    """
-    url = f"{settings.LOG_INGEST_URL}/ingest"
-    
+def _to_ingest_payload(raw: RawLogRequest) -> dict:
     # Map RawLogRequest to what Log Ingestion expects
     # Log Ingestion expects: { "raw_log": "...", "fields": {}, "source_type": "..." }
-    payload = {
+    return {
         "raw_log": raw.raw_log,
         "fields": raw.metadata,
         "source_type": raw.source
     }
 
+async def call_log_ingestion(raw: RawLogRequest, correlation_id: str, timeout: Optional[float] = None) -> Optional[NormalizedLog]:
+    """
+    POST {LOG_INGEST_URL}/ingest
+    """
+    client = service_clients["ingest"]
+    path = "/ingest"
+    url = client.url(path)
+    payload = _to_ingest_payload(raw)
+
     try:
+        if get_local_stage("ingest"):
+            return await call_local_stage("ingest", raw, correlation_id, timeout=timeout)
         logger.info(f"Calling Log Ingestion: {url}", extra={"correlation_id": correlation_id})
-        response = await async_client.post(
-            url, 
-            json=payload, 
-            timeout=settings.ORCHESTRATOR_TIMEOUT,
-            headers={"X-Correlation-ID": correlation_id}
+        response = await client.post(
+            path,
+            json=payload,
+            headers={"X-Correlation-ID": correlation_id},
+            timeout=timeout
         )
         response.raise_for_status()
         return NormalizedLog(**response.json())
     except Exception as e:
         logger.error(f"Log Ingestion failed: {e}", extra={"correlation_id": correlation_id})
         return None
+
+async def call_log_ingestion_batch(raws: List[RawLogRequest], correlation_id: str) -> Optional[List[Optional[NormalizedLog]]]:
+    """
+    POST {LOG_INGEST_URL}/ingest_batch
+    Returns one entry per input (None where that item failed), or None if the whole call failed.
+    """
+    client = service_clients["ingest"]
+    path = "/ingest_batch"
+    url = client.url(path)
+    payload = [_to_ingest_payload(raw) for raw in raws]
+
+    if get_local_stage("ingest"):
+        # In-process normalization costs no round-trip, so there is nothing to batch
+        normalized: List[Optional[NormalizedLog]] = []
+        for raw in raws:
+            try:
+                normalized.append(await call_local_stage("ingest", raw, correlation_id))
+            except Exception as e:
+                logger.error(f"Log Ingestion failed for batch item: {e}", extra={"correlation_id": correlation_id})
+                normalized.append(None)
+        return normalized
+
+    try:
+        logger.info(f"Calling Log Ingestion batch ({len(raws)} logs): {url}", extra={"correlation_id": correlation_id})
+        response = await client.post(
+            path,
+            json=payload,
+            headers={"X-Correlation-ID": correlation_id}
+        )
+        response.raise_for_status()
+
+        normalized: List[Optional[NormalizedLog]] = [None] * len(raws)
+        for item in response.json():
+            if item.get("event"):
+                normalized[item["index"]] = NormalizedLog(**item["event"])
+            else:
+                logger.error(f"Log Ingestion failed for batch item {item['index']}: {item.get('error')}", extra={"correlation_id": correlation_id})
+        return normalized
+    except Exception as e:
+        logger.error(f"Log Ingestion batch failed: {e}", extra={"correlation_id": correlation_id})
+        return None
@@ -1,15 +1,23 @@
 import httpx
 from typing import Optional
 from ..models import SemanticResult, IntentResult
-from ..config import settings
 from ..logger import logger
-from ..utils import async_client
+from ..http_pools import service_clients
+from .local_stages import get_local_stage, call_local_stage
 
-async def call_intent_classifier(semantic: SemanticResult, correlation_id: str) -> Optional[IntentResult]:
+async def call_intent_classifier(
+    semantic: SemanticResult,
+    correlation_id: str,
+    timeout: Optional[float] = None,
+    allow_llm: bool = True,
+) -> Optional[IntentResult]:
     """
     POST {INTENT_URL}/classify_intent
+    With allow_llm=False the classifier answers from its rules only.
     """
-    url = f"{settings.INTENT_URL}/classify_intent"
+    client = service_clients["intent"]
+    path = "/classify_intent"
+    url = client.url(path)
     
     # Intent Classifier expects SemanticInput: 
     # { "semantic_summary": "...", "semantic_features": {...}, "confidence": ... }
@@ -20,12 +28,15 @@ async def call_intent_classifier(semantic: SemanticResult, correlation_id: str)
     }
 
     try:
+        if get_local_stage("intent"):
+            return await call_local_stage("intent", semantic, correlation_id, timeout=timeout, allow_llm=allow_llm)
         logger.info(f"Calling Intent Classifier: {url}", extra={"correlation_id": correlation_id})
-        response = await async_client.post(
-            url, 
-            json=payload, 
-            timeout=settings.ORCHESTRATOR_TIMEOUT,
-            headers={"X-Correlation-ID": correlation_id}
+        response = await client.post(
+            path,
+            json=payload,
+            headers={"X-Correlation-ID": correlation_id},
+            timeout=timeout,
+            params=None if allow_llm else {"allow_llm": "false"}
         )
         response.raise_for_status()
         return IntentResult(**response.json())
@@ -0,0 +1,209 @@
+"""
+In-process ("monolith") stage implementations.
+
+Each downstream service's `src/` package is imported under its own alias (they are all
+called `src`), and its logic is called directly instead of over HTTP. The HTTP clients
+check this registry first, so any subset of stages can run locally while the rest stay
+remote. Other code (e.g. traffic replay) can plug in its own implementations with
+register_local_stage().
+"""
+import sys
+import types
+import asyncio
+import importlib
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from ..models import RawLogRequest, NormalizedLog, SemanticResult, IntentResult, MitreResult
+from ..config import settings, SERVICE_PREFIXES
+from ..logger import logger
+from ..http_pools import service_clients
+
+# Stage name -> async callable with the same signature as the matching HTTP client function
+LOCAL_STAGES: Dict[str, Callable[..., Awaitable]] = {}
+
+# Stage name -> service directory
+SERVICE_DIRS = {
+    "ingest": "log_ingestion",
+    "semantic": "semantic_interpreter",
+    "intent": "intent_classifier",
+    "mitre": "mitre_reasoner",
+}
+
+
+class LocalStageUnavailable(RuntimeError):
+    """Raised when an in-process stage cannot serve requests (yet)."""
+
+
+def register_local_stage(name: str, fn: Callable[..., Awaitable]):
+    if name not in SERVICE_PREFIXES:
+        raise ValueError(f"Unknown stage '{name}', expected one of {sorted(SERVICE_PREFIXES)}")
+    LOCAL_STAGES[name] = fn
+
+
+def get_local_stage(name: str) -> Optional[Callable[..., Awaitable]]:
+    return LOCAL_STAGES.get(name)
+
+
+async def call_local_stage(name: str, *args, timeout: Optional[float] = None, **kwargs):
+    """Runs a registered stage under the same time cap its HTTP call would have."""
+    cap = service_clients[name].total_timeout
+    timeout = cap if timeout is None else min(timeout, cap)
+    try:
+        return await asyncio.wait_for(LOCAL_STAGES[name](*args, timeout=timeout, **kwargs), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"in-process {name} stage exceeded {timeout:.2f}s") from None
+
+
+def _services_root() -> Path:
+    # Defaults to the repository root: orchestrator/src/clients/local_stages.py -> repo
+    return Path(settings.ORCHESTRATOR_SERVICES_ROOT or Path(__file__).resolve().parents[3])
+
+
+def _service_package(stage: str) -> str:
+    """Imports <root>/<service>/src as package `cce_<service>` and returns its name."""
+    service = SERVICE_DIRS[stage]
+    alias = f"cce_{service}"
+    if alias not in sys.modules:
+        src_dir = _services_root() / service / "src"
+        if not src_dir.is_dir():
+            raise LocalStageUnavailable(f"{src_dir} not found; set ORCHESTRATOR_SERVICES_ROOT")
+        package = types.ModuleType(alias)
+        package.__path__ = [str(src_dir)]
+        sys.modules[alias] = package
+    return alias
+
+
+def _service_module(stage: str, module: str):
+    return importlib.import_module(f"{_service_package(stage)}.{module}")
+
+
+def _deadline(stage: str, timeout: Optional[float]):
+    # Each service carries its own copy of Deadline, built from the X-Deadline-Ms value
+    utils = _service_module(stage, "utils")
+    return utils.Deadline(str(int(timeout * 1000)) if timeout is not None else None)
+
+
+# --- Stage implementations ---
+
+def _build_ingest():
+    app = _service_module("ingest", "app")
+    schemas = _service_module("ingest", "schemas")
+
+    async def ingest(raw: RawLogRequest, correlation_id: str, timeout: Optional[float] = None) -> NormalizedLog:
+        event = app.normalize_request(schemas.IngestRequest(raw_log=raw.raw_log, fields=raw.metadata, source_type=raw.source))
+        return NormalizedLog.model_validate(event.model_dump())
+
+    return ingest
+
+
+def _build_semantic():
+    llm_client = _service_module("semantic", "llm_client")
+    utils = _service_module("semantic", "utils")
+
+    async def semantic(normalized: NormalizedLog, correlation_id: str, timeout: Optional[float] = None) -> SemanticResult:
+        clean_log = utils.preprocess_log(normalized.raw_log)
+        if not clean_log:
+            raise ValueError("Log text is empty")
+        result = await llm_client.get_semantic_interpretation(
+            {"raw_log": clean_log, "known_fields": normalized.normalized_fields},
+            _deadline("semantic", timeout),
+        )
+        return SemanticResult(**result)
+
+    return semantic
+
+
+def _build_intent():
+    classifier = _service_module("intent", "classifier")
+    models = _service_module("intent", "models")
+    rule_loader = _service_module("intent", "rule_loader")
+    rules = rule_loader.load_rules(str(_services_root() / SERVICE_DIRS["intent"] / "rules"))
+
+    async def intent(
+        semantic: SemanticResult,
+        correlation_id: str,
+        timeout: Optional[float] = None,
+        allow_llm: bool = True,
+    ) -> IntentResult:
+        result = await classifier.classify(
+            models.SemanticInput(
+                semantic_summary=semantic.semantic_summary,
+                semantic_features=semantic.semantic_features,
+                confidence=semantic.confidence,
+            ),
+            rules,
+            allow_llm=allow_llm,
+            deadline=_deadline("intent", timeout),
+        )
+        return IntentResult.model_validate(result.model_dump())
+
+    return intent
+
+
+def _build_mitre():
+    app = _service_module("mitre", "app")
+    analysis = _service_module("mitre", "analysis")
+    models = _service_module("mitre", "models")
+    # Loading and warming the vector store takes a while; do it in the background
+    # like the service does, and fail MITRE calls until it is ready
+    asyncio.get_running_loop().run_in_executor(None, app.initialize)
+
+    async def mitre(
+        semantic: SemanticResult,
+        intent: Optional[IntentResult],
+        correlation_id: str,
+        k: int = 5,
+        timeout: Optional[float] = None,
+        use_llm: bool = True,
+    ) -> MitreResult:
+        if not app.ready:
+            raise LocalStageUnavailable(f"MITRE Reasoner not ready: {app.startup_error or 'still loading'}")
+        request = models.SemanticAnalysisRequest(
+            semantic_summary=semantic.semantic_summary,
+            semantic_features=semantic.semantic_features,
+            intent=intent.intent if intent else "unknown",
+            k=k,
+            use_llm=use_llm,
+        )
+        # Retrieval and the Groq client are blocking; keep them off the event loop
+        result = await asyncio.to_thread(analysis.analyze, request, app.retriever, app.reasoner, _deadline("mitre", timeout))
+        return MitreResult.model_validate(result.model_dump())
+
+    return mitre
+
+
+BUILDERS = {
+    "ingest": _build_ingest,
+    "semantic": _build_semantic,
+    "intent": _build_intent,
+    "mitre": _build_mitre,
+}
+
+
+def configured_local_stages() -> List[str]:
+    spec = settings.ORCHESTRATOR_LOCAL_STAGES.strip().lower()
+    if spec == "all":
+        return list(BUILDERS)
+    stages = [s.strip() for s in spec.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in BUILDERS]
+    if unknown:
+        raise ValueError(f"Unknown stages in ORCHESTRATOR_LOCAL_STAGES: {unknown}")
+    return stages
+
+
+def enable_local_stages(stages: Optional[List[str]] = None) -> List[str]:
+    """
+    Loads the in-process implementation of each stage (ORCHESTRATOR_LOCAL_STAGES by default).
+    Must be called from the running event loop. A stage whose service cannot be imported
+    (e.g. its dependencies are not installed) stays remote and the error is logged.
+    """
+    enabled = []
+    for stage in configured_local_stages() if stages is None else stages:
+        try:
+            register_local_stage(stage, BUILDERS[stage]())
+            enabled.append(stage)
+            logger.info(f"Stage '{stage}' runs in-process from {SERVICE_DIRS[stage]}")
+        except Exception as e:
+            logger.error(f"Could not load stage '{stage}' in-process, keeping it remote: {e}")
+    return enabled
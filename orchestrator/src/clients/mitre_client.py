@@ -1,20 +1,25 @@
 import httpx
 from typing import Optional
 from ..models import SemanticResult, IntentResult, MitreResult
-from ..config import settings
 from ..logger import logger
-from ..utils import async_client
+from ..http_pools import service_clients
+from .local_stages import get_local_stage, call_local_stage
 
 async def call_mitre_reasoner(
     semantic: SemanticResult,
     intent: Optional[IntentResult],
     correlation_id: str,
     k: int = 5,
+    timeout: Optional[float] = None,
+    use_llm: bool = True,
 ) -> Optional[MitreResult]:
     """
     POST {MITRE_URL}/analyze
+    With use_llm=False the reasoner returns its top retrieval match without LLM reasoning.
     """
-    url = f"{settings.MITRE_URL}/analyze"
+    client = service_clients["mitre"]
+    path = "/analyze"
+    url = client.url(path)
     
     # MITRE Reasoner expects:
     # { "semantic_summary": "...", "semantic_features": {...}, "intent": "...", "k": 5 }
@@ -22,16 +27,19 @@ async def call_mitre_reasoner(
         "semantic_summary": semantic.semantic_summary,
         "semantic_features": semantic.semantic_features,
         "intent": intent.intent if intent else "unknown",
-        "k": k
+        "k": k,
+        "use_llm": use_llm
     }
 
     try:
+        if get_local_stage("mitre"):
+            return await call_local_stage("mitre", semantic, intent, correlation_id, k=k, timeout=timeout, use_llm=use_llm)
         logger.info(f"Calling MITRE Reasoner: {url}", extra={"correlation_id": correlation_id})
-        response = await async_client.post(
-            url, 
-            json=payload, 
-            timeout=settings.ORCHESTRATOR_TIMEOUT,
-            headers={"X-Correlation-ID": correlation_id}
+        response = await client.post(
+            path,
+            json=payload,
+            headers={"X-Correlation-ID": correlation_id},
+            timeout=timeout
         )
         response.raise_for_status()
         return MitreResult(**response.json())
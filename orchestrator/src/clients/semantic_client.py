@@ -1,15 +1,17 @@
 import httpx
 from typing import Optional
 from ..models import NormalizedLog, SemanticResult
-from ..config import settings
 from ..logger import logger
-from ..utils import async_client
+from ..http_pools import service_clients
+from .local_stages import get_local_stage, call_local_stage
 
-async def call_semantic_interpreter(normalized: NormalizedLog, correlation_id: str) -> Optional[SemanticResult]:
+async def call_semantic_interpreter(normalized: NormalizedLog, correlation_id: str, timeout: Optional[float] = None) -> Optional[SemanticResult]:
     """
     POST {SEMANTIC_URL}/interpret
     """
-    url = f"{settings.SEMANTIC_URL}/interpret"
+    client = service_clients["semantic"]
+    path = "/interpret"
+    url = client.url(path)
     
     # Semantic Interpreter expects: { "raw_log": "...", "fields": {...} }
     payload = {
@@ -18,12 +20,14 @@ async def call_semantic_interpreter(normalized: NormalizedLog, correlation_id: s
     }
 
     try:
+        if get_local_stage("semantic"):
+            return await call_local_stage("semantic", normalized, correlation_id, timeout=timeout)
         logger.info(f"Calling Semantic Interpreter: {url}", extra={"correlation_id": correlation_id})
-        response = await async_client.post(
-            url, 
-            json=payload, 
-            timeout=settings.ORCHESTRATOR_TIMEOUT,
-            headers={"X-Correlation-ID": correlation_id}
+        response = await client.post(
+            path,
+            json=payload,
+            headers={"X-Correlation-ID": correlation_id},
+            timeout=timeout
         )
         response.raise_for_status()
         return SemanticResult(**response.json())
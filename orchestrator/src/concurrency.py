@@ -0,0 +1,163 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from .logger import logger
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """Raised when a request cannot get a slot (queue full or queue wait timed out)."""
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one downstream service.
+
+    Every completed request is a sample. Latency is tracked by two moving averages
+    (gradient-limiter style): a short-term one (`smoothing`) for the current latency and a
+    long-term one (`baseline_smoothing`) for the service's usual latency. Both are updated on
+    every successful sample. A failure, or a short-term average above `latency_tolerance` x
+    the long-term one, means the service is congested and the limit is multiplied by
+    `backoff`. Comparing averages rather than single samples keeps the normal spread of LLM
+    latencies (and the mix of fast and slow request kinds) from reading as congestion, and
+    because the baseline follows every sample, a service that is permanently slower is
+    accepted as normal after a few hundred requests. Otherwise, while the limit is actually
+    in use, it grows by 1/limit per sample (about +1 per round trip). Requests over the limit wait in a bounded FIFO
+    queue; when the queue is full, or the wait is too long, they are rejected at once
+    instead of piling up on a service that is already slow.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float,
+        min_limit: float,
+        max_limit: float,
+        backoff: float = 0.9,
+        latency_tolerance: float = 2.0,
+        max_queue: int = 100,
+        queue_timeout: float = 2.0,
+        smoothing: float = 0.05,
+        baseline_smoothing: float = 0.01,
+    ):
+        self.name = name
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.smoothing = smoothing
+        self.baseline_smoothing = baseline_smoothing
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._avg_latency: Optional[float] = None
+        self._baseline_latency: Optional[float] = None
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_queue_timeout": 0,
+            "peak_queue_depth": 0,
+            "decreases": 0,
+            # Released without a sample (cancelled or caller-deadline calls)
+            "unsampled": 0,
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """Waits for a slot; raises ConcurrencyLimitExceeded when none frees up in time."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self._stats["admitted"] += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._stats["rejected_queue_full"] += 1
+            raise ConcurrencyLimitExceeded(
+                f"{self.name}: concurrency limit {int(self.limit)} reached and {len(self._waiters)} requests already queued"
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._stats["queued"] += 1
+        self._stats["peak_queue_depth"] = max(self._stats["peak_queue_depth"], len(self._waiters))
+
+        wait = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        try:
+            # asyncio.wait does not cancel the future, so a slot handed over at the last moment is not lost
+            await asyncio.wait({waiter}, timeout=wait)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            self._stats["rejected_queue_timeout"] += 1
+            raise ConcurrencyLimitExceeded(f"{self.name}: no concurrency slot within {wait:.2f}s")
+        self._stats["admitted"] += 1
+
+    def _abandon(self, waiter: asyncio.Future):
+        if waiter.done() and not waiter.cancelled():
+            # We were given a slot but will not use it
+            self.in_flight -= 1
+            self._wake()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def release(self, latency: float, ok: Optional[bool]):
+        """
+        Returns the slot and feeds the request's outcome into the limit. With `ok=None` (the
+        call was cancelled or cut short by the caller's deadline) the slot is returned
+        without a sample.
+        """
+        saturated = self.in_flight >= self.limit / 2
+        self.in_flight -= 1
+        if ok is None:
+            self._stats["unsampled"] += 1
+            self._wake()
+            return
+
+        congested = not ok
+        if ok:
+            if self._avg_latency is None:
+                self._avg_latency = self._baseline_latency = latency
+            self._avg_latency += self.smoothing * (latency - self._avg_latency)
+            self._baseline_latency += self.baseline_smoothing * (latency - self._baseline_latency)
+            congested = self._avg_latency > self.latency_tolerance * self._baseline_latency
+
+        if congested:
+            new_limit = max(self.min_limit, self.limit * self.backoff)
+            if int(new_limit) < int(self.limit):
+                logger.debug(f"{self.name} concurrency limit lowered to {int(new_limit)}")
+            self.limit = new_limit
+            self._stats["decreases"] += 1
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+        self._wake()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "avg_latency_ms": round(self._avg_latency * 1000, 1) if self._avg_latency is not None else None,
+            "baseline_latency_ms": round(self._baseline_latency * 1000, 1) if self._baseline_latency is not None else None,
+            **self._stats,
+        }
@@ -1,7 +1,17 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
+
+# Service name -> settings prefix used for its URL and connection pool
+SERVICE_PREFIXES = {
+    "ingest": "LOG_INGEST",
+    "semantic": "SEMANTIC",
+    "intent": "INTENT",
+    "mitre": "MITRE",
+}
 
 class Settings(BaseSettings):
+    # Each URL may be a comma-separated list of replicas; requests are balanced across them
     LOG_INGEST_URL: str = "http://localhost:8003"
     SEMANTIC_URL: str = "http://localhost:8004"
     INTENT_URL: str = "http://localhost:8002"
@@ -9,6 +19,233 @@ class Settings(BaseSettings):
     
     ORCHESTRATOR_TIMEOUT: float = 5.0
     ORCHESTRATOR_LOG_LEVEL: str = "INFO"
+    # Max time to wait for a free connection from a service pool
+    ORCHESTRATOR_POOL_TIMEOUT: float = 5.0
+
+    # Replica load balancing: "p2c" (power of two choices) or "least_outstanding"
+    ORCHESTRATOR_LB_POLICY: str = "p2c"
+    # Replicas are ejected after this many consecutive failures, for ORCHESTRATOR_EJECT_SECONDS
+    ORCHESTRATOR_EJECT_AFTER_FAILURES: int = 3
+    ORCHESTRATOR_EJECT_SECONDS: float = 30.0
+    # Active health checks (only for services with more than one replica; 0 = off)
+    ORCHESTRATOR_HEALTH_CHECK_INTERVAL: float = 5.0
+    ORCHESTRATOR_HEALTH_CHECK_TIMEOUT: float = 2.0
+
+    # Adaptive (AIMD) concurrency limit per downstream service. The limit shrinks on errors
+    # (not on cancelled calls, timeouts of a caller's tighter deadline or deadline 504s) or
+    # when the short-term average latency exceeds LATENCY_TOLERANCE x the long-term average,
+    # and grows back slowly otherwise. Excess requests wait in a bounded queue and are
+    # rejected when it is full.
+    ORCHESTRATOR_ADAPTIVE_CONCURRENCY: bool = True
+    ORCHESTRATOR_LIMIT_INITIAL: int = 20
+    ORCHESTRATOR_LIMIT_MIN: int = 2
+    ORCHESTRATOR_LIMIT_MAX: int = 200
+    ORCHESTRATOR_LIMIT_BACKOFF: float = 0.9
+    ORCHESTRATOR_LIMIT_LATENCY_TOLERANCE: float = 2.0
+    ORCHESTRATOR_LIMIT_QUEUE_SIZE: int = 100
+    ORCHESTRATOR_LIMIT_QUEUE_TIMEOUT: float = 2.0
+
+    # Log Ingestion connection pool and timeouts (unset timeouts fall back to ORCHESTRATOR_TIMEOUT)
+    LOG_INGEST_MAX_CONNECTIONS: int = 100
+    LOG_INGEST_MAX_KEEPALIVE: int = 20
+    LOG_INGEST_KEEPALIVE_EXPIRY: float = 30.0
+    LOG_INGEST_HTTP2: bool = False
+    LOG_INGEST_CONNECT_TIMEOUT: float = 2.0
+    LOG_INGEST_READ_TIMEOUT: Optional[float] = None
+    LOG_INGEST_TOTAL_TIMEOUT: Optional[float] = None
+    LOG_INGEST_HEALTH_PATH: str = "/health"
+
+    # Semantic Interpreter connection pool and timeouts (unset timeouts fall back to ORCHESTRATOR_TIMEOUT)
+    SEMANTIC_MAX_CONNECTIONS: int = 100
+    SEMANTIC_MAX_KEEPALIVE: int = 20
+    SEMANTIC_KEEPALIVE_EXPIRY: float = 30.0
+    SEMANTIC_HTTP2: bool = False
+    SEMANTIC_CONNECT_TIMEOUT: float = 2.0
+    SEMANTIC_READ_TIMEOUT: Optional[float] = None
+    SEMANTIC_TOTAL_TIMEOUT: Optional[float] = None
+    SEMANTIC_HEALTH_PATH: str = "/health"
+
+    # Intent Classifier connection pool and timeouts (unset timeouts fall back to ORCHESTRATOR_TIMEOUT)
+    INTENT_MAX_CONNECTIONS: int = 100
+    INTENT_MAX_KEEPALIVE: int = 20
+    INTENT_KEEPALIVE_EXPIRY: float = 30.0
+    INTENT_HTTP2: bool = False
+    INTENT_CONNECT_TIMEOUT: float = 2.0
+    INTENT_READ_TIMEOUT: Optional[float] = None
+    INTENT_TOTAL_TIMEOUT: Optional[float] = None
+    INTENT_HEALTH_PATH: str = "/health"
+
+    # MITRE Reasoner connection pool and timeouts (unset timeouts fall back to ORCHESTRATOR_TIMEOUT)
+    MITRE_MAX_CONNECTIONS: int = 100
+    MITRE_MAX_KEEPALIVE: int = 20
+    MITRE_KEEPALIVE_EXPIRY: float = 30.0
+    MITRE_HTTP2: bool = False
+    MITRE_CONNECT_TIMEOUT: float = 2.0
+    MITRE_READ_TIMEOUT: Optional[float] = None
+    MITRE_TOTAL_TIMEOUT: Optional[float] = None
+    # /ready only succeeds once the vector store is loaded and warm
+    MITRE_HEALTH_PATH: str = "/ready"
+
+    # In-process ("monolith") stages: comma-separated subset of ingest,semantic,intent,mitre
+    # (or "all") whose service code is imported and called directly instead of over HTTP.
+    # Needs those services' requirements installed; the root defaults to this repository.
+    ORCHESTRATOR_LOCAL_STAGES: str = ""
+    ORCHESTRATOR_SERVICES_ROOT: str = ""
+
+    # Stage scheduling: start MITRE retrieval in parallel with intent classification,
+    # then re-run it with the intent hint only if the two disagree on the tactic
+    ORCHESTRATOR_SPECULATIVE_MITRE: bool = True
+    ORCHESTRATOR_MITRE_RECHECK: bool = True
+
+    # End-to-end deadline for one enrichment (seconds, 0 = no deadline). Callers may send a
+    # tighter one in X-Deadline-Ms. The remaining budget is split across the stages still
+    # to run in proportion to these weights.
+    ORCHESTRATOR_REQUEST_BUDGET: float = 20.0
+    ORCHESTRATOR_STAGE_WEIGHTS: str = "ingest:1,semantic:4,intent:2,mitre:4,mitre_recheck:4"
+
+    # Admission control for /enrich_log: requests beyond MAX_IN_FLIGHT wait in a priority
+    # queue of MAX_QUEUED; anything that does not fit (or waits too long) gets a 429.
+    ORCHESTRATOR_ADMISSION_ENABLED: bool = True
+    ORCHESTRATOR_MAX_IN_FLIGHT: int = 64
+    ORCHESTRATOR_MAX_QUEUED: int = 256
+    ORCHESTRATOR_ADMISSION_QUEUE_TIMEOUT: float = 5.0
+    # Comma-separated field=glob:class rules, class one of critical|high|normal|low (default normal).
+    # source/event_type match the request; any other field is read from metadata (e.g. tenant).
+    # e.g. "channel=Security:critical,source=windows_eventlog:high,source=syslog:low"
+    ORCHESTRATOR_PRIORITY_RULES: str = ""
+
+    # Degradation tiers: full -> mitre_retrieval_only -> rules_only_intent -> normalize_and_score.
+    # Each list gives the level that enters tiers 1..3: backlog is queued requests relative to
+    # capacity (admission and service concurrency limits), averaged with a time constant of
+    # BACKLOG_SMOOTHING seconds; latency is the smoothed latency of the LLM-backed services in
+    # seconds. The tier rises one step at a time, once a signal has stayed above the next
+    # threshold for ESCALATE_AFTER seconds. A tier is left only after MIN_DWELL seconds and
+    # once both signals are below RECOVERY_RATIO x its thresholds.
+    ORCHESTRATOR_DEGRADATION_ENABLED: bool = True
+    ORCHESTRATOR_DEGRADE_BACKLOG_THRESHOLDS: str = "0.5,1.5,3.0"
+    ORCHESTRATOR_DEGRADE_LATENCY_THRESHOLDS: str = "3,5,8"
+    ORCHESTRATOR_DEGRADE_RECOVERY_RATIO: float = 0.7
+    ORCHESTRATOR_DEGRADE_MIN_DWELL: float = 15.0
+    ORCHESTRATOR_DEGRADE_BACKLOG_SMOOTHING: float = 5.0
+    ORCHESTRATOR_DEGRADE_ESCALATE_AFTER: float = 2.0
+
+    # Bulk enrichment (/enrich_logs)
+    ORCHESTRATOR_BULK_CONCURRENCY: int = 16
+    ORCHESTRATOR_BULK_MAX_ITEMS: int = 1000
+    ORCHESTRATOR_INGEST_BATCH_SIZE: int = 100
+    # Ingestion batch calls in flight at once for one bulk request
+    ORCHESTRATOR_INGEST_BATCH_CONCURRENCY: int = 2
+    # Finished alerts buffered for a streaming client before workers pause
+    ORCHESTRATOR_STREAM_BUFFER: int = 32
+
+    # Async job API (/jobs): accepted events are stored in SQLite before their job IDs are
+    # returned and drained by JOBS_WORKERS background workers. Jobs still running at shutdown
+    # are re-queued on the next start (or failed once they have used JOBS_MAX_ATTEMPTS);
+    # results are kept for JOBS_RETENTION seconds.
+    ORCHESTRATOR_JOBS_ENABLED: bool = True
+    ORCHESTRATOR_JOBS_PATH: str = "./enrichment_jobs.sqlite3"
+    ORCHESTRATOR_JOBS_WORKERS: int = 8
+    ORCHESTRATOR_JOBS_MAX_QUEUED: int = 100000
+    ORCHESTRATOR_JOBS_MAX_ATTEMPTS: int = 3
+    ORCHESTRATOR_JOBS_RETENTION: float = 86400.0
+    # Longest a GET /jobs/{id}?wait= long-poll may block
+    ORCHESTRATOR_JOBS_MAX_WAIT: float = 30.0
+
+    # Streaming topology (off by default): events posted to /stream/events flow through one
+    # queue per stage (ingest -> semantic -> intent -> mitre -> finalize) and the alerts are
+    # read from /stream/output. Broker "memory" keeps everything in this process; "sqlite"
+    # lets stage workers also run as separate processes (python -m src.streaming.worker).
+    ORCHESTRATOR_STREAMING_ENABLED: bool = False
+    ORCHESTRATOR_STREAMING_BROKER: str = "sqlite"
+    ORCHESTRATOR_STREAMING_PATH: str = "./enrichment_stream.sqlite3"
+    # Stages whose workers run inside the orchestrator ("all", a comma list, or "" for none)
+    ORCHESTRATOR_STREAMING_STAGES: str = "all"
+    # Consumers per stage: size LLM-bound stages up and cheap ones down
+    ORCHESTRATOR_STREAMING_WORKERS: str = "ingest:1,semantic:4,intent:2,mitre:4,finalize:1"
+    ORCHESTRATOR_STREAMING_BATCH_SIZE: int = 16
+    # How long a consumer waits for a first message before polling again
+    ORCHESTRATOR_STREAMING_BATCH_WAIT: float = 0.5
+    # A leased message is redelivered if its worker has not acked it within this time
+    ORCHESTRATOR_STREAMING_VISIBILITY_TIMEOUT: float = 120.0
+    ORCHESTRATOR_STREAMING_MAX_ATTEMPTS: int = 3
+
+    # Event-storm suppression (off by default). After normalization, events are keyed on
+    # KEY_FIELDS (normalized attributes, then parsed fields, then request metadata) within each
+    # SCOPE_FIELDS partition. A key's window opens at its first event and lasts WINDOW seconds;
+    # its first THRESHOLD events are enriched and later ones are counted onto the window's first
+    # alert, copying its enrichment without any LLM calls. Events with none of the REQUIRE_ANY
+    # fields set (no host or user to tie a storm to) are never suppressed.
+    ORCHESTRATOR_SUPPRESSION_ENABLED: bool = False
+    ORCHESTRATOR_SUPPRESSION_KEY_FIELDS: str = "hostname,user,event_type,EventID"
+    ORCHESTRATOR_SUPPRESSION_SCOPE_FIELDS: str = "source,tenant"
+    ORCHESTRATOR_SUPPRESSION_REQUIRE_ANY: str = "hostname,user"
+    ORCHESTRATOR_SUPPRESSION_WINDOW: float = 60.0
+    ORCHESTRATOR_SUPPRESSION_THRESHOLD: int = 1
+    ORCHESTRATOR_SUPPRESSION_MAX_KEYS: int = 50000
+
+    # Traffic capture for scripts/replay.py (off while CAPTURE_DIR is empty): this fraction of
+    # enrichments is written, with every stage's response and latency, to gzip NDJSON files
+    # of at most CAPTURE_MAX_RECORDS lines each
+    ORCHESTRATOR_CAPTURE_DIR: str = ""
+    ORCHESTRATOR_CAPTURE_SAMPLE_RATE: float = 0.1
+    ORCHESTRATOR_CAPTURE_MAX_RECORDS: int = 50000
+
+    # Distributed tracing, shared with the other services (same variable names in each).
+    # Exporter "none" (spans are no-ops), "otlp" (OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT)
+    # or "jsonl" (appended to TRACING_JSONL_PATH).
+    TRACING_EXPORTER: str = "none"
+    TRACING_JSONL_PATH: str = "./traces.jsonl"
+    TRACING_SAMPLE_RATIO: float = 1.0
+    # Embed per-stage timings (ms) and the trace ID in every alert; /enrich_log?timings=true
+    # asks for them on a single request
+    ORCHESTRATOR_INCLUDE_TIMINGS: bool = False
+
+    # POST /admin/profile (sampling profiler); disabled while ADMIN_TOKEN is empty. Same
+    # variable names in every service.
+    ADMIN_TOKEN: str = ""
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_MAX_SECONDS: float = 120.0
+
+    # Exact-duplicate enrichment cache (in-memory LRU backed by SQLite; empty path = memory only)
+    ORCHESTRATOR_CACHE_ENABLED: bool = True
+    ORCHESTRATOR_CACHE_PATH: str = "./enrichment_cache.sqlite3"
+    ORCHESTRATOR_CACHE_TTL: float = 3600.0
+    ORCHESTRATOR_CACHE_MAX_ENTRIES: int = 10000
+    ORCHESTRATOR_CACHE_MAX_DISK_ENTRIES: int = 200000
+    # Comma-separated metadata keys that vary per delivery and must not affect the cache key
+    ORCHESTRATOR_CACHE_IGNORED_METADATA: str = "received_at,ingest_time,forwarder,sequence"
+
+    def service_pool(self, service: str) -> dict:
+        """Connection pool settings for one downstream service (see SERVICE_PREFIXES)."""
+        prefix = SERVICE_PREFIXES[service]
+        total = getattr(self, f"{prefix}_TOTAL_TIMEOUT") or self.ORCHESTRATOR_TIMEOUT
+        return {
+            "base_urls": [u.strip() for u in getattr(self, f"{prefix}_URL").split(",") if u.strip()],
+            "max_connections": getattr(self, f"{prefix}_MAX_CONNECTIONS"),
+            "max_keepalive": getattr(self, f"{prefix}_MAX_KEEPALIVE"),
+            "keepalive_expiry": getattr(self, f"{prefix}_KEEPALIVE_EXPIRY"),
+            "http2": getattr(self, f"{prefix}_HTTP2"),
+            "connect_timeout": getattr(self, f"{prefix}_CONNECT_TIMEOUT"),
+            "read_timeout": getattr(self, f"{prefix}_READ_TIMEOUT") or total,
+            "total_timeout": total,
+            "pool_timeout": self.ORCHESTRATOR_POOL_TIMEOUT,
+            "health_path": getattr(self, f"{prefix}_HEALTH_PATH"),
+        }
+
+    def service_limiter(self, service: str) -> Optional[dict]:
+        """Adaptive concurrency limiter settings for one downstream service (None = unlimited)."""
+        if not self.ORCHESTRATOR_ADAPTIVE_CONCURRENCY:
+            return None
+        return {
+            "initial_limit": self.ORCHESTRATOR_LIMIT_INITIAL,
+            "min_limit": self.ORCHESTRATOR_LIMIT_MIN,
+            # Never allow more requests than the service's connection pool can carry
+            "max_limit": min(self.ORCHESTRATOR_LIMIT_MAX, getattr(self, f"{SERVICE_PREFIXES[service]}_MAX_CONNECTIONS")),
+            "backoff": self.ORCHESTRATOR_LIMIT_BACKOFF,
+            "latency_tolerance": self.ORCHESTRATOR_LIMIT_LATENCY_TOLERANCE,
+            "max_queue": self.ORCHESTRATOR_LIMIT_QUEUE_SIZE,
+            "queue_timeout": self.ORCHESTRATOR_LIMIT_QUEUE_TIMEOUT,
+        }
 
     class Config:
         # Load from parent directory (project root) if not found locally
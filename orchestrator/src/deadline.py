@@ -0,0 +1,48 @@
+import time
+from typing import Dict, Optional
+
+# Remaining budget in milliseconds, sent beside X-Correlation-ID on every downstream call.
+# Relative rather than absolute so clock skew between containers does not matter.
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+
+class Deadline:
+    """Absolute point in (monotonic) time after which nobody is waiting for the result."""
+
+    def __init__(self, budget_seconds: float):
+        self.expires_at = time.monotonic() + budget_seconds
+
+    @classmethod
+    def from_header(cls, value: Optional[str], default_seconds: float) -> Optional["Deadline"]:
+        """
+        Deadline from an inbound X-Deadline-Ms header, capped at `default_seconds`.
+        Returns None when neither is set.
+        """
+        budgets = [default_seconds] if default_seconds > 0 else []
+        if value:
+            try:
+                budgets.append(max(0.0, float(value) / 1000))
+            except ValueError:
+                pass
+        return cls(min(budgets)) if budgets else None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def share(self, weight: float, downstream_weight: float) -> float:
+        """Slice of the remaining budget for a stage followed by `downstream_weight` of further work."""
+        total = weight + downstream_weight
+        return self.remaining() * (weight / total) if total > 0 else self.remaining()
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """'ingest:1,semantic:4' -> {'ingest': 1.0, 'semantic': 4.0}"""
+    weights = {}
+    for part in spec.split(","):
+        name, _, value = part.partition(":")
+        if name.strip() and value.strip():
+            weights[name.strip()] = float(value)
+    return weights
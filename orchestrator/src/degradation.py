@@ -0,0 +1,175 @@
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+from .logger import logger
+from .admission import admission
+from .http_pools import service_clients
+
+# Ordered from full enrichment to cheapest; each tier includes the cuts of the ones before it
+TIERS = ["full", "mitre_retrieval_only", "rules_only_intent", "normalize_and_score"]
+TIER_NOTES = {
+    1: "Degraded mode 'mitre_retrieval_only': MITRE technique is the top retrieval match, without LLM reasoning",
+    2: "Degraded mode 'rules_only_intent': intent from rules only, MITRE without LLM reasoning",
+    3: "Degraded mode 'normalize_and_score': semantic, intent and MITRE stages skipped",
+}
+
+# Services whose latency is dominated by LLM calls
+LLM_SERVICES = ("semantic", "intent", "mitre")
+
+
+def _parse_thresholds(spec: str, name: str) -> List[float]:
+    values = [float(v) for v in spec.split(",") if v.strip()]
+    if len(values) != len(TIERS) - 1 or values != sorted(values):
+        raise ValueError(f"{name} needs {len(TIERS) - 1} ascending values, got '{spec}'")
+    return values
+
+
+class DegradationController:
+    """
+    Picks the enrichment tier from two load signals:
+      - backlog: requests queued at admission or behind a service concurrency limit,
+        relative to the capacity in front of them
+      - latency: smoothed latency of the LLM-backed services (seconds)
+    The backlog is an exponential moving average with a time constant of `backlog_smoothing`
+    seconds, so the short queue of a limiter that is still ramping up does not count as load.
+    The tier rises one step at a time, and only after either signal has been above the next
+    threshold for `escalate_after` seconds. It steps back down one tier at a time, only after
+    `min_dwell` seconds in the current tier and once both signals are below
+    `recovery_ratio` x the current tier's thresholds, so it does not flap.
+    """
+
+    def __init__(
+        self,
+        backlog_thresholds: List[float],
+        latency_thresholds: List[float],
+        recovery_ratio: float,
+        min_dwell: float,
+        backlog_smoothing: float = 5.0,
+        escalate_after: float = 2.0,
+    ):
+        self.backlog_thresholds = backlog_thresholds
+        self.latency_thresholds = latency_thresholds
+        self.recovery_ratio = recovery_ratio
+        self.min_dwell = min_dwell
+        self.backlog_smoothing = backlog_smoothing
+        self.escalate_after = escalate_after
+
+        self.tier = 0
+        self._changed_at = time.monotonic()
+        self._transitions = 0
+        self._served = {name: 0 for name in TIERS}
+        self._backlog = 0.0
+        # Last raw backlog sample, held until the next one (zero-order hold)
+        self._backlog_sample = 0.0
+        self._backlog_at = self._changed_at
+        # Since when the signals have pointed above the current tier (None = they do not)
+        self._breach_since: Optional[float] = None
+
+    @staticmethod
+    def _queued_backlog() -> float:
+        backlog = 0.0
+        if admission:
+            backlog = max(backlog, admission.queued / max(1, admission.max_in_flight))
+        for client in service_clients.values():
+            if client.limiter:
+                backlog = max(backlog, client.limiter.queue_depth / max(1, int(client.limiter.limit)))
+        return backlog
+
+    def _sample_backlog(self, now: float):
+        # Time-weighted EWMA with a zero-order hold: the previous sample is taken to have held
+        # since it was read, so a new sample after an idle spell does not replace the average
+        sample = self._queued_backlog()
+        if self.backlog_smoothing <= 0:
+            self._backlog = sample
+        else:
+            alpha = 1 - math.exp(-(now - self._backlog_at) / self.backlog_smoothing)
+            self._backlog += alpha * (self._backlog_sample - self._backlog)
+        self._backlog_sample = sample
+        self._backlog_at = now
+
+    def signals(self) -> Dict[str, float]:
+        """Smoothed backlog (as of the last evaluate) and recent LLM latency; reading them changes nothing."""
+        now = time.monotonic()
+        backlog = self._backlog
+
+        # Latency of a service that has not answered for a while says nothing about now
+        # (and in the cheapest tier the LLM services are not called at all)
+        latency = 0.0
+        for name in LLM_SERVICES:
+            client = service_clients[name]
+            if client.avg_latency is not None and client.last_completed_at and now - client.last_completed_at < self.min_dwell:
+                latency = max(latency, client.avg_latency)
+        return {"backlog": backlog, "latency_s": latency}
+
+    @staticmethod
+    def _tier_for(value: float, thresholds: List[float]) -> int:
+        return sum(1 for t in thresholds if value >= t)
+
+    def evaluate(self) -> int:
+        """Current tier, updated from the latest signals."""
+        self._sample_backlog(time.monotonic())
+        signals = self.signals()
+        target = max(
+            self._tier_for(signals["backlog"], self.backlog_thresholds),
+            self._tier_for(signals["latency_s"], self.latency_thresholds),
+        )
+        now = time.monotonic()
+
+        if target > self.tier:
+            if self._breach_since is None:
+                self._breach_since = now
+            if now - self._breach_since >= self.escalate_after:
+                self._move(self.tier + 1, signals, now)
+                # The next tier needs a breach of its own
+                self._breach_since = now if target > self.tier else None
+            return self.tier
+
+        self._breach_since = None
+        if self.tier > 0 and now - self._changed_at >= self.min_dwell:
+            recovered = (
+                signals["backlog"] < self.backlog_thresholds[self.tier - 1] * self.recovery_ratio
+                and signals["latency_s"] < self.latency_thresholds[self.tier - 1] * self.recovery_ratio
+            )
+            if recovered:
+                self._move(self.tier - 1, signals, now)
+        return self.tier
+
+    def _move(self, tier: int, signals: Dict[str, float], now: float):
+        logger.warning(
+            f"Enrichment tier {TIERS[self.tier]} -> {TIERS[tier]} "
+            f"(backlog {signals['backlog']:.2f}, LLM latency {signals['latency_s']:.2f}s)"
+        )
+        self.tier = tier
+        self._changed_at = now
+        self._transitions += 1
+
+    def record(self, tier: int):
+        self._served[TIERS[tier]] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tier": TIERS[self.tier],
+            "in_tier_for_s": round(time.monotonic() - self._changed_at, 1),
+            "transitions": self._transitions,
+            "signals": {k: round(v, 3) for k, v in self.signals().items()},
+            "served": dict(self._served),
+        }
+
+
+def _build_degradation() -> Optional[DegradationController]:
+    if not settings.ORCHESTRATOR_DEGRADATION_ENABLED:
+        return None
+    return DegradationController(
+        backlog_thresholds=_parse_thresholds(settings.ORCHESTRATOR_DEGRADE_BACKLOG_THRESHOLDS, "ORCHESTRATOR_DEGRADE_BACKLOG_THRESHOLDS"),
+        latency_thresholds=_parse_thresholds(settings.ORCHESTRATOR_DEGRADE_LATENCY_THRESHOLDS, "ORCHESTRATOR_DEGRADE_LATENCY_THRESHOLDS"),
+        recovery_ratio=settings.ORCHESTRATOR_DEGRADE_RECOVERY_RATIO,
+        min_dwell=settings.ORCHESTRATOR_DEGRADE_MIN_DWELL,
+        backlog_smoothing=settings.ORCHESTRATOR_DEGRADE_BACKLOG_SMOOTHING,
+        escalate_after=settings.ORCHESTRATOR_DEGRADE_ESCALATE_AFTER,
+    )
+
+
+# Shared controller (None when degradation is disabled)
+degradation = _build_degradation()
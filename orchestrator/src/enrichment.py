@@ -0,0 +1,368 @@
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .models import RawLogRequest, NormalizedLog, SemanticResult, IntentResult, MitreResult, EnrichedAlert
+from .config import settings
+from .logger import logger
+from .pipeline import PipelineContext, Stage, StageGraph
+from .deadline import Deadline, parse_weights
+from .utils import build_summary, build_recommendations
+from .scoring import compute_risk
+from .cache import enrichment_cache
+from .degradation import degradation, TIERS, TIER_NOTES
+from .metrics import ENRICHMENTS
+from .capture import traffic_capture
+from .suppression import storm_suppressor
+from .tracing import tracer, correlation_id_var, current_trace_id
+
+from .clients.ingestion_client import call_log_ingestion
+from .clients.semantic_client import call_semantic_interpreter
+from .clients.intent_client import call_intent_classifier
+from .clients.mitre_client import call_mitre_reasoner
+
+
+class IngestionFailedError(Exception):
+    """Raised when the critical ingestion stage produced no normalized log."""
+
+
+def _normalize_tactic(value: str) -> str:
+    return value.strip().lower().replace("-", "_").replace(" ", "_")
+
+
+def mitre_matches_intent(mitre: MitreResult, intent: IntentResult) -> bool:
+    """
+    True when the speculative MITRE answer is consistent with the intent tactic,
+    or when there is not enough information to tell.
+    """
+    if intent.intent == "unknown" or not intent.tactic or intent.tactic == "unknown":
+        return True
+    phases = {_normalize_tactic(p) for p in mitre.kill_chain_phase.split(",") if p.strip()}
+    if not phases or phases & {"unknown", "none", "error"}:
+        return True
+    return _normalize_tactic(intent.tactic) in phases
+
+
+def _suppressed(ctx: PipelineContext) -> bool:
+    decision = ctx.results.get("suppress")
+    return bool(decision and decision.first)
+
+
+# --- Stages ---
+
+async def ingest_stage(ctx: PipelineContext):
+    # 1. Log Ingestion & Normalization (Critical Step)
+    # Already normalized when the log arrived through a bulk request
+    if ctx.results.get("ingest"):
+        return ctx.results["ingest"]
+    return await call_log_ingestion(ctx.payload, ctx.correlation_id, timeout=ctx.budgets.get("ingest"))
+
+
+async def suppress_stage(ctx: PipelineContext):
+    # 1b. Storm suppression: repeats of the same key within the window are counted onto
+    # the window's first alert instead of being enriched again
+    normalized = ctx.results.get("ingest")
+    if not normalized:
+        return None
+    decision = storm_suppressor.check(ctx.payload, normalized, ctx.correlation_id)
+    if decision.candidate:
+        await storm_suppressor.suppress(decision, timeout=ctx.deadline.remaining() if ctx.deadline else None)
+    return decision
+
+
+async def semantic_stage(ctx: PipelineContext):
+    # 2. Semantic Interpretation
+    normalized = ctx.results.get("ingest")
+    if not normalized or _suppressed(ctx):
+        return None
+    semantic = await call_semantic_interpreter(normalized, ctx.correlation_id, timeout=ctx.budgets.get("semantic"))
+    if not semantic:
+        ctx.add_error("semantic", "Semantic Interpreter failed")
+    return semantic
+
+
+async def intent_stage(ctx: PipelineContext):
+    # 3. Intent Classification (Requires Semantic)
+    if _suppressed(ctx):
+        return None
+    semantic = ctx.results.get("semantic")
+    if not semantic:
+        ctx.add_error("intent", "Skipped Intent Classifier (dependency missing)")
+        return None
+    intent = await call_intent_classifier(
+        semantic, ctx.correlation_id, timeout=ctx.budgets.get("intent"), allow_llm=ctx.tier < 2
+    )
+    if not intent:
+        ctx.add_error("intent", "Intent Classifier failed")
+    return intent
+
+
+async def mitre_stage(ctx: PipelineContext):
+    # 4. MITRE Reasoning (Requires Semantic)
+    # In speculative mode this runs alongside intent and only gets the intent hint if it is already known
+    if _suppressed(ctx):
+        return None
+    semantic = ctx.results.get("semantic")
+    if not semantic:
+        ctx.add_error("mitre", "Skipped MITRE Reasoner (dependency missing)")
+        return None
+    mitre = await call_mitre_reasoner(
+        semantic, ctx.results.get("intent"), ctx.correlation_id, timeout=ctx.budgets.get("mitre"), use_llm=ctx.tier < 1
+    )
+    if not mitre:
+        ctx.add_error("mitre", "MITRE Reasoner failed")
+    return mitre
+
+
+async def mitre_recheck_stage(ctx: PipelineContext):
+    # 4b. Validate the speculative MITRE result once the intent is known;
+    # only re-run with the intent hint when the two disagree on the tactic.
+    # Without LLM reasoning the hint changes nothing, so degraded runs keep the first answer.
+    semantic = ctx.results.get("semantic")
+    intent = ctx.results.get("intent")
+    mitre = ctx.results.get("mitre")
+    if ctx.tier >= 1 or not (semantic and intent and mitre) or mitre_matches_intent(mitre, intent):
+        return mitre
+
+    logger.info(
+        f"Speculative MITRE tactic '{mitre.kill_chain_phase}' disagrees with intent tactic '{intent.tactic}'. Re-running with intent.",
+        extra={"correlation_id": ctx.correlation_id}
+    )
+    rechecked = await call_mitre_reasoner(semantic, intent, ctx.correlation_id, timeout=ctx.budgets.get("mitre_recheck"))
+    return rechecked or mitre
+
+
+def build_stage_graph(speculative_mitre: Optional[bool] = None, tier: int = 0) -> StageGraph:
+    speculative = settings.ORCHESTRATOR_SPECULATIVE_MITRE if speculative_mitre is None else speculative_mitre
+    weights = parse_weights(settings.ORCHESTRATOR_STAGE_WEIGHTS)
+
+    def stage(name, run, deps=None):
+        return Stage(name, run, deps=deps or [], weight=weights.get(name, 1.0))
+
+    if tier >= 3:
+        # normalize_and_score: only the (cheap) ingestion call
+        return StageGraph([stage("ingest", ingest_stage)])
+
+    stages = [stage("ingest", ingest_stage)]
+    if storm_suppressor:
+        # Only waits on other events, so it takes no share of the deadline
+        stages.append(Stage("suppress", suppress_stage, deps=["ingest"], weight=0.0))
+    stages += [
+        stage("semantic", semantic_stage, deps=["suppress" if storm_suppressor else "ingest"]),
+        stage("intent", intent_stage, deps=["semantic"]),
+    ]
+    if speculative:
+        stages.append(stage("mitre", mitre_stage, deps=["semantic"]))
+        if settings.ORCHESTRATOR_MITRE_RECHECK:
+            stages.append(stage("mitre_recheck", mitre_recheck_stage, deps=["intent", "mitre"]))
+    else:
+        stages.append(stage("mitre", mitre_stage, deps=["semantic", "intent"]))
+    return StageGraph(stages)
+
+
+def build_alert(
+    payload: RawLogRequest,
+    correlation_id: str,
+    normalized: NormalizedLog,
+    semantic: Optional[SemanticResult],
+    intent: Optional[IntentResult],
+    mitre: Optional[MitreResult],
+    errors: List[str],
+    cached: bool = False,
+    tier: int = 0,
+) -> EnrichedAlert:
+    # 5. Risk Scoring
+    risk = compute_risk(semantic, intent, mitre)
+
+    # 6. Summary & Recommendations
+    summary = build_summary(normalized, semantic, intent, mitre, risk)
+    recommendations = build_recommendations(intent, mitre, risk)
+
+    # 7. Construct Final Alert
+    # Use normalized source if payload source is missing
+    final_source = payload.source or (normalized.source if normalized else "unknown")
+
+    return EnrichedAlert(
+        correlation_id=correlation_id,
+        raw_log=payload.raw_log,
+        source=final_source,
+        event_type=payload.event_type,
+        normalized=normalized,
+        semantic=semantic,
+        intent=intent,
+        mitre=mitre,
+        risk=risk,
+        summary=summary,
+        recommendations=recommendations,
+        errors=errors,
+        cached=cached,
+        degradation_tier=TIERS[tier]
+    )
+
+
+def _from_cache(payload: RawLogRequest, correlation_id: str, stages: dict) -> EnrichedAlert:
+    return build_alert(
+        payload,
+        correlation_id,
+        normalized=NormalizedLog(**stages["normalized"]),
+        semantic=SemanticResult(**stages["semantic"]) if stages.get("semantic") else None,
+        intent=IntentResult(**stages["intent"]) if stages.get("intent") else None,
+        mitre=MitreResult(**stages["mitre"]) if stages.get("mitre") else None,
+        errors=[],
+        cached=True,
+    )
+
+
+def _suppressed_alert(
+    payload: RawLogRequest, correlation_id: str, normalized: NormalizedLog, first: EnrichedAlert, repeat_count: int
+) -> EnrichedAlert:
+    # This event's identity and normalized form, the first alert's enrichment
+    return first.model_copy(update={
+        "correlation_id": correlation_id,
+        "enriched_at": datetime.utcnow(),
+        "raw_log": payload.raw_log,
+        "source": payload.source or normalized.source,
+        "event_type": payload.event_type,
+        "normalized": normalized,
+        "cached": False,
+        "suppressed_into": first.correlation_id,
+        "repeat_count": repeat_count,
+        "timings_ms": None,
+        "trace_id": None,
+    })
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+async def enrich(
+    payload: RawLogRequest,
+    correlation_id: str,
+    normalized: Optional[NormalizedLog] = None,
+    deadline: Optional[Deadline] = None,
+    include_timings: Optional[bool] = None,
+) -> EnrichedAlert:
+    """
+    Runs the full enrichment pipeline for one raw log.
+    Pass `normalized` to skip the ingestion call when the log was already normalized in a batch.
+    `deadline` defaults to ORCHESTRATOR_REQUEST_BUDGET from now; stages that cannot start
+    before it are skipped and reported in `errors`.
+    With `include_timings` (default ORCHESTRATOR_INCLUDE_TIMINGS) the alert carries the
+    per-stage timings and the trace ID.
+    Raises IngestionFailedError when the log could not be normalized.
+    """
+    if include_timings is None:
+        include_timings = settings.ORCHESTRATOR_INCLUDE_TIMINGS
+    start = time.perf_counter()
+    token = correlation_id_var.set(correlation_id)
+    try:
+        with tracer.start_as_current_span("enrich", attributes={"source": payload.source or "unknown"}) as span:
+            alert, timings = await _run_enrichment(payload, correlation_id, normalized, deadline)
+            span.set_attribute("cached", alert.cached)
+            span.set_attribute("degradation_tier", alert.degradation_tier)
+            if include_timings:
+                alert.timings_ms = {**timings, "total": round(_elapsed_ms(start), 2)}
+                alert.trace_id = current_trace_id()
+            return alert
+    finally:
+        correlation_id_var.reset(token)
+
+
+async def _run_enrichment(
+    payload: RawLogRequest,
+    correlation_id: str,
+    normalized: Optional[NormalizedLog],
+    deadline: Optional[Deadline],
+) -> Tuple[EnrichedAlert, Dict[str, float]]:
+    started = time.perf_counter()
+    capture = traffic_capture if traffic_capture and traffic_capture.sampled() else None
+
+    # Exact duplicates reuse the stored stage outputs; correlation ID and timestamp are always fresh
+    cache_key = enrichment_cache.key_for(payload) if enrichment_cache else None
+    if cache_key:
+        stages = await enrichment_cache.get(cache_key)
+        if stages:
+            alert = _from_cache(payload, correlation_id, stages)
+            ENRICHMENTS.labels(alert.degradation_tier, "true").inc()
+            logger.info(f"Enrichment served from cache. Risk: {alert.risk.level} ({alert.risk.score:.2f})", extra={"correlation_id": correlation_id})
+            if capture:
+                results = {"ingest": alert.normalized, "semantic": alert.semantic, "intent": alert.intent, "mitre": alert.mitre}
+                capture.record(payload, correlation_id, results, {}, _elapsed_ms(started), cached=True)
+            return alert, {}
+
+    # Under load, trade enrichment depth for latency (see degradation.TIERS)
+    tier = degradation.evaluate() if degradation else 0
+    graph = build_stage_graph(tier=tier)
+    if deadline is None:
+        deadline = Deadline.from_header(None, settings.ORCHESTRATOR_REQUEST_BUDGET)
+    ctx = PipelineContext(correlation_id=correlation_id, payload=payload, deadline=deadline, tier=tier)
+    if normalized:
+        ctx.results["ingest"] = normalized
+    alert = None
+    try:
+        ctx = await graph.execute(ctx)
+        decision = ctx.results.get("suppress")
+        if decision and decision.first:
+            alert = _suppressed_alert(payload, correlation_id, ctx.results["ingest"], decision.first, decision.repeat_count)
+            logger.info(
+                f"Suppressed as repeat {decision.repeat_count} of alert {decision.first.correlation_id}",
+                extra={"correlation_id": correlation_id}
+            )
+            if capture:
+                # Recorded like a cache hit: replays as the enrichment it was counted onto
+                results = {"ingest": alert.normalized, "semantic": alert.semantic, "intent": alert.intent, "mitre": alert.mitre}
+                capture.record(payload, correlation_id, results, ctx.timings, _elapsed_ms(started), tier=tier, cached=True)
+            return alert, ctx.timings
+        alert, timings = await _finish_enrichment(payload, correlation_id, graph, ctx, tier, cache_key, capture, started)
+        return alert, timings
+    finally:
+        # Repeats waiting on this event's alert get it (see StormSuppressor.publish for alerts
+        # with errors); a degraded tier is kept on the copies
+        decision = ctx.results.get("suppress")
+        if decision and decision.leader:
+            storm_suppressor.publish(decision, alert)
+
+
+async def _finish_enrichment(
+    payload: RawLogRequest,
+    correlation_id: str,
+    graph: StageGraph,
+    ctx: PipelineContext,
+    tier: int,
+    cache_key: Optional[str],
+    capture,
+    started: float,
+) -> Tuple[EnrichedAlert, Dict[str, float]]:
+    if capture:
+        capture.record(payload, correlation_id, ctx.results, ctx.timings, _elapsed_ms(started), tier=tier)
+
+    normalized = ctx.results.get("ingest")
+    if not normalized:
+        logger.error("Ingestion failed. Aborting enrichment.", extra={"correlation_id": correlation_id})
+        raise IngestionFailedError("Log Ingestion service failed or returned invalid data.")
+
+    semantic = ctx.results.get("semantic")
+    intent = ctx.results.get("intent")
+    mitre = ctx.results.get("mitre_recheck", ctx.results.get("mitre"))
+    errors = graph.ordered_errors(ctx)
+    if tier:
+        errors.append(TIER_NOTES[tier])
+    if degradation:
+        degradation.record(tier)
+
+    alert = build_alert(payload, correlation_id, normalized, semantic, intent, mitre, errors, tier=tier)
+    ENRICHMENTS.labels(alert.degradation_tier, "false").inc()
+
+    # Only complete, error-free, full-tier enrichments are worth replaying
+    if cache_key and not errors and not tier:
+        await enrichment_cache.put(cache_key, {
+            "normalized": normalized.model_dump(mode="json"),
+            "semantic": semantic.model_dump(mode="json") if semantic else None,
+            "intent": intent.model_dump(mode="json") if intent else None,
+            "mitre": mitre.model_dump(mode="json") if mitre else None,
+        })
+
+    timings = " ".join(f"{name}={ms:.0f}ms" for name, ms in ctx.timings.items())
+    logger.info(f"Enrichment complete. Risk: {alert.risk.level} ({alert.risk.score:.2f}). Stage timings: {timings}", extra={"correlation_id": correlation_id})
+    return alert, ctx.timings
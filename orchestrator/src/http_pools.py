@@ -0,0 +1,320 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from opentelemetry import trace, propagate
+
+from .config import settings, SERVICE_PREFIXES
+from .deadline import DEADLINE_HEADER
+from .concurrency import AdaptiveLimiter
+from .logger import logger
+from .metrics import DOWNSTREAM_LATENCY
+from .tracing import tracer
+
+
+class Endpoint:
+    """One replica of a downstream service and its routing state."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.healthy = True              # last active health check result
+        self.ejected_until = 0.0         # monotonic time until which passive ejection lasts
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "available": self.available(now),
+            "healthy": self.healthy,
+            "ejected_for_s": round(max(0.0, self.ejected_until - now), 1),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejections": self.ejections,
+        }
+
+
+class ServiceClient:
+    """
+    Dedicated HTTP connection pool for one downstream service, with its own limits,
+    keep-alive, HTTP/2 and timeout settings, plus pool saturation counters.
+    The service may have several replicas; each request goes to one of the available
+    ones (power of two choices or least outstanding requests). Replicas that fail
+    repeatedly, or fail their health check, stop receiving traffic until they recover.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_urls: List[str],
+        max_connections: int,
+        max_keepalive: int,
+        keepalive_expiry: float,
+        http2: bool,
+        connect_timeout: float,
+        read_timeout: float,
+        total_timeout: float,
+        pool_timeout: float,
+        health_path: str = "/health",
+        lb_policy: str = "p2c",
+        eject_after_failures: int = 3,
+        eject_seconds: float = 30.0,
+        limiter: Optional[AdaptiveLimiter] = None,
+    ):
+        if not base_urls:
+            raise ValueError(f"No URL configured for service '{name}'")
+        self.name = name
+        self.endpoints = [Endpoint(url) for url in base_urls]
+        self.max_connections = max_connections
+        self.total_timeout = total_timeout
+        self.health_path = health_path
+        self.lb_policy = lb_policy
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self.limiter = limiter
+        # One pool shared by all replicas; max_connections bounds the service as a whole
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=connect_timeout,
+                read=read_timeout,
+                write=read_timeout,
+                pool=pool_timeout,
+            ),
+        )
+        self._health_task: Optional[asyncio.Task] = None
+
+        self.in_flight = 0
+        # Smoothed end-to-end latency of recent calls (seconds), including timeouts
+        self.avg_latency: Optional[float] = None
+        self.last_completed_at: Optional[float] = None
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "peak_in_flight": 0,
+            "saturated_requests": 0,   # requests that had to queue for a connection
+            "peak_waiting": 0,
+            "pool_timeouts": 0,
+            "total_timeouts": 0,
+            "no_available_replica": 0,  # requests sent while every replica was out of rotation
+        }
+
+    def pick_endpoint(self) -> Endpoint:
+        if len(self.endpoints) == 1:
+            return self.endpoints[0]
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints if e.available(now)]
+        if not candidates:
+            # Every replica looks down: keep trying all of them rather than failing outright
+            self._stats["no_available_replica"] += 1
+            candidates = self.endpoints
+        if self.lb_policy == "least_outstanding" or len(candidates) <= 2:
+            return min(candidates, key=lambda e: (e.in_flight, random.random()))
+        first, second = random.sample(candidates, 2)
+        return first if first.in_flight <= second.in_flight else second
+
+    def _record_result(self, endpoint: Endpoint, ok: bool):
+        if ok:
+            endpoint.consecutive_failures = 0
+            return
+        endpoint.errors += 1
+        endpoint.consecutive_failures += 1
+        if len(self.endpoints) > 1 and endpoint.consecutive_failures >= self.eject_after_failures:
+            endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            endpoint.ejections += 1
+            endpoint.consecutive_failures = 0
+            logger.warning(f"Ejecting {self.name} replica {endpoint.url} for {self.eject_seconds:.0f}s after repeated failures")
+
+    async def post(
+        self,
+        path: str,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> httpx.Response:
+        """
+        POST to `path` on one replica of this service. The whole request (connect + pool wait
+        + transfer) is capped at the service total timeout, or at `timeout` when that is tighter.
+        The cap is forwarded in X-Deadline-Ms so the service can stop once we stop waiting.
+        With an adaptive limiter, time spent queued for a slot comes out of the same cap, and
+        ConcurrencyLimitExceeded is raised when no slot frees up.
+        """
+        # A tighter cap from the caller's deadline says nothing about the service when it runs out
+        caller_capped = timeout is not None and timeout < self.total_timeout
+        if timeout is None or timeout > self.total_timeout:
+            timeout = self.total_timeout
+        if self.limiter:
+            queued_at = time.monotonic()
+            await self.limiter.acquire(timeout)
+            timeout = max(0.001, timeout - (time.monotonic() - queued_at))
+        started = time.monotonic()
+        ok = False
+        # Outcome fed to the adaptive limiter; None returns the slot without a sample
+        congestion_sample: Optional[bool] = None
+        headers = {**(headers or {}), DEADLINE_HEADER: str(int(timeout * 1000))}
+        endpoint = self.pick_endpoint()
+        span = tracer.start_span(
+            f"POST {self.name}{path}",
+            kind=trace.SpanKind.CLIENT,
+            attributes={"peer.service": self.name, "http.url": f"{endpoint.url}{path}", "timeout_ms": int(timeout * 1000)},
+        )
+        # traceparent: the service's spans become children of this one
+        propagate.inject(headers, context=trace.set_span_in_context(span))
+
+        self.in_flight += 1
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        self._stats["requests"] += 1
+        self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self.in_flight)
+        waiting = self.in_flight - self.max_connections
+        if waiting > 0:
+            self._stats["saturated_requests"] += 1
+            self._stats["peak_waiting"] = max(self._stats["peak_waiting"], waiting)
+
+        try:
+            response = await asyncio.wait_for(
+                self.client.post(f"{endpoint.url}{path}", json=json, headers=headers, params=params),
+                timeout=timeout,
+            )
+            # 5xx and 429 mean the service is struggling (lowers the concurrency limit).
+            # For ejection, 4xx is the caller's problem and 504 means the replica
+            # honoured our deadline, which says nothing about its health
+            ok = response.status_code < 500 and response.status_code != 429
+            self._record_result(endpoint, ok or response.status_code == 504)
+            if response.status_code != 504:
+                congestion_sample = ok
+            span.set_attribute("http.status_code", response.status_code)
+            return response
+        except httpx.PoolTimeout:
+            # Our own pool is exhausted; says nothing about the replica
+            self._stats["errors"] += 1
+            self._stats["pool_timeouts"] += 1
+            congestion_sample = False
+            raise
+        except asyncio.TimeoutError:
+            self._stats["errors"] += 1
+            self._stats["total_timeouts"] += 1
+            self._record_result(endpoint, False)
+            if not caller_capped:
+                congestion_sample = False
+            raise httpx.TimeoutException(
+                f"{self.name} request to {endpoint.url}{path} exceeded {timeout:.2f}s"
+            ) from None
+        except Exception as e:
+            self._stats["errors"] += 1
+            self._record_result(endpoint, False)
+            congestion_sample = False
+            span.record_exception(e)
+            raise
+        finally:
+            latency = time.monotonic() - started
+            if not ok:
+                span.set_status(trace.StatusCode.ERROR)
+            span.end()
+            self.in_flight -= 1
+            endpoint.in_flight -= 1
+            self.avg_latency = latency if self.avg_latency is None else self.avg_latency + 0.1 * (latency - self.avg_latency)
+            self.last_completed_at = time.monotonic()
+            DOWNSTREAM_LATENCY.labels(self.name, "ok" if ok else "error").observe(latency)
+            if self.limiter:
+                # Cancelled calls, caller-capped timeouts and deadline 504s leave congestion_sample unset
+                self.limiter.release(latency, congestion_sample)
+
+    async def check_health(self):
+        """
+        Probes every replica once; a failed probe takes it out of rotation until one succeeds.
+        A passing probe does not end a passive ejection early: a replica can answer /health
+        while failing real requests.
+        """
+        async def probe(endpoint: Endpoint):
+            try:
+                response = await self.client.get(
+                    f"{endpoint.url}{self.health_path}",
+                    timeout=settings.ORCHESTRATOR_HEALTH_CHECK_TIMEOUT,
+                )
+                healthy = response.status_code == 200
+            except Exception:
+                healthy = False
+            if healthy != endpoint.healthy:
+                logger.info(f"{self.name} replica {endpoint.url} is now {'healthy' if healthy else 'unhealthy'}")
+            endpoint.healthy = healthy
+
+        await asyncio.gather(*(probe(e) for e in self.endpoints))
+
+    async def _health_loop(self, interval: float):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(interval)
+
+    def start_health_checks(self, interval: float):
+        # A lone replica gets all traffic whatever its health, so only probe real pools
+        if interval > 0 and len(self.endpoints) > 1 and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop(interval))
+
+    def url(self, path: str) -> str:
+        if len(self.endpoints) == 1:
+            return f"{self.endpoints[0].url}{path}"
+        return f"{self.name}{path} ({len(self.endpoints)} replicas)"
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "utilization": round(self.in_flight / self.max_connections, 3) if self.max_connections else None,
+            "avg_latency_ms": round(self.avg_latency * 1000, 1) if self.avg_latency is not None else None,
+            **self._stats,
+            "limiter": self.limiter.stats() if self.limiter else None,
+            "replicas": [e.stats(now) for e in self.endpoints],
+        }
+
+    async def aclose(self):
+        if self._health_task:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        await self.client.aclose()
+
+
+# One pool per downstream service
+def _build_client(name: str) -> ServiceClient:
+    limiter_settings = settings.service_limiter(name)
+    return ServiceClient(
+        name=name,
+        lb_policy=settings.ORCHESTRATOR_LB_POLICY,
+        eject_after_failures=settings.ORCHESTRATOR_EJECT_AFTER_FAILURES,
+        eject_seconds=settings.ORCHESTRATOR_EJECT_SECONDS,
+        limiter=AdaptiveLimiter(name, **limiter_settings) if limiter_settings else None,
+        **settings.service_pool(name),
+    )
+
+
+service_clients: Dict[str, ServiceClient] = {name: _build_client(name) for name in SERVICE_PREFIXES}
+
+
+def pool_stats() -> Dict[str, Any]:
+    return {name: client.stats() for name, client in service_clients.items()}
+
+
+def start_health_checks():
+    for client in service_clients.values():
+        client.start_health_checks(settings.ORCHESTRATOR_HEALTH_CHECK_INTERVAL)
+
+
+async def close_all():
+    await asyncio.gather(*(client.aclose() for client in service_clients.values()))
@@ -0,0 +1,322 @@
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from .models import RawLogRequest, EnrichedAlert, JobStatus
+from .config import settings
+from .logger import logger
+from .enrichment import enrich, IngestionFailedError
+
+JOB_STATES = ("queued", "running", "done", "failed")
+
+
+class JobQueueFull(Exception):
+    """Raised when accepting more events would exceed ORCHESTRATOR_JOBS_MAX_QUEUED."""
+
+
+class JobQueue:
+    """
+    Durable FIFO of enrichment jobs in SQLite (WAL). A job is committed before its ID is
+    returned, so accepted events survive a crash or redeploy: jobs that were running when
+    the process stopped are put back in the queue on startup. Finished jobs keep their
+    result for `retention_seconds` so callers can collect it.
+    """
+
+    def __init__(self, path: str, max_queued: int, max_attempts: int, retention_seconds: float):
+        self.path = path
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        # Job ID -> event set when the job finishes (for long-polling callers)
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "retried": 0, "recovered": 0, "rejected_full": 0}
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # FULL: an acknowledged job must still be there after a power loss, not just a process exit
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, seq INTEGER NOT NULL, status TEXT NOT NULL, payload TEXT NOT NULL,"
+            " result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_seq ON jobs(status, seq)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(finished_at)")
+        # Kept in memory (this process owns the queue) so depth() never touches SQLite
+        self._queued = self._count("queued")
+
+    def recover(self) -> int:
+        """
+        Re-queues jobs left running by a previous process and returns how many. Jobs that had
+        already used all their attempts are failed instead, so an event that brings the process
+        down cannot be retried forever.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                failed = self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE status = 'running' AND attempts >= ?",
+                    (f"Interrupted by a shutdown after {self.max_attempts} attempts", now, self.max_attempts),
+                ).rowcount
+                recovered = self._db.execute(
+                    "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+                ).rowcount
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._stats["failed"] += failed
+            self._stats["recovered"] += recovered
+            self._queued += recovered
+        if failed:
+            logger.warning(f"Failed {failed} interrupted jobs that had no attempts left")
+        return recovered
+
+    # The methods below are called from request handlers and workers. Their SQLite work
+    # (FULL-synchronous commits included) runs in a worker thread via asyncio.to_thread,
+    # so an fsync never stalls the event loop.
+
+    async def submit(self, payloads: List[RawLogRequest]) -> List[str]:
+        """Stores the events as queued jobs in one transaction and returns their IDs."""
+        return await asyncio.to_thread(self._submit, payloads)
+
+    def _submit(self, payloads: List[RawLogRequest]) -> List[str]:
+        now = time.time()
+        with self._lock:
+            if self._queued + len(payloads) > self.max_queued:
+                self._stats["rejected_full"] += len(payloads)
+                raise JobQueueFull(f"Job queue full ({self._queued} queued, limit {self.max_queued})")
+            (seq,) = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM jobs").fetchone()
+            ids = [str(uuid.uuid4()) for _ in payloads]
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT INTO jobs (id, seq, status, payload, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                    [
+                        (job_id, seq + i + 1, payload.model_dump_json(by_alias=True), now)
+                        for i, (job_id, payload) in enumerate(zip(ids, payloads))
+                    ],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._stats["submitted"] += len(ids)
+            self._queued += len(ids)
+            return ids
+
+    async def claim(self) -> Optional[tuple]:
+        """Marks the oldest queued job as running and returns (job_id, payload), or None."""
+        return await asyncio.to_thread(self._claim)
+
+    def _claim(self) -> Optional[tuple]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, payload FROM jobs WHERE status = 'queued' ORDER BY seq LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (time.time(), row[0]),
+            )
+            self._queued -= 1
+            return row[0], RawLogRequest.model_validate(json.loads(row[1]))
+
+    async def complete(self, job_id: str, alert: EnrichedAlert):
+        await asyncio.to_thread(self._finish, job_id, "done", result=alert.model_dump_json())
+        self._stats["completed"] += 1
+        self._notify(job_id)
+
+    async def fail(self, job_id: str, error: str, retry: bool = False):
+        """Fails the job, or puts it back in the queue if `retry` and attempts remain."""
+        if retry and await asyncio.to_thread(self._retry, job_id, error):
+            self._stats["retried"] += 1
+            return
+        await asyncio.to_thread(self._finish, job_id, "failed", error=error)
+        self._stats["failed"] += 1
+        self._notify(job_id)
+
+    def _retry(self, job_id: str, error: str) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, error = ? WHERE id = ? AND attempts < ?",
+                (error, job_id, self.max_attempts),
+            )
+            self._queued += cursor.rowcount
+            return cursor.rowcount > 0
+
+    async def release(self, job_id: str):
+        """Puts a running job back at its place in the queue without counting the attempt."""
+        await asyncio.to_thread(self._release, job_id)
+
+    def _release(self, job_id: str):
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, attempts = attempts - 1 WHERE id = ?", (job_id,)
+            )
+            self._queued += cursor.rowcount
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, result, error, now, job_id),
+            )
+            if now - self._last_prune > 60:
+                self._db.execute("DELETE FROM jobs WHERE finished_at < ?", (now - self.retention_seconds,))
+                self._last_prune = now
+
+    def _notify(self, job_id: str):
+        event = self._finished.pop(job_id, None)
+        if event:
+            event.set()
+
+    async def get(self, job_id: str) -> Optional[JobStatus]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    def _get(self, job_id: str) -> Optional[JobStatus]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, status, result, error, attempts, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, status, result, error, attempts, created_at, started_at, finished_at = row
+        return JobStatus(
+            job_id=job_id,
+            status=status,
+            attempts=attempts,
+            created_at=created_at,
+            started_at=started_at,
+            finished_at=finished_at,
+            alert=EnrichedAlert.model_validate_json(result) if result else None,
+            error=error,
+        )
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[JobStatus]:
+        """Current state of the job, waiting up to `timeout` seconds for it to finish."""
+        job = await self.get(job_id)
+        if job is None or job.status in ("done", "failed") or timeout <= 0:
+            return job
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return await self.get(job_id)
+
+    def depth(self) -> int:
+        """Jobs waiting to be picked up."""
+        return self._queued
+
+    def _count(self, status: str) -> int:
+        (count,) = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()
+        return count
+
+    async def stats(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._read_stats)
+
+    def _read_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            (oldest,) = self._db.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()
+            (avg_wait,) = self._db.execute(
+                "SELECT AVG(started_at - created_at) FROM jobs WHERE started_at IS NOT NULL AND finished_at > ?",
+                (now - 300,),
+            ).fetchone()
+        return {
+            **{state: counts.get(state, 0) for state in JOB_STATES},
+            "oldest_queued_age_s": round(now - oldest, 1) if oldest is not None else None,
+            "avg_queue_wait_ms_5m": round(avg_wait * 1000, 1) if avg_wait is not None else None,
+            "max_queued": self.max_queued,
+            # Counters since this process started (the state counts above are the whole store)
+            "since_start": dict(self._stats),
+        }
+
+    def close(self):
+        self._db.close()
+
+
+class JobWorkers:
+    """Pool of `concurrency` tasks that drain the job queue through the enrichment pipeline."""
+
+    def __init__(self, queue: JobQueue, concurrency: int, poll_interval: float = 1.0):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._work_available: Optional[asyncio.Event] = None
+
+    def start(self):
+        self._work_available = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run(i)) for i in range(self.concurrency)]
+
+    def notify(self):
+        """Wakes idle workers after new jobs were submitted."""
+        if self._work_available:
+            self._work_available.set()
+
+    async def _run(self, worker_id: int):
+        while True:
+            # Cleared before claiming, so a notify() that lands while claim() runs is not lost
+            self._work_available.clear()
+            claimed = await self.queue.claim()
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._work_available.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job_id, payload = claimed
+            try:
+                alert = await enrich(payload, job_id)
+            except asyncio.CancelledError:
+                # Shutting down: leave the job for the next process
+                await self.queue.release(job_id)
+                raise
+            except IngestionFailedError as e:
+                await self.queue.fail(job_id, str(e))
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} failed: {e}", extra={"correlation_id": job_id})
+                await self.queue.fail(job_id, f"Enrichment failed: {e}", retry=True)
+            else:
+                await self.queue.complete(job_id, alert)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+def _build_job_queue() -> Optional[JobQueue]:
+    if not settings.ORCHESTRATOR_JOBS_ENABLED:
+        return None
+    try:
+        return JobQueue(
+            path=settings.ORCHESTRATOR_JOBS_PATH or ":memory:",
+            max_queued=settings.ORCHESTRATOR_JOBS_MAX_QUEUED,
+            max_attempts=settings.ORCHESTRATOR_JOBS_MAX_ATTEMPTS,
+            retention_seconds=settings.ORCHESTRATOR_JOBS_RETENTION,
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Could not open job queue at {settings.ORCHESTRATOR_JOBS_PATH}: {e}. Job API disabled.")
+        return None
+
+
+# Shared queue and its workers (None when the job API is disabled)
+job_queue = _build_job_queue()
+job_workers = JobWorkers(job_queue, max(1, settings.ORCHESTRATOR_JOBS_WORKERS)) if job_queue else None
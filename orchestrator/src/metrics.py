@@ -0,0 +1,85 @@
+"""
+Prometheus metrics, exported on GET /metrics.
+
+Every service carries its own copy of the request instrumentation (instrument_app) and
+namespaces its metrics with the service name, so services loaded in-process (see
+ORCHESTRATOR_LOCAL_STAGES) export side by side without clashing.
+"""
+import time
+from typing import Callable, Dict, List
+
+from fastapi import FastAPI, Request, Response
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+NAMESPACE = "orchestrator"
+# Seconds; covers cached hits (ms) up to LLM-bound enrichments near the request budget
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled, by route and status code.",
+    ["method", "route", "status"], namespace=NAMESPACE,
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.",
+    ["method", "route"], namespace=NAMESPACE, buckets=LATENCY_BUCKETS,
+)
+
+STAGE_DURATION = Histogram(
+    "stage_duration_seconds", "Pipeline stage duration; outcome is ok, failed or skipped.",
+    ["stage", "outcome"], namespace=NAMESPACE, buckets=LATENCY_BUCKETS,
+)
+DOWNSTREAM_LATENCY = Histogram(
+    "downstream_request_duration_seconds", "Latency of calls to downstream services; outcome is ok or error.",
+    ["service", "outcome"], namespace=NAMESPACE, buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Enrichment cache lookups; result is hit or miss.",
+    ["result"], namespace=NAMESPACE,
+)
+ENRICHMENTS = Counter(
+    "enrichments_total", "Completed enrichments by degradation tier and cache use.",
+    ["tier", "cached"], namespace=NAMESPACE,
+)
+SUPPRESSION_CHECKS = Counter(
+    "suppression_checks_total", "Storm suppression decisions; result is passed, suppressed, released, promoted or unkeyed.",
+    ["result"], namespace=NAMESPACE,
+)
+
+
+def track_gauge(name: str, description: str, read: Callable[[], float]):
+    """Gauge whose value is read from `read()` at scrape time."""
+    gauge = Gauge(name, description, namespace=NAMESPACE)
+    gauge.set_function(read)
+    return gauge
+
+
+def track_labelled_gauge(name: str, description: str, labelnames: List[str], reads: Dict[tuple, Callable[[], float]]):
+    """Labelled gauge; each label set's value is read from its own callable at scrape time."""
+    gauge = Gauge(name, description, labelnames, namespace=NAMESPACE)
+    for labels, read in reads.items():
+        gauge.labels(*labels).set_function(read)
+    return gauge
+
+
+def instrument_app(app: FastAPI):
+    """Records count and latency of every request by route template, and serves /metrics."""
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # The route template (not the raw path) keeps label cardinality bounded
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            if path != "/metrics":
+                HTTP_REQUESTS.labels(request.method, path, str(status)).inc()
+                HTTP_LATENCY.labels(request.method, path).observe(time.perf_counter() - start)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
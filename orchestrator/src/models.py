@@ -53,6 +53,14 @@ class RiskScore(BaseModel):
 
 class EnrichedAlert(BaseModel):
     correlation_id: str
+    enriched_at: datetime = Field(default_factory=datetime.utcnow, description="When this alert was produced.")
+    cached: bool = Field(False, description="True when the stage outputs were served from the duplicate cache.")
+    degradation_tier: str = Field("full", description="Enrichment tier used: full, mitre_retrieval_only, rules_only_intent or normalize_and_score.")
+    suppressed_into: Optional[str] = Field(
+        None,
+        description="Set when this event repeated an earlier one within the storm-suppression window: correlation ID of the alert it was counted onto, whose enrichment it carries."
+    )
+    repeat_count: int = Field(0, description="On a suppressed alert, repeats counted onto the first alert of the window so far, this one included.")
     raw_log: str
     source: str
     event_type: Optional[str] = None
@@ -77,3 +85,56 @@ class EnrichedAlert(BaseModel):
         default_factory=list,
         description="Non-fatal errors encountered while calling downstream services."
     )
+
+    timings_ms: Optional[Dict[str, float]] = Field(
+        None,
+        description="Per-stage wall time plus 'total', when timings were requested."
+    )
+    trace_id: Optional[str] = Field(
+        None,
+        description="Trace holding this enrichment's spans, when tracing is enabled."
+    )
+
+# --- Bulk ---
+class BulkItemResult(BaseModel):
+    index: int = Field(..., description="Position of the event in the request body.")
+    alert: Optional[EnrichedAlert] = None
+    error: Optional[str] = None
+
+class BulkEnrichmentResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult] = Field(default_factory=list, description="Per-item results in input order.")
+
+# --- Async jobs ---
+class JobSubmission(BaseModel):
+    index: int = Field(..., description="Position of the event in the request body.")
+    job_id: Optional[str] = None
+    error: Optional[str] = Field(None, description="Why the event was not accepted.")
+
+class JobSubmitResponse(BaseModel):
+    accepted: int
+    rejected: int
+    jobs: List[JobSubmission] = Field(default_factory=list, description="Per-item job IDs in input order.")
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int = 0
+    created_at: float = Field(..., description="Unix time the job was accepted.")
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    alert: Optional[EnrichedAlert] = None
+    error: Optional[str] = None
+
+# --- Streaming ---
+class StreamSubmission(BaseModel):
+    index: int = Field(..., description="Position of the event in the request body.")
+    correlation_id: Optional[str] = None
+    error: Optional[str] = Field(None, description="Why the event was not accepted.")
+
+class StreamSubmitResponse(BaseModel):
+    accepted: int
+    rejected: int
+    events: List[StreamSubmission] = Field(default_factory=list, description="Per-item correlation IDs in input order.")
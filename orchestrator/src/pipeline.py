@@ -0,0 +1,116 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .logger import logger
+from .deadline import Deadline
+from .metrics import STAGE_DURATION
+from .tracing import tracer
+
+
+@dataclass
+class PipelineContext:
+    """Mutable state shared by all stages of one enrichment run."""
+    correlation_id: str
+    payload: Any
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, List[str]] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    deadline: Optional[Deadline] = None
+    # Seconds each stage may spend on its downstream call (only set when there is a deadline)
+    budgets: Dict[str, float] = field(default_factory=dict)
+    # Degradation tier index (0 = full enrichment, see degradation.TIERS)
+    tier: int = 0
+
+    def add_error(self, stage: str, message: str):
+        self.errors.setdefault(stage, []).append(message)
+
+
+StageFn = Callable[[PipelineContext], Awaitable[Any]]
+
+
+@dataclass
+class Stage:
+    name: str
+    run: StageFn
+    deps: List[str] = field(default_factory=list)
+    # Relative share of the request deadline this stage gets
+    weight: float = 1.0
+
+
+class StageGraph:
+    """
+    Declarative stage DAG. Every stage starts as soon as all of its dependencies
+    have finished, so independent stages run concurrently and end-to-end latency
+    follows the longest path instead of the sum of all hops.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        names = {s.name for s in stages}
+        for stage in stages:
+            missing = [d for d in stage.deps if d not in names]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages {missing}")
+        self.stages = stages
+        self._check_acyclic()
+        self._downstream = {s.name: self._downstream_weight(s.name) for s in stages}
+
+    def _check_acyclic(self):
+        deps = {s.name: set(s.deps) for s in self.stages}
+        resolved = set()
+        while deps:
+            ready = [name for name, d in deps.items() if d <= resolved]
+            if not ready:
+                raise ValueError(f"Stage graph has a cycle between {sorted(deps)}")
+            for name in ready:
+                resolved.add(name)
+                del deps[name]
+
+    def _downstream_weight(self, name: str) -> float:
+        """Weight of the heaviest chain of stages that still has to run after `name`."""
+        dependents = [s for s in self.stages if name in s.deps]
+        return max((s.weight + self._downstream_weight(s.name) for s in dependents), default=0.0)
+
+    async def execute(self, ctx: PipelineContext) -> PipelineContext:
+        finished = {s.name: asyncio.Event() for s in self.stages}
+
+        async def run_stage(stage: Stage):
+            for dep in stage.deps:
+                await finished[dep].wait()
+            start = time.perf_counter()
+            outcome = "failed"
+            with tracer.start_as_current_span(f"stage.{stage.name}") as span:
+                try:
+                    if ctx.deadline:
+                        if ctx.deadline.expired():
+                            ctx.results[stage.name] = None
+                            ctx.add_error(stage.name, f"Skipped stage '{stage.name}' (request deadline exceeded)")
+                            outcome = "skipped"
+                            return
+                        # Leave enough of the budget for the stages that come after this one
+                        ctx.budgets[stage.name] = ctx.deadline.share(stage.weight, self._downstream[stage.name])
+                    ctx.results[stage.name] = await stage.run(ctx)
+                    if ctx.results[stage.name] is not None:
+                        outcome = "ok"
+                except Exception as e:
+                    # Stages are expected to handle their own failures; never let one stall the graph
+                    logger.error(f"Stage '{stage.name}' raised: {e}", extra={"correlation_id": ctx.correlation_id})
+                    ctx.results[stage.name] = None
+                    ctx.add_error(stage.name, f"Stage '{stage.name}' failed unexpectedly")
+                finally:
+                    elapsed = time.perf_counter() - start
+                    ctx.timings[stage.name] = round(elapsed * 1000, 2)
+                    STAGE_DURATION.labels(stage.name, outcome).observe(elapsed)
+                    span.set_attribute("outcome", outcome)
+                    finished[stage.name].set()
+
+        await asyncio.gather(*(run_stage(s) for s in self.stages))
+        return ctx
+
+    def ordered_errors(self, ctx: PipelineContext) -> List[str]:
+        """Errors flattened in declaration order so output is stable regardless of timing."""
+        errors = []
+        for stage in self.stages:
+            errors.extend(ctx.errors.get(stage.name, []))
+        return errors
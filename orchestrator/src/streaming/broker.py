@@ -0,0 +1,247 @@
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+
+from ..config import settings
+
+
+@dataclass
+class Delivery:
+    """One message handed to a consumer. It stays leased until acked or nacked."""
+    id: str
+    body: Dict[str, Any]
+    attempts: int
+
+
+class Broker(ABC):
+    """
+    Minimal at-least-once topic queue. Consumers receive batches of leased messages and
+    must ack them once processed; nacked (or, for durable brokers, expired) leases are
+    delivered again.
+    """
+
+    @abstractmethod
+    async def publish(self, topic: str, bodies: List[Dict[str, Any]]):
+        ...
+
+    @abstractmethod
+    async def consume(self, topic: str, max_batch: int, max_wait: float) -> List[Delivery]:
+        """
+        Waits up to `max_wait` seconds for a first message, then returns at most `max_batch`
+        messages without waiting further. Returns [] when nothing arrived.
+        """
+
+    @abstractmethod
+    async def ack(self, topic: str, ids: List[str]):
+        ...
+
+    @abstractmethod
+    async def nack(self, topic: str, ids: List[str]):
+        ...
+
+    @abstractmethod
+    async def depth(self, topic: str) -> int:
+        """Messages waiting in the topic (not counting leased ones)."""
+
+    async def close(self):
+        pass
+
+
+class InMemoryBroker(Broker):
+    """asyncio queues inside one process. Nothing survives a restart."""
+
+    def __init__(self):
+        self._ready: Dict[str, Deque[Delivery]] = {}
+        self._leased: Dict[str, Dict[str, Delivery]] = {}
+        self._available: Dict[str, asyncio.Event] = {}
+
+    def _topic(self, topic: str):
+        if topic not in self._ready:
+            self._ready[topic] = deque()
+            self._leased[topic] = {}
+            self._available[topic] = asyncio.Event()
+        return self._ready[topic], self._leased[topic], self._available[topic]
+
+    async def publish(self, topic: str, bodies: List[Dict[str, Any]]):
+        ready, _, available = self._topic(topic)
+        ready.extend(Delivery(id=str(uuid.uuid4()), body=body, attempts=0) for body in bodies)
+        if bodies:
+            available.set()
+
+    async def consume(self, topic: str, max_batch: int, max_wait: float) -> List[Delivery]:
+        ready, leased, available = self._topic(topic)
+        if not ready:
+            available.clear()
+            try:
+                await asyncio.wait_for(available.wait(), max_wait)
+            except asyncio.TimeoutError:
+                return []
+        batch = []
+        while ready and len(batch) < max_batch:
+            delivery = ready.popleft()
+            delivery.attempts += 1
+            leased[delivery.id] = delivery
+            batch.append(delivery)
+        return batch
+
+    async def ack(self, topic: str, ids: List[str]):
+        _, leased, _ = self._topic(topic)
+        for message_id in ids:
+            leased.pop(message_id, None)
+
+    async def nack(self, topic: str, ids: List[str]):
+        ready, leased, available = self._topic(topic)
+        for message_id in ids:
+            delivery = leased.pop(message_id, None)
+            if delivery:
+                ready.appendleft(delivery)
+        available.set()
+
+    async def depth(self, topic: str) -> int:
+        return len(self._topic(topic)[0])
+
+
+class SqliteBroker(Broker):
+    """
+    Topics in one SQLite file (WAL), shared by any number of worker processes on the host.
+    A consumed message is leased for `visibility_timeout` seconds; if its worker dies before
+    acking, the lease expires and another worker picks it up.
+    """
+
+    def __init__(self, path: str, visibility_timeout: float, poll_interval: float = 0.1, max_poll_interval: float = 1.0):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._lock = threading.Lock()
+        # Polling slows down (up to max_poll_interval) while a topic stays empty; a publish from
+        # this process wakes its consumers straight away
+        self._poll: Dict[str, float] = {}
+        self._published: Dict[str, asyncio.Event] = {}
+
+        # Other processes hold write locks briefly; wait for them instead of failing
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS stream_messages ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE, topic TEXT NOT NULL,"
+            " body TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, leased_until REAL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_stream_topic ON stream_messages(topic, leased_until, seq)")
+
+    def _event(self, topic: str) -> asyncio.Event:
+        if topic not in self._published:
+            self._published[topic] = asyncio.Event()
+        return self._published[topic]
+
+    # The blocking SQLite calls below run in worker threads (asyncio.to_thread): a busy write
+    # lock held by another process must not stall the event loop
+
+    def _insert(self, topic: str, bodies: List[Dict[str, Any]]):
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT INTO stream_messages (id, topic, body, created_at) VALUES (?, ?, ?, ?)",
+                    [(str(uuid.uuid4()), topic, json.dumps(body, default=str), now) for body in bodies],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _lease(self, topic: str, max_batch: int) -> List[Delivery]:
+        now = time.time()
+        with self._lock:
+            # Plain (WAL) read first, so idle consumers never take the write lock just to find nothing
+            if self._db.execute(
+                "SELECT 1 FROM stream_messages"
+                " WHERE topic = ? AND (leased_until IS NULL OR leased_until < ?) LIMIT 1",
+                (topic, now),
+            ).fetchone() is None:
+                return []
+            # IMMEDIATE takes the write lock up front, so two processes cannot lease the same rows
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT id, body, attempts FROM stream_messages"
+                    " WHERE topic = ? AND (leased_until IS NULL OR leased_until < ?) ORDER BY seq LIMIT ?",
+                    (topic, now, max_batch),
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE stream_messages SET leased_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    [(now + self.visibility_timeout, row[0]) for row in rows],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return [Delivery(id=row[0], body=json.loads(row[1]), attempts=row[2] + 1) for row in rows]
+
+    def _execute_many(self, sql: str, ids: List[str]):
+        with self._lock:
+            self._db.executemany(sql, [(i,) for i in ids])
+
+    def _count_ready(self, topic: str) -> int:
+        with self._lock:
+            (count,) = self._db.execute(
+                "SELECT COUNT(*) FROM stream_messages WHERE topic = ? AND (leased_until IS NULL OR leased_until < ?)",
+                (topic, time.time()),
+            ).fetchone()
+        return count
+
+    async def publish(self, topic: str, bodies: List[Dict[str, Any]]):
+        if not bodies:
+            return
+        await asyncio.to_thread(self._insert, topic, bodies)
+        self._poll[topic] = self.poll_interval
+        self._event(topic).set()
+
+    async def consume(self, topic: str, max_batch: int, max_wait: float) -> List[Delivery]:
+        give_up = time.monotonic() + max_wait
+        published = self._event(topic)
+        while True:
+            published.clear()
+            batch = await asyncio.to_thread(self._lease, topic, max_batch)
+            remaining = give_up - time.monotonic()
+            if batch or remaining <= 0:
+                if batch:
+                    self._poll[topic] = self.poll_interval
+                return batch
+            interval = self._poll.get(topic, self.poll_interval)
+            self._poll[topic] = min(interval * 2, self.max_poll_interval)
+            try:
+                await asyncio.wait_for(published.wait(), min(interval, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    async def ack(self, topic: str, ids: List[str]):
+        await asyncio.to_thread(self._execute_many, "DELETE FROM stream_messages WHERE id = ?", ids)
+
+    async def nack(self, topic: str, ids: List[str]):
+        await asyncio.to_thread(self._execute_many, "UPDATE stream_messages SET leased_until = NULL WHERE id = ?", ids)
+        self._event(topic).set()
+
+    async def depth(self, topic: str) -> int:
+        return await asyncio.to_thread(self._count_ready, topic)
+
+    async def close(self):
+        self._db.close()
+
+
+def build_broker(kind: Optional[str] = None) -> Broker:
+    kind = (kind or settings.ORCHESTRATOR_STREAMING_BROKER).lower()
+    if kind == "memory":
+        return InMemoryBroker()
+    if kind == "sqlite":
+        return SqliteBroker(settings.ORCHESTRATOR_STREAMING_PATH, settings.ORCHESTRATOR_STREAMING_VISIBILITY_TIMEOUT)
+    raise ValueError(f"Unknown ORCHESTRATOR_STREAMING_BROKER '{kind}', expected memory or sqlite")
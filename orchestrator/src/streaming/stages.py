@@ -0,0 +1,127 @@
+import time
+import uuid
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..models import RawLogRequest, NormalizedLog, SemanticResult, IntentResult, MitreResult
+from ..pipeline import PipelineContext
+from ..enrichment import ingest_stage, semantic_stage, intent_stage, mitre_stage, build_alert
+from ..clients.ingestion_client import call_log_ingestion_batch
+
+# Linear topology: each stage consumes its own topic and publishes to the next one.
+# MITRE runs after intent so it always gets the intent hint (no speculative re-check).
+STAGES = ["ingest", "semantic", "intent", "mitre", "finalize"]
+OUTPUT_TOPIC = "enrich.output"
+DEAD_LETTER_TOPIC = "enrich.dead_letter"
+
+RESULT_MODELS = {
+    "ingest": NormalizedLog,
+    "semantic": SemanticResult,
+    "intent": IntentResult,
+    "mitre": MitreResult,
+}
+
+
+def topic_for(stage: str) -> str:
+    return f"enrich.{stage}"
+
+
+def next_topic(stage: str) -> str:
+    index = STAGES.index(stage)
+    return topic_for(STAGES[index + 1]) if index + 1 < len(STAGES) else OUTPUT_TOPIC
+
+
+def new_message(payload: RawLogRequest, correlation_id: Optional[str] = None) -> Dict[str, Any]:
+    """Message body for a raw event entering the stream. Partial results accumulate in it."""
+    return {
+        "correlation_id": correlation_id or str(uuid.uuid4()),
+        "payload": payload.model_dump(mode="json", by_alias=True),
+        "results": {},
+        "errors": {},
+        "timings": {},
+        "submitted_at": time.time(),
+    }
+
+
+def to_context(body: Dict[str, Any]) -> PipelineContext:
+    ctx = PipelineContext(
+        correlation_id=body["correlation_id"],
+        payload=RawLogRequest.model_validate(body["payload"]),
+        errors={stage: list(messages) for stage, messages in body.get("errors", {}).items()},
+        timings=dict(body.get("timings", {})),
+    )
+    for stage, value in body.get("results", {}).items():
+        if value is not None:
+            ctx.results[stage] = RESULT_MODELS[stage].model_validate(value)
+    return ctx
+
+
+def to_body(ctx: PipelineContext, body: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **body,
+        "results": {
+            stage: value.model_dump(mode="json")
+            for stage, value in ctx.results.items()
+            if stage in RESULT_MODELS and value is not None
+        },
+        "errors": ctx.errors,
+        "timings": ctx.timings,
+    }
+
+
+async def _timed(ctx: PipelineContext, name: str, run: Callable[[PipelineContext], Awaitable[Any]]):
+    start = time.perf_counter()
+    try:
+        ctx.results[name] = await run(ctx)
+    finally:
+        ctx.timings[name] = (time.perf_counter() - start) * 1000
+
+
+# --- Batch handlers ---
+# Each one updates the contexts in place and returns, per message, None to pass it on
+# or an error that sends it to the dead-letter topic.
+
+async def handle_ingest(batch: List[PipelineContext]) -> List[Optional[str]]:
+    # One batch call to the ingestion service; anything it could not handle is retried one by one
+    start = time.perf_counter()
+    normalized = await call_log_ingestion_batch([ctx.payload for ctx in batch], batch[0].correlation_id)
+    elapsed = (time.perf_counter() - start) * 1000
+    for ctx, log in zip(batch, normalized or [None] * len(batch)):
+        if log:
+            ctx.results["ingest"] = log
+            ctx.timings["ingest"] = elapsed
+    await asyncio.gather(*(_timed(ctx, "ingest", ingest_stage) for ctx in batch if "ingest" not in ctx.results))
+    return [None if ctx.results.get("ingest") else "Log Ingestion service failed or returned invalid data." for ctx in batch]
+
+
+def _per_message(name: str, run: Callable[[PipelineContext], Awaitable[Any]]):
+    async def handle(batch: List[PipelineContext]) -> List[Optional[str]]:
+        # LLM-bound stages gain nothing from one big request; run the batch concurrently
+        await asyncio.gather(*(_timed(ctx, name, run) for ctx in batch))
+        return [None] * len(batch)
+    return handle
+
+
+async def handle_finalize(batch: List[PipelineContext]) -> List[Optional[str]]:
+    for ctx in batch:
+        alert = build_alert(
+            ctx.payload,
+            ctx.correlation_id,
+            ctx.results["ingest"],
+            ctx.results.get("semantic"),
+            ctx.results.get("intent"),
+            ctx.results.get("mitre"),
+            [message for stage in STAGES for message in ctx.errors.get(stage, [])],
+        )
+        # The worker publishes this (not the message) to OUTPUT_TOPIC
+        ctx.results["alert"] = alert
+    return [None] * len(batch)
+
+
+HANDLERS: Dict[str, Callable[[List[PipelineContext]], Awaitable[List[Optional[str]]]]] = {
+    "ingest": handle_ingest,
+    "semantic": _per_message("semantic", semantic_stage),
+    "intent": _per_message("intent", intent_stage),
+    "mitre": _per_message("mitre", mitre_stage),
+    "finalize": handle_finalize,
+}
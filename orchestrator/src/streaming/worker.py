@@ -0,0 +1,198 @@
+"""
+Stage workers for the streaming topology.
+
+Run one stage (or several) as its own process so each can be scaled to its event rate:
+
+    python -m src.streaming.worker --stage semantic --workers 8
+    python -m src.streaming.worker --stage ingest --stage finalize --batch-size 64
+
+Out-of-process workers need the SQLite broker (ORCHESTRATOR_STREAMING_BROKER=sqlite) and
+the same ORCHESTRATOR_STREAMING_PATH as the orchestrator.
+"""
+import time
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from ..logger import logger
+from ..deadline import parse_weights
+from ..http_pools import close_all
+from ..clients.local_stages import enable_local_stages
+from .broker import Broker, build_broker
+from .stages import STAGES, HANDLERS, DEAD_LETTER_TOPIC, topic_for, next_topic, to_context, to_body
+
+
+class StageWorker:
+    """
+    One consumer loop for one stage: takes a batch from the stage's topic, runs the stage
+    on it, publishes each message (now carrying this stage's result) to the next topic and
+    acks the batch. If the batch fails as a whole it is nacked and retried; after
+    `max_attempts` deliveries a message goes to the dead-letter topic instead.
+    """
+
+    def __init__(self, broker: Broker, stage: str, batch_size: int, batch_wait: float, max_attempts: int):
+        self.broker = broker
+        self.stage = stage
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_attempts = max_attempts
+        self.topic = topic_for(stage)
+        self.stats = {"batches": 0, "processed": 0, "dead_lettered": 0, "retried": 0, "broker_errors": 0, "busy_s": 0.0}
+
+    async def run(self, max_backoff: float = 30.0):
+        backoff = 0.0
+        while True:
+            # A broker error (e.g. "database is locked" from another process) must not end the
+            # worker: log it and back off. Batches it left leased are redelivered on lease expiry
+            try:
+                batch = await self.broker.consume(self.topic, self.batch_size, self.batch_wait)
+                if batch:
+                    await self._process(batch)
+                backoff = 0.0
+            except Exception as e:
+                backoff = min(max_backoff, max(0.5, backoff * 2))
+                self.stats["broker_errors"] += 1
+                logger.error(f"Stage '{self.stage}' worker error, retrying in {backoff:.1f}s: {e}")
+                await asyncio.sleep(backoff)
+
+    async def _process(self, batch):
+        start = time.perf_counter()
+        try:
+            contexts = [to_context(delivery.body) for delivery in batch]
+            errors = await HANDLERS[self.stage](contexts)
+        except Exception as e:
+            retry = [d.id for d in batch if d.attempts < self.max_attempts]
+            dead = [d for d in batch if d.attempts >= self.max_attempts]
+            logger.error(f"Stage '{self.stage}' failed on a batch of {len(batch)}: {e}")
+            if dead:
+                await self.broker.publish(DEAD_LETTER_TOPIC, [{**d.body, "failed_stage": self.stage, "error": str(e)} for d in dead])
+                await self.broker.ack(self.topic, [d.id for d in dead])
+                self.stats["dead_lettered"] += len(dead)
+            await self.broker.nack(self.topic, retry)
+            self.stats["retried"] += len(retry)
+            return
+
+        forward, dead = [], []
+        for delivery, ctx, error in zip(batch, contexts, errors):
+            if error:
+                logger.warning(f"Stage '{self.stage}': {error}", extra={"correlation_id": ctx.correlation_id})
+                dead.append({**delivery.body, "failed_stage": self.stage, "error": error})
+            elif "alert" in ctx.results:
+                forward.append(ctx.results["alert"].model_dump(mode="json"))
+            else:
+                forward.append(to_body(ctx, delivery.body))
+        # Publish before acking: a crash in between redelivers (at-least-once), never loses
+        if forward:
+            await self.broker.publish(next_topic(self.stage), forward)
+        if dead:
+            await self.broker.publish(DEAD_LETTER_TOPIC, dead)
+        await self.broker.ack(self.topic, [d.id for d in batch])
+
+        self.stats["batches"] += 1
+        self.stats["processed"] += len(forward)
+        self.stats["dead_lettered"] += len(dead)
+        self.stats["busy_s"] += time.perf_counter() - start
+
+
+def parse_worker_counts(spec: str) -> Dict[str, int]:
+    counts = {stage: max(1, int(n)) for stage, n in parse_weights(spec).items()}
+    unknown = [stage for stage in counts if stage not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages {unknown}, expected some of {STAGES}")
+    return counts
+
+
+class StageWorkerPool:
+    """Runs `counts[stage]` StageWorkers for each requested stage."""
+
+    def __init__(
+        self,
+        broker: Broker,
+        stages: List[str],
+        counts: Dict[str, int],
+        batch_size: Optional[int] = None,
+        batch_wait: Optional[float] = None,
+    ):
+        self.broker = broker
+        self.workers = [
+            StageWorker(
+                broker,
+                stage,
+                batch_size=batch_size or settings.ORCHESTRATOR_STREAMING_BATCH_SIZE,
+                batch_wait=settings.ORCHESTRATOR_STREAMING_BATCH_WAIT if batch_wait is None else batch_wait,
+                max_attempts=settings.ORCHESTRATOR_STREAMING_MAX_ATTEMPTS,
+            )
+            for stage in stages
+            for _ in range(counts.get(stage, 1))
+        ]
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(worker.run()) for worker in self.workers]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def stats(self) -> Dict[str, Any]:
+        stages: Dict[str, Any] = {}
+        for worker in self.workers:
+            entry = stages.setdefault(worker.stage, {"workers": 0, **{k: 0 for k in worker.stats}})
+            entry["workers"] += 1
+            for key, value in worker.stats.items():
+                entry[key] += value
+        for entry in stages.values():
+            entry["busy_s"] = round(entry["busy_s"], 1)
+        return stages
+
+
+async def topic_depths(broker: Broker) -> Dict[str, int]:
+    topics = [topic_for(stage) for stage in STAGES] + [next_topic(STAGES[-1]), DEAD_LETTER_TOPIC]
+    return {topic: await broker.depth(topic) for topic in topics}
+
+
+async def _main(args):
+    broker = build_broker()
+    counts = parse_worker_counts(settings.ORCHESTRATOR_STREAMING_WORKERS)
+    if args.workers:
+        counts = {stage: args.workers for stage in args.stage}
+    enable_local_stages()
+
+    pool = StageWorkerPool(broker, args.stage, counts, batch_size=args.batch_size, batch_wait=args.batch_wait)
+    pool.start()
+    logger.info(f"Streaming workers running: {', '.join(f'{s} x{counts.get(s, 1)}' for s in args.stage)}")
+    try:
+        while True:
+            await asyncio.sleep(args.report_interval)
+            logger.info(f"Stage stats: {await pool.stats()} Topic depths: {await topic_depths(broker)}")
+    finally:
+        await pool.stop()
+        await close_all()
+        await broker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run streaming enrichment stage workers.")
+    parser.add_argument("--stage", action="append", choices=STAGES + ["all"], required=True,
+                        help="Stage to consume (repeatable, or 'all').")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Consumers per stage (default: ORCHESTRATOR_STREAMING_WORKERS).")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--batch-wait", type=float, default=None)
+    parser.add_argument("--report-interval", type=float, default=30.0)
+    args = parser.parse_args()
+    if "all" in args.stage:
+        args.stage = list(STAGES)
+    if settings.ORCHESTRATOR_STREAMING_BROKER.lower() == "memory":
+        parser.error("The in-memory broker only works inside the orchestrator; set ORCHESTRATOR_STREAMING_BROKER=sqlite")
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import time
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import RawLogRequest, NormalizedLog, EnrichedAlert
+from .config import settings
+from .degradation import TIER_NOTES
+from .logger import logger
+from .metrics import SUPPRESSION_CHECKS
+
+SuppressionKey = Tuple[Tuple[str, Any], ...]
+
+
+@dataclass
+class SuppressionWindow:
+    key: SuppressionKey
+    started_at: float
+    first_correlation_id: str
+    # Resolves to the alert of the event that opened the window (None if it never produced one)
+    first: asyncio.Future
+    events: int = 0
+    suppressed: int = 0
+    # The leader had nothing to share: the next waiter (or new event) takes over as leader
+    needs_leader: bool = False
+    failed_leaders: int = 0
+
+
+@dataclass
+class SuppressionDecision:
+    window: Optional[SuppressionWindow] = None
+    # This event opened the window; repeats are counted onto its alert
+    leader: bool = False
+    # Over the window's threshold: wait for the first alert instead of enriching
+    candidate: bool = False
+    # Set once the event has been counted onto the first alert
+    first: Optional[EnrichedAlert] = None
+    repeat_count: int = 0
+
+
+class StormSuppressor:
+    """
+    Event-storm suppression. Normalized events are keyed on `key_fields` (partitioned by
+    `scope_fields`); each key opens a window of `window_seconds` at its first event. The first
+    `threshold` events of a window are enriched as usual, later ones are counted onto the
+    window's first alert and get a copy of its enrichment instead of going through the LLM stages.
+    Events with none of the `require_any` fields set are never suppressed, so that coarse keys
+    (e.g. only an event type) cannot swallow events from unrelated hosts.
+
+    A first alert from a degraded tier is shared as is. One with stage errors is retried up to
+    `leader_retries` times by promoting a waiting repeat to leader; after that it is shared with
+    its errors, so an outage of one service does not switch suppression off.
+    """
+
+    def __init__(
+        self,
+        key_fields: List[str],
+        scope_fields: List[str],
+        require_any: List[str],
+        window_seconds: float,
+        threshold: int,
+        max_keys: int,
+        leader_retries: int = 1,
+    ):
+        self.key_fields = key_fields
+        self.scope_fields = scope_fields
+        self.require_any = require_any
+        self.window_seconds = window_seconds
+        self.threshold = max(1, threshold)
+        self.max_keys = max_keys
+        self.leader_retries = leader_retries
+
+        self._windows: "OrderedDict[SuppressionKey, SuppressionWindow]" = OrderedDict()
+        self._stats = {
+            "checked": 0, "unkeyed": 0, "passed": 0, "suppressed": 0, "released": 0, "promoted": 0, "windows": 0, "storms": 0,
+        }
+
+    @staticmethod
+    def _field(name: str, payload: RawLogRequest, normalized: NormalizedLog) -> Any:
+        # Normalized attributes first, then parsed fields, then the caller's metadata
+        if name in NormalizedLog.model_fields and name not in ("normalized_fields", "raw_log", "timestamp"):
+            value = getattr(normalized, name)
+        else:
+            value = normalized.normalized_fields.get(name)
+        if value in (None, ""):
+            value = payload.metadata.get(name)
+        return None if value in (None, "") else value
+
+    def key_for(self, payload: RawLogRequest, normalized: NormalizedLog) -> Optional[SuppressionKey]:
+        if self.require_any and all(self._field(name, payload, normalized) is None for name in self.require_any):
+            return None
+        values = [(name, self._field(name, payload, normalized)) for name in self.key_fields]
+        scope = [(name, self._field(name, payload, normalized)) for name in self.scope_fields]
+        return tuple((name, str(value) if value is not None else None) for name, value in scope + values)
+
+    def check(self, payload: RawLogRequest, normalized: NormalizedLog, correlation_id: str) -> SuppressionDecision:
+        """Counts the event into its key's window and says whether it should be suppressed."""
+        self._stats["checked"] += 1
+        key = self.key_for(payload, normalized)
+        if key is None:
+            self._stats["unkeyed"] += 1
+            SUPPRESSION_CHECKS.labels("unkeyed").inc()
+            return SuppressionDecision()
+
+        now = time.monotonic()
+        self._expire(now)
+        window = self._windows.get(key)
+        if window is not None and now - window.started_at > self.window_seconds:
+            self._close(key)
+            window = None
+        if window is None:
+            window = SuppressionWindow(key, now, correlation_id, asyncio.get_running_loop().create_future())
+            self._windows[key] = window
+            self._stats["windows"] += 1
+            while len(self._windows) > self.max_keys:
+                self._close(next(iter(self._windows)))
+        self._windows.move_to_end(key)
+
+        window.events += 1
+        if window.needs_leader:
+            # Nobody was waiting when the last leader gave up; this event takes over
+            window.needs_leader = False
+            self._stats["promoted"] += 1
+            SUPPRESSION_CHECKS.labels("promoted").inc()
+            return SuppressionDecision(window=window, leader=True)
+        candidate = window.events > self.threshold
+        if not candidate:
+            self._stats["passed"] += 1
+            SUPPRESSION_CHECKS.labels("passed").inc()
+        return SuppressionDecision(window=window, leader=window.events == 1, candidate=candidate)
+
+    async def suppress(self, decision: SuppressionDecision, timeout: Optional[float] = None) -> Optional[EnrichedAlert]:
+        """
+        Waits (at most `timeout` seconds) for the first alert of a candidate's window and counts
+        the event onto it. Returns None when there is no first alert to count onto; the event
+        is then enriched as usual, either released or promoted to the window's leader (in which
+        case its alert is shared with the remaining waiters).
+        """
+        window = decision.window
+        give_up = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            future = window.first
+            remaining = max(0.0, give_up - time.monotonic()) if give_up is not None else None
+            try:
+                first = await asyncio.wait_for(asyncio.shield(future), remaining)
+            except asyncio.TimeoutError:
+                first, timed_out = None, True
+            else:
+                timed_out = False
+            if first is not None:
+                break
+            if timed_out or window.first is future:
+                # Out of time, or the window closed without a new leader
+                self._stats["released"] += 1
+                SUPPRESSION_CHECKS.labels("released").inc()
+                return None
+            if window.needs_leader:
+                # The leader had nothing to share: this waiter enriches in its place, the others keep waiting
+                window.needs_leader = False
+                decision.leader = True
+                self._stats["promoted"] += 1
+                SUPPRESSION_CHECKS.labels("promoted").inc()
+                return None
+
+        window.suppressed += 1
+        decision.first = first
+        decision.repeat_count = window.suppressed
+        self._stats["suppressed"] += 1
+        SUPPRESSION_CHECKS.labels("suppressed").inc()
+        return first
+
+    def publish(self, decision: SuppressionDecision, alert: Optional[EnrichedAlert]):
+        """
+        Hands the leader's alert to waiting repeats. Without an alert, or with one that has stage
+        errors while retries remain, the window stays open: a new future replaces the old one and
+        the next waiter (or the next event, if nobody is waiting) becomes the leader.
+        """
+        window = decision.window
+        future = window.first
+        # A degraded tier's note is not a stage error
+        if alert is None or any(error not in TIER_NOTES.values() for error in alert.errors):
+            window.failed_leaders += 1
+            retry = window.failed_leaders <= self.leader_retries
+            if retry and self._windows.get(window.key) is window:
+                window.first = asyncio.get_running_loop().create_future()
+                window.needs_leader = True
+                alert = None
+            elif retry:
+                # The window already closed: release the waiters
+                alert = None
+        if not future.done():
+            future.set_result(alert)
+
+    def _expire(self, now: float):
+        # Least recently seen keys first; stop at the first one still inside its window
+        while self._windows:
+            key, window = next(iter(self._windows.items()))
+            if now - window.started_at <= self.window_seconds:
+                break
+            self._close(key)
+
+    def _close(self, key: SuppressionKey):
+        window = self._windows.pop(key)
+        if window.needs_leader and not window.first.done():
+            # Nobody took over before the window ended: release whoever is still waiting
+            window.first.set_result(None)
+        if window.suppressed:
+            self._stats["storms"] += 1
+            logger.info(
+                f"Suppressed {window.suppressed} of {window.events} events for {dict(key)} "
+                f"over {time.monotonic() - window.started_at:.0f}s into alert {window.first_correlation_id}",
+                extra={"correlation_id": window.first_correlation_id}
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        active = [w for w in self._windows.values() if now - w.started_at <= self.window_seconds]
+        storms = sorted((w for w in active if w.suppressed), key=lambda w: w.suppressed, reverse=True)
+        return {
+            **self._stats,
+            "window_s": self.window_seconds,
+            "threshold": self.threshold,
+            "active_windows": len(active),
+            # Largest storms currently being suppressed
+            "top_storms": [
+                {
+                    "key": dict(w.key),
+                    "first_correlation_id": w.first_correlation_id,
+                    "events": w.events,
+                    "suppressed": w.suppressed,
+                    "age_s": round(now - w.started_at, 1),
+                }
+                for w in storms[:10]
+            ],
+        }
+
+
+def _fields(spec: str) -> List[str]:
+    return [f.strip() for f in spec.split(",") if f.strip()]
+
+
+def _build_suppressor() -> Optional[StormSuppressor]:
+    if not settings.ORCHESTRATOR_SUPPRESSION_ENABLED:
+        return None
+    return StormSuppressor(
+        key_fields=_fields(settings.ORCHESTRATOR_SUPPRESSION_KEY_FIELDS),
+        scope_fields=_fields(settings.ORCHESTRATOR_SUPPRESSION_SCOPE_FIELDS),
+        require_any=_fields(settings.ORCHESTRATOR_SUPPRESSION_REQUIRE_ANY),
+        window_seconds=settings.ORCHESTRATOR_SUPPRESSION_WINDOW,
+        threshold=settings.ORCHESTRATOR_SUPPRESSION_THRESHOLD,
+        max_keys=settings.ORCHESTRATOR_SUPPRESSION_MAX_KEYS,
+    )
+
+
+# Shared suppressor (None when suppression is disabled)
+storm_suppressor = _build_suppressor()
@@ -1,11 +1,6 @@
-import httpx
 from typing import Optional, List
 from .models import NormalizedLog, SemanticResult, IntentResult, MitreResult, RiskScore
 
-# Shared Async Client
-# We'll instantiate this in app startup or use a singleton pattern
-async_client = httpx.AsyncClient()
-
 def build_summary(
     normalized: Optional[NormalizedLog],
     semantic: Optional[SemanticResult],
@@ -1,11 +1,15 @@
 import logging
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional
 
 from .llm_client import get_semantic_interpretation
 from .parser import LogAnalysis
-from .utils import preprocess_log
+from .utils import preprocess_log, Deadline, DeadlineExceeded, DEADLINE_HEADER
+from .metrics import instrument_app
+from .tracing import trace_app, tracer
+from .profiler import install_profiler
 
 # Configure logging
 logging.basicConfig(
@@ -15,21 +19,36 @@ logging.basicConfig(
 logger = logging.getLogger("semantic_interpreter")
 
 app = FastAPI(title="Semantic Log Interpreter")
+instrument_app(app)
+trace_app(app)
+install_profiler(app)
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    logger.warning(f"Abandoning request: {exc}")
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
 
 class LogInput(BaseModel):
     raw_log: str = Field(..., description="The raw log text to interpret")
     fields: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional context fields extracted from the log")
 
+@app.get("/health")
+async def health_check():
+    return {"status": "ok"}
+
 @app.post("/interpret", response_model=LogAnalysis)
-async def interpret_log(input_data: LogInput):
+async def interpret_log(input_data: LogInput, request: Request):
     """
     Endpoint to interpret a raw log line and return a structured semantic analysis.
+    Returns 504 without calling the LLM once the caller's X-Deadline-Ms budget is spent.
     """
+    deadline = Deadline(request.headers.get(DEADLINE_HEADER))
     logger.info(f"Received interpretation request. Log preview: {input_data.raw_log[:50]}...")
     
     try:
         # 1. Preprocess
-        clean_log = preprocess_log(input_data.raw_log)
+        with tracer.start_as_current_span("preprocess"):
+            clean_log = preprocess_log(input_data.raw_log)
         
         if not clean_log:
             logger.warning("Log text is empty after preprocessing.")
@@ -44,12 +63,12 @@ async def interpret_log(input_data: LogInput):
 
         # 3. Call LLM Client
         logger.info("Dispatching to Groq LLM...")
-        result = await get_semantic_interpretation(llm_input)
+        result = await get_semantic_interpretation(llm_input, deadline)
         
         logger.info("Successfully received interpretation from LLM.")
         return result
         
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         logger.error(f"Internal error during interpretation: {str(e)}", exc_info=True)
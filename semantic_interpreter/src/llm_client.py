@@ -1,17 +1,24 @@
 import os
 import json
 import asyncio
-from groq import AsyncGroq
+from groq import AsyncGroq, NOT_GIVEN
 from dotenv import load_dotenv
 
 from .prompts import SYSTEM_PROMPT, LOG_ANALYSIS_TEMPLATE
 from .parser import LogAnalysis
+from .utils import Deadline
+from .metrics import track_llm_call, LLM_RETRIES
+from .tracing import tracer
 
 load_dotenv()
 
-client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+# Point at llm_stub (e.g. http://localhost:8005) to load-test without the real API
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or "https://api.groq.com"
+client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), base_url=GROQ_BASE_URL)
+LLM_MODEL = "qwen/qwen3-32b"
 
-async def get_semantic_interpretation(log_json: dict):
+async def get_semantic_interpretation(log_json: dict, deadline: Deadline = None):
+    deadline = deadline or Deadline()
     raw_log = log_json.get("raw_log", "")
     known_fields = log_json.get("known_fields", {})
 
@@ -26,17 +33,29 @@ async def get_semantic_interpretation(log_json: dict):
     ]
 
     for attempt in range(3):
+        # Raises DeadlineExceeded instead of retrying for a caller that already gave up
+        deadline.check(f"LLM attempt {attempt+1}")
+        if attempt:
+            LLM_RETRIES.inc()
         try:
-            completion = await client.chat.completions.create(
-                model="qwen/qwen3-32b",
-                temperature=0,
-                response_format={"type": "json_object"},
-                messages=messages
-            )
-
-            content = completion.choices[0].message.content
-            parsed = json.loads(content)
-            validated = LogAnalysis(**parsed)
+            with tracer.start_as_current_span("llm.call", attributes={"llm.model": LLM_MODEL, "llm.attempt": attempt + 1}) as span, \
+                    track_llm_call(LLM_MODEL) as call:
+                completion = await client.chat.completions.create(
+                    model=LLM_MODEL,
+                    temperature=0,
+                    response_format={"type": "json_object"},
+                    messages=messages,
+                    # Without a deadline the client's own timeout applies (None would disable it)
+                    timeout=deadline.remaining() if deadline.expires_at is not None else NOT_GIVEN
+                )
+                call.usage = completion.usage
+                if completion.usage:
+                    span.set_attribute("llm.total_tokens", completion.usage.total_tokens or 0)
+
+            with tracer.start_as_current_span("parse"):
+                content = completion.choices[0].message.content
+                parsed = json.loads(content)
+                validated = LogAnalysis(**parsed)
             return validated.model_dump()
 
         except Exception as e:
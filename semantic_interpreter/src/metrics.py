@@ -0,0 +1,80 @@
+"""
+Prometheus metrics, exported on GET /metrics.
+
+Every service carries its own copy of the request instrumentation (instrument_app) and
+namespaces its metrics with the service name, so services loaded in-process by the
+orchestrator export side by side without clashing.
+"""
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from fastapi import FastAPI, Request, Response
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+NAMESPACE = "semantic_interpreter"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled, by route and status code.",
+    ["method", "route", "status"], namespace=NAMESPACE,
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.",
+    ["method", "route"], namespace=NAMESPACE, buckets=LATENCY_BUCKETS,
+)
+
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "Latency of LLM completion calls; outcome is ok or error.",
+    ["model", "outcome"], namespace=NAMESPACE, buckets=LATENCY_BUCKETS,
+)
+LLM_RETRIES = Counter(
+    "llm_retries_total", "LLM attempts made after a failed or unparseable answer.", namespace=NAMESPACE,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens billed by the LLM provider; kind is prompt or completion.",
+    ["model", "kind"], namespace=NAMESPACE,
+)
+
+
+@contextmanager
+def track_llm_call(model: str):
+    """
+    Times one LLM completion call. Set `call.usage = completion.usage` inside the block to
+    count tokens; an exception raised in the block is recorded as an error and re-raised.
+    """
+    call = SimpleNamespace(usage=None)
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        LLM_LATENCY.labels(model, "error").observe(time.perf_counter() - start)
+        raise
+    LLM_LATENCY.labels(model, "ok").observe(time.perf_counter() - start)
+    if call.usage is not None:
+        LLM_TOKENS.labels(model, "prompt").inc(getattr(call.usage, "prompt_tokens", 0) or 0)
+        LLM_TOKENS.labels(model, "completion").inc(getattr(call.usage, "completion_tokens", 0) or 0)
+
+
+def instrument_app(app: FastAPI):
+    """Records count and latency of every request by route template, and serves /metrics."""
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # The route template (not the raw path) keeps label cardinality bounded
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            if path != "/metrics":
+                HTTP_REQUESTS.labels(request.method, path, str(status)).inc()
+                HTTP_LATENCY.labels(request.method, path).observe(time.perf_counter() - start)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,130 @@
+"""
+Distributed tracing (OpenTelemetry).
+
+The trace context arrives in the W3C `traceparent` header, so spans opened here (request,
+preprocessing, LLM calls, parsing) join the orchestrator's trace. Every span also carries the caller's X-Correlation-ID
+as `correlation_id`, so one slow event can be looked up by its ID.
+
+TRACING_EXPORTER selects where spans go: "none" (default; spans are no-ops), "otlp"
+(OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT, e.g. a local collector on :4318) or "jsonl"
+(one span per line appended to TRACING_JSONL_PATH).
+"""
+import os
+import json
+import threading
+import contextvars
+from typing import Optional, Sequence
+
+from fastapi import FastAPI, Request
+from opentelemetry import trace, propagate
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider, SpanProcessor, ReadableSpan
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+SERVICE_NAME = "semantic_interpreter"
+CORRELATION_HEADER = "X-Correlation-ID"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_JSONL_PATH = os.getenv("TRACING_JSONL_PATH", "./traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+# Probes and scrapes would drown out the interesting traces
+UNTRACED_PATHS = {"/health", "/ready", "/metrics"}
+
+correlation_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("correlation_id", default=None)
+tracer = trace.get_tracer(SERVICE_NAME)
+
+
+class CorrelationIdProcessor(SpanProcessor):
+    """Tags every span started while handling a request with that request's correlation ID."""
+
+    def on_start(self, span, parent_context=None):
+        correlation_id = correlation_id_var.get()
+        if correlation_id:
+            span.set_attribute("correlation_id", correlation_id)
+
+
+def span_record(span: ReadableSpan) -> dict:
+    context = span.get_span_context()
+    return {
+        "trace_id": format(context.trace_id, "032x"),
+        "span_id": format(context.span_id, "016x"),
+        "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+        "service": span.resource.attributes.get("service.name", SERVICE_NAME),
+        "name": span.name,
+        "start_unix_ns": span.start_time,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+    }
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends finished spans to a local file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(json.dumps(span_record(span), default=str) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def _build_exporter() -> Optional[SpanExporter]:
+    if TRACING_EXPORTER == "none":
+        return None
+    if TRACING_EXPORTER == "jsonl":
+        return JsonlSpanExporter(TRACING_JSONL_PATH)
+    if TRACING_EXPORTER == "otlp":
+        # Optional dependency: only needed when exporting to a collector
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    raise ValueError(f"Unknown TRACING_EXPORTER '{TRACING_EXPORTER}', expected none, otlp or jsonl")
+
+
+def setup_tracing():
+    """Installs the exporting tracer provider (once per process)."""
+    exporter = _build_exporter()
+    # Loaded in-process by the orchestrator: its provider is already in place
+    if exporter is None or isinstance(trace.get_tracer_provider(), TracerProvider):
+        return
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(CorrelationIdProcessor())
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+
+def trace_app(app: FastAPI):
+    """Opens a server span per request, continuing the caller's trace."""
+    setup_tracing()
+
+    @app.middleware("http")
+    async def trace_request(request: Request, call_next):
+        if request.url.path in UNTRACED_PATHS:
+            return await call_next(request)
+        token = correlation_id_var.set(request.headers.get(CORRELATION_HEADER))
+        try:
+            with tracer.start_as_current_span(
+                f"{request.method} {request.url.path}",
+                context=propagate.extract(request.headers),
+                kind=trace.SpanKind.SERVER,
+            ) as span:
+                response = await call_next(request)
+                route = request.scope.get("route")
+                if route is not None:
+                    span.update_name(f"{request.method} {route.path}")
+                span.set_attribute("http.status_code", response.status_code)
+                return response
+        finally:
+            correlation_id_var.reset(token)
@@ -1,3 +1,7 @@
+import time
+from typing import Optional
+
+
 def preprocess_log(log_text: str) -> str:
     """
     Cleans and normalizes a log string.
@@ -6,3 +10,34 @@ def preprocess_log(log_text: str) -> str:
     if not log_text:
         return ""
     return " ".join(log_text.split())
+
+
+# Request deadline
+# The orchestrator sends the time it is still willing to wait (ms) in X-Deadline-Ms.
+# Expensive work (LLM calls, embedding) is skipped once nobody will read the answer.
+# Each service keeps its own copy: every image is built from its own directory only.
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the caller's deadline has passed before some expensive step."""
+
+
+class Deadline:
+    def __init__(self, header_value: Optional[str] = None):
+        self.expires_at = None
+        if header_value:
+            try:
+                self.expires_at = time.monotonic() + float(header_value) / 1000
+            except ValueError:
+                pass
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when the caller set no deadline."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, step: str):
+        if self.expires_at is not None and self.remaining() <= 0:
+            raise DeadlineExceeded(f"Request deadline exceeded before {step}")